@@ -0,0 +1,92 @@
+"""
+Benchmarks the memory-mapped bytes path for counting words in plain text
+files against the str path.
+
+Generates text files holding SRT dumps of English and of accented
+dialogue, and times both paths. English text is cleaned as bytes, while
+chunks containing accented characters fall back to clean_text().
+
+Usage:
+    $ PYTHONPATH=. python benchmarks/bench_bytes_counting.py [cues]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import (
+    _count_words_with_mmap,
+    count_words,
+    iter_text_from_file,
+)
+
+
+LINES = {
+    "English": [
+        "Where is the train station?",
+        "<i>I don't know, but I think it's near the river.</i>",
+        "He said, without thinking, that he would be back tomorrow.",
+        "The quick brown fox jumps over the lazy dog.",
+    ],
+    "accented": [
+        "¿Dónde está la estación de tren?",
+        "<i>No lo sé, pero creo que está cerca del río.</i>",
+        "Él dijo—sin pensarlo—que volvería mañana.",
+        "The quick brown fox jumps over the lazy dog.",
+    ],
+}
+
+
+def build_srt(filepath, cues, lines):
+    """Writes an SRT file with the given number of cues."""
+    with open(filepath, "w", encoding="utf-8") as f:
+        for cue in range(cues):
+            seconds = cue * 2
+            start = f"00:{seconds // 60 % 60:02}:{seconds % 60:02},000"
+            end = f"00:{seconds // 60 % 60:02}:{seconds % 60:02},900"
+            f.write(f"{cue + 1}\n{start} --> {end}\n")
+            f.write(f"{lines[cue % len(lines)]}\n")
+            f.write(f"{lines[(cue + 1) % len(lines)]}\n\n")
+
+
+def timed(func, *args):
+    """Returns the wall-clock time of a call, and its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    cues = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    chunk_size = 1 << 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, lines in LINES.items():
+            text_path = Path(directory) / f"{name}.txt"
+            build_srt(text_path, cues, lines)
+            size = text_path.stat().st_size / (1 << 20)
+
+            str_time, expected = timed(
+                lambda: count_words(
+                    iter_text_from_file(text_path, chunk_size)
+                    )
+                )
+            bytes_time, counts = timed(
+                _count_words_with_mmap, text_path, chunk_size
+                )
+            assert counts == expected, "outputs differ"
+
+            print(
+                f"Word counting on {cues:,} dumped SRT cues of {name} "
+                f"dialogue ({size:.1f} MiB)"
+            )
+            print(f"  str path:   {str_time:.2f}s")
+            print(
+                f"  bytes path: {bytes_time:.2f}s "
+                f"({str_time / bytes_time:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmarks generate_word_list() against the original per-token regex version.
+
+Usage:
+    $ PYTHONPATH=. python benchmarks/bench_generate_word_list.py [tokens]
+"""
+
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from string import punctuation
+
+from src.utils import generate_word_list
+
+
+def legacy_generate_word_list(text):
+    """The original implementation, kept as a reference point."""
+    word_freq = defaultdict(int)
+    extra_punc = '¿¡♪«»—©‘’–‚”“„•[]【】〔〕〚〛'
+    punc_chars = re.escape(punctuation + extra_punc)
+    if text:
+        words = text.lower().split()
+        for word in words:
+            word = re.sub(r"^\d+(?=[^\W\d_])", "", word, flags=re.UNICODE)
+            word = re.sub(r"\[\d+\W*", "", word)
+            word = re.sub(rf'^[{punc_chars}]*|[{punc_chars}]*$', '', word)
+            if not word or not any(char.isalpha() for char in word):
+                continue
+            word_freq[word] += 1
+    return word_freq
+
+
+def build_corpus(tokens, seed=0):
+    """Builds subtitle-like text with a Zipfian vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyzáéíóúčšž")
+                for _ in range(rng.randint(2, 10)))
+        for _ in range(20000)
+    ]
+    decorations = ["", "", "", ",", ".", "?", "!", "«", "»", "¿", "22", "[1]"]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    words = rng.choices(vocabulary, weights=weights, k=tokens)
+    parts = []
+    for word in words:
+        decoration = rng.choice(decorations)
+        if decoration in ("«", "¿", "22"):
+            parts.append(decoration + word.capitalize())
+        else:
+            parts.append(word + decoration)
+    return " ".join(parts)
+
+
+def timed(func, text, repeat=3):
+    """Returns the best wall-clock time of several runs, and the result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    text = build_corpus(tokens)
+
+    legacy_time, legacy_result = timed(legacy_generate_word_list, text)
+    new_time, new_result = timed(generate_word_list, text)
+
+    assert dict(legacy_result) == dict(new_result), "outputs differ"
+
+    print(f"generate_word_list on {tokens:,} tokens")
+    print(f"  legacy: {legacy_time:.3f}s")
+    print(f"  current: {new_time:.3f}s")
+    print(f"  speedup: {legacy_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
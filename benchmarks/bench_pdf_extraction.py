@@ -0,0 +1,76 @@
+"""
+Benchmarks PDF text extraction against the original serial += loop.
+
+Generates a PDF with reportlab and times extraction with an increasing
+number of worker processes.
+
+Usage:
+    $ PYTHONPATH=. python benchmarks/bench_pdf_extraction.py [pages]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pypdf import PdfReader
+from reportlab.pdfgen.canvas import Canvas
+
+from src.utils import extract_pdf_text
+
+
+def legacy_extract_pdf_text(filepath):
+    """The original implementation, kept as a reference point."""
+    pdf_reader = PdfReader(filepath)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text
+
+
+def build_pdf(filepath, pages):
+    """Writes a PDF with several lines of text on every page."""
+    canvas = Canvas(str(filepath))
+    for page in range(pages):
+        for line in range(40):
+            canvas.drawString(
+                72, 760 - line * 18,
+                f"Page {page} line {line}: the quick brown fox jumps over "
+                "the lazy dog while the dog was not amused."
+            )
+        canvas.showPage()
+    canvas.save()
+
+
+def timed(func, *args):
+    """Returns the wall-clock time of a call, and its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = Path(directory) / "benchmark.pdf"
+        build_pdf(pdf_path, pages)
+
+        legacy_time, expected = timed(legacy_extract_pdf_text, pdf_path)
+        print(f"PDF extraction on {pages:,} pages")
+        print(f"  legacy: {legacy_time:.2f}s")
+
+        workers = 1
+        while workers <= max(os.cpu_count() or 1, 4):
+            elapsed, text = timed(extract_pdf_text, pdf_path, None, workers)
+            assert text == expected, "outputs differ"
+            print(
+                f"  {workers} worker(s): {elapsed:.2f}s "
+                f"({legacy_time / elapsed:.1f}x)"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmarks the streaming SRT parser against the original whole-text regex
+cleaning.
+
+Generates an SRT file with formatted, multi-line cues and times both
+approaches, checking that they find the same words.
+
+Usage:
+    $ PYTHONPATH=. python benchmarks/bench_srt_parsing.py [cues]
+"""
+
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import count_words, extract_text_from_file
+
+
+def legacy_extract_srt_text(filepath):
+    """The original implementation, kept as a reference point."""
+    with open(filepath, encoding="utf-8-sig") as f:
+        text = f.read()
+    timestamp_pattern = (
+        r'\d+\s+\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\s*'
+    )
+    tag_pattern = r'<.*?>'
+    text = re.sub(f"{timestamp_pattern}|{tag_pattern}", "", text)
+    text = re.sub(r'[\u200B\u200C\u200D\u2060\uFEFF]', '', text)
+    text = re.sub(r'\\an8}', '', text)
+    text = re.sub(r'\d\.\w+(?:\.\w+)?', '', text)
+    return re.sub(r'(?<=\w)—(?=\w)', ' ', text)
+
+
+LINES = [
+    "- ¿Dónde está la estación de tren?",
+    "<i>No lo sé, pero creo que está cerca del río.</i>",
+    "Él dijo—sin pensarlo—que volvería mañana.",
+    "<font color=\"#ffff00\">The quick brown fox</font> jumps over it.",
+]
+
+
+def build_srt(filepath, cues):
+    """Writes an SRT file with the given number of cues."""
+    with open(filepath, "w", encoding="utf-8") as f:
+        for cue in range(cues):
+            seconds = cue * 2
+            start = f"{seconds // 3600:02}:{seconds // 60 % 60:02}:" \
+                f"{seconds % 60:02},000"
+            end = f"{seconds // 3600:02}:{seconds // 60 % 60:02}:" \
+                f"{seconds % 60:02},900"
+            f.write(f"{cue + 1}\n{start} --> {end}\n")
+            f.write(f"{LINES[cue % len(LINES)]}\n")
+            f.write(f"{LINES[(cue + 1) % len(LINES)]}\n\n")
+
+
+def timed(func, *args, repeat=3):
+    """Returns the best wall-clock time of several runs, and the result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    cues = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as directory:
+        srt_path = Path(directory) / "benchmark.srt"
+        build_srt(srt_path, cues)
+        size = srt_path.stat().st_size / (1 << 20)
+
+        legacy_time, expected = timed(legacy_extract_srt_text, srt_path)
+        parser_time, text = timed(extract_text_from_file, srt_path)
+        assert count_words([text]) == count_words([expected]), \
+            "outputs differ"
+
+        print(f"SRT extraction on {cues:,} cues ({size:.1f} MiB)")
+        print(f"  regex:  {legacy_time:.2f}s")
+        print(
+            f"  parser: {parser_time:.2f}s "
+            f"({legacy_time / parser_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
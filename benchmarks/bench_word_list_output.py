@@ -0,0 +1,68 @@
+"""
+Benchmarks writing a large word list in full against keeping only its
+most frequent words.
+
+Generates a vocabulary with Zipf-like counts and times the alphabetical
+CSV writer, a frequency-ordered full sort, and the heap used for top-N.
+
+Usage:
+    $ PYTHONPATH=. python benchmarks/bench_word_list_output.py [words] [top]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import _frequency_key, iter_word_list_rows, write_word_list
+
+
+def build_vocabulary(size):
+    """Returns a dictionary of distinct words with Zipf-like counts."""
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyzáéíóúñ"
+    words = {}
+    while len(words) < size:
+        word = "".join(rng.choice(letters) for _ in range(rng.randint(3, 12)))
+        words[word] = max(1, int(100000 / (len(words) + 1)))
+    return words
+
+
+def timed(func, *args):
+    """Returns the wall-clock time of a call, and its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    words = build_vocabulary(size)
+
+    sort_time, expected = timed(
+        lambda: sorted(words.items(), key=_frequency_key)[:top]
+        )
+    heap_time, rows = timed(
+        lambda: list(iter_word_list_rows(words, "frequency", top))
+        )
+    assert rows == expected, "outputs differ"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "words.csv"
+        full_time, _ = timed(write_word_list, words, path)
+        top_time, _ = timed(
+            write_word_list, words, path, "csv", "frequency", top
+            )
+
+    print(f"Selecting the top {top:,} of {size:,} words")
+    print(f"  full sort: {sort_time:.2f}s")
+    print(f"  heap:      {heap_time:.2f}s ({sort_time / heap_time:.1f}x)")
+    print("Writing the word list as CSV")
+    print(f"  every word, alphabetical: {full_time:.2f}s")
+    print(f"  top {top:,}, by frequency: {top_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
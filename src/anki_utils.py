@@ -1,8 +1,24 @@
-import requests
 from string import punctuation
 import re
 import html
 import os
+import json
+import math
+import time
+import hashlib
+from pathlib import Path
+from contextlib import contextmanager
+import sqlite3
+import shutil
+import tempfile
+
+try:
+    import utils
+except ImportError:
+    from src import utils
+
+SYNC_STATE_VERSION = 1
+NOTES_INFO_CHUNK_SIZE = 500
 
 
 def get_anki_connect_url():
@@ -26,68 +42,466 @@ def get_anki_decks():
         None.
 
     Returns:
-        list: The names of all decks in the user's Anki collection.
+        list: The names of all decks in the user's Anki collection, or an
+            empty list if AnkiConnect reports an error.
     """
-    anki_connect_url = get_anki_connect_url()
+    try:
+        return invoke("deckNames") or []
+    except AnkiConnectError:
+        return []
+
 
-    payload = {
-        "action": "deckNames",
-        "version": 6
-    }
-    response = requests.post(anki_connect_url, json=payload, timeout=5)
-    return response.json().get("result", [])
+class AnkiConnectError(Exception):
+    """Raised when AnkiConnect reports an error for an action."""
 
 
-def get_words_from_deck(deck_name):
+def invoke(action, **params):
     """
-    Retrieves all the unique words that appear in an Anki deck.
+    Sends a request to AnkiConnect and returns its result.
 
     Args:
-        deck_name (str): The name of an Anki deck.
+        action (str): The name of the AnkiConnect action.
+        **params: The parameters for the action.
 
     Returns:
-        set: All unique words appearing in cards from the given deck.
+        The "result" value of the response, or None if it is missing.
+
+    Raises:
+        AnkiConnectError: If the response has a non-null "error" value.
     """
-    anki_connect_url = get_anki_connect_url()
+    payload = {"action": action, "version": 6}
+    if params:
+        payload["params"] = params
+    response = utils.get_http_session().post(
+        get_anki_connect_url(), json=payload
+        )
+    response_json = response.json()
+    if response_json.get("error") is not None:
+        raise AnkiConnectError(
+            f"AnkiConnect {action} failed: {response_json['error']}"
+            )
+    return response_json.get("result")
 
-    query = f'deck:"{deck_name}"'
 
-    notes_payload = {
-        "action": "findNotes",
-        "version": 6,
-        "params": {"query": query}
-    }
+def invoke_multi(actions):
+    """
+    Sends several actions to AnkiConnect in a single request.
 
-    response = requests.post(anki_connect_url, json=notes_payload, timeout=5)
-    response_json = response.json()
-    note_ids = response_json.get("result", [])
+    Args:
+        actions (list): (action, params) pairs, where params is a dict.
 
-    info_payload = {
-        "action": "notesInfo",
-        "version": 6,
-        "params": {"notes": note_ids}
-    }
+    Returns:
+        list: The result of each action, or None for missing results.
 
-    response = requests.post(anki_connect_url, json=info_payload, timeout=5)
-    response_json = response.json()
-    notes = response_json.get("result", [])
+    Raises:
+        AnkiConnectError: If AnkiConnect reports an error for any action.
+    """
+    payload = [
+        {"action": action, "version": 6, "params": params}
+        for action, params in actions
+        ]
+    results = invoke("multi", actions=payload) or []
+    for (action, _), result in zip(actions, results):
+        if isinstance(result, dict) and result.get("error") is not None:
+            raise AnkiConnectError(
+                f"AnkiConnect {action} failed: {result['error']}"
+                )
+    results = [
+        result.get("result") if isinstance(result, dict) else result
+        for result in results
+        ]
+    return results + [None] * (len(actions) - len(results))
+
+
+def iter_notes_info(note_ids, chunk_size=NOTES_INFO_CHUNK_SIZE):
+    """
+    Yields note details from AnkiConnect, requesting them in chunks.
+
+    Args:
+        note_ids (list): The ids of the notes to retrieve.
+        chunk_size (int): The number of notes requested per call.
+
+    Yields:
+        dict: Each note as returned by the notesInfo action. Notes from
+            failed requests are skipped.
+    """
+    note_ids = list(note_ids)
+    for start in range(0, len(note_ids), chunk_size):
+        chunk = note_ids[start:start + chunk_size]
+        for note in invoke("notesInfo", notes=chunk) or []:
+            if note and "noteId" in note:
+                yield note
+
+
+def _extract_note_words(note):
+    """
+    Extracts the unique words from the front and back of an Anki note.
+
+    Args:
+        note (dict): A note as returned by the AnkiConnect notesInfo action.
+
+    Returns:
+        set: All unique words appearing in the note.
+    """
+    return _extract_words(
+        note['fields']['Front']['value'], note['fields']['Back']['value']
+        )
+
+
+def _extract_words(front, back):
+    """
+    Extracts the unique words from the HTML front and back of a card.
+
+    Args:
+        front (str): The HTML content of the front field.
+        back (str): The HTML content of the back field.
+
+    Returns:
+        set: All unique words appearing in either field.
+    """
+    word_string = front.lower() + ' ' + back.lower()
+
+    word_string = re.sub(r'<[^>]+>', ' ', word_string)
+    word_string = html.unescape(word_string)
+
+    words = re.findall(r'\b\w[\w\'-]*\b', word_string)
 
     word_list = set()
     punc_chars = punctuation + '¿¡♪'
 
-    for note in notes:
-        front = note['fields']['Front']['value'].lower()
-        back = note['fields']['Back']['value'].lower()
-        word_string = front + ' ' + back
+    for word in words:
+        word = re.sub(rf'^[{punc_chars}]*|[{punc_chars}]*$', '', word)
+        if word:
+            word_list.add(word)
+
+    return word_list
 
-        word_string = re.sub(r'<[^>]+>', ' ', word_string)
-        word_string = html.unescape(word_string)
 
-        words = re.findall(r'\b\w[\w\'-]*\b', word_string)
+def get_words_from_deck(deck_name, chunk_size=NOTES_INFO_CHUNK_SIZE):
+    """
+    Retrieves all the unique words that appear in an Anki deck.
 
-        for word in words:
-            word = re.sub(rf'^[{punc_chars}]*|[{punc_chars}]*$', '', word)
-            if word:
-                word_list.add(word)
+    Args:
+        deck_name (str): The name of an Anki deck.
+        chunk_size (int): The number of notes requested per call.
+
+    Returns:
+        set: All unique words appearing in cards from the given deck.
+    """
+    note_ids = invoke("findNotes", query=f'deck:"{deck_name}"') or []
+
+    word_list = set()
+
+    for note in iter_notes_info(note_ids, chunk_size):
+        word_list.update(_extract_note_words(note))
 
     return word_list
+
+
+def get_words_from_decks(deck_names, chunk_size=NOTES_INFO_CHUNK_SIZE):
+    """
+    Retrieves the unique words that appear in each of several Anki decks.
+
+    The note ids of every deck are found in a single request, and notes
+    shared between decks are only downloaded once.
+
+    Args:
+        deck_names (list): The names of the Anki decks.
+        chunk_size (int): The number of notes requested per call.
+
+    Returns:
+        dict: The set of unique words in each deck, keyed by deck name.
+    """
+    results = invoke_multi([
+        ("findNotes", {"query": f'deck:"{name}"'}) for name in deck_names
+        ])
+    deck_ids = {
+        name: set(ids or []) for name, ids in zip(deck_names, results)
+        }
+    word_lists = {name: set() for name in deck_names}
+
+    for note in iter_notes_info(sorted(set().union(*deck_ids.values())),
+                                chunk_size):
+        note_words = _extract_note_words(note)
+        for name, ids in deck_ids.items():
+            if note["noteId"] in ids:
+                word_lists[name].update(note_words)
+
+    return word_lists
+
+
+def get_sync_state_path(deck_name, cache_dir=None):
+    """
+    Returns the file used to store the synced words of an Anki deck.
+
+    Args:
+        deck_name (str): The name of an Anki deck.
+        cache_dir (Path, optional): The folder holding sync state files.
+            Defaults to the "anki" folder inside the cache directory.
+
+    Returns:
+        Path: A JSON file unique to the AnkiConnect URL and deck name.
+    """
+    if cache_dir is None:
+        cache_dir = utils.get_cache_dir() / "anki"
+    key = f"{get_anki_connect_url()}\n{deck_name}".encode("utf-8")
+    return Path(cache_dir) / f"{hashlib.sha256(key).hexdigest()}.json"
+
+
+def _load_sync_state(path):
+    """Returns the saved sync state at path, or None if it is unusable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or \
+            state.get("version") != SYNC_STATE_VERSION:
+        return None
+    return state
+
+
+def _save_sync_state(path, state):
+    """Writes the sync state to path, replacing it atomically."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".part")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+
+def sync_words_from_decks(deck_names, cache_dir=None,
+                          chunk_size=NOTES_INFO_CHUNK_SIZE):
+    """
+    Retrieves the unique words in several Anki decks, using a local cache.
+
+    The words of every note are saved alongside its modification time.
+    Later calls only download notes that are new or were edited since the
+    previous sync, and forget notes that have been deleted from a deck.
+    The note queries for all decks are sent in a single request.
+
+    Args:
+        deck_names (list): The names of the Anki decks.
+        cache_dir (Path, optional): The folder holding sync state files.
+        chunk_size (int): The number of notes requested per call.
+
+    Returns:
+        dict: The set of unique words in each deck, keyed by deck name.
+    """
+    started = time.time()
+    paths = {name: get_sync_state_path(name, cache_dir) for name in deck_names}
+    states = {name: _load_sync_state(paths[name]) for name in deck_names}
+
+    actions = []
+    for name in deck_names:
+        query = f'deck:"{name}"'
+        actions.append(("findNotes", {"query": query}))
+        if states[name]:
+            elapsed_days = (started - states[name]["synced"]) / 86400
+            days = max(1, math.ceil(elapsed_days) + 1)
+            actions.append(("findNotes", {"query": f"{query} edited:{days}"}))
+    results = iter(invoke_multi(actions))
+
+    current = {}
+    to_fetch = {}
+    for name in deck_names:
+        note_ids = next(results)
+        edited = next(results) if states[name] else []
+        if note_ids is None:
+            continue
+        cached = states[name]["notes"] if states[name] else {}
+        current[name] = {str(note_id) for note_id in note_ids}
+        to_fetch[name] = current[name].difference(cached)
+        to_fetch[name].update(
+            str(note_id) for note_id in edited or []
+            if str(note_id) in current[name]
+            )
+
+    fetched = {}
+    needed = set().union(*to_fetch.values())
+    for note in iter_notes_info(sorted(int(i) for i in needed), chunk_size):
+        fetched[str(note["noteId"])] = {
+            "mod": note.get("mod"),
+            "words": sorted(_extract_note_words(note))
+            }
+
+    word_lists = {name: set() for name in deck_names}
+    for name in current:
+        cached = states[name]["notes"] if states[name] else {}
+        notes = {
+            note_id: fetched.get(note_id) or cached.get(note_id)
+            for note_id in current[name]
+            }
+        if to_fetch[name] <= fetched.keys() and all(notes.values()):
+            _save_sync_state(paths[name], {
+                "version": SYNC_STATE_VERSION,
+                "deck": name,
+                "synced": started,
+                "notes": notes
+                })
+        for entry in notes.values():
+            if entry:
+                word_lists[name].update(entry["words"])
+
+    return word_lists
+
+
+def sync_words_from_deck(deck_name, cache_dir=None):
+    """
+    Retrieves all the unique words in an Anki deck, using a local cache.
+
+    Args:
+        deck_name (str): The name of an Anki deck.
+        cache_dir (Path, optional): The folder holding sync state files.
+
+    Returns:
+        set: All unique words appearing in cards from the given deck.
+    """
+    return sync_words_from_decks([deck_name], cache_dir)[deck_name]
+
+
+def get_anki_collection_path():
+    """
+    Retrieves the path of an Anki collection file as an environment variable.
+
+    Args:
+        None.
+
+    Returns:
+        Path: The ANKI_COLLECTION_PATH value, or None if it is not set.
+    """
+    path = os.getenv("ANKI_COLLECTION_PATH")
+    return Path(path) if path else None
+
+
+@contextmanager
+def open_anki_collection(path):
+    """
+    Opens a temporary copy of an Anki collection database.
+
+    Anki keeps its collection locked while running, so the database and
+    any write-ahead log are copied before being read.
+
+    Args:
+        path (str or Path): The path to a collection.anki2 file.
+
+    Yields:
+        sqlite3.Connection: A connection to the copied database.
+
+    Raises:
+        FileNotFoundError: If the collection does not exist.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"Anki collection not found: {path}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy = Path(temp_dir) / path.name
+        shutil.copyfile(path, copy)
+        wal = path.with_name(path.name + "-wal")
+        if wal.is_file():
+            shutil.copyfile(wal, copy.with_name(copy.name + "-wal"))
+
+        connection = sqlite3.connect(copy)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+
+def _read_collection_decks(connection):
+    """
+    Reads the id and full name of every deck in an Anki collection.
+
+    Supports both the decks table of current collections and the JSON
+    column used by collections created before Anki 2.1.28.
+
+    Args:
+        connection (sqlite3.Connection): A connection to the collection.
+
+    Returns:
+        dict: Deck names (with "::" between subdecks), keyed by deck id.
+    """
+    try:
+        rows = connection.execute("SELECT id, name FROM decks").fetchall()
+        return {deck_id: name.replace("\x1f", "::") for deck_id, name in rows}
+    except sqlite3.OperationalError:
+        (decks,) = connection.execute("SELECT decks FROM col").fetchone()
+        return {
+            int(deck_id): deck["name"]
+            for deck_id, deck in json.loads(decks).items()
+            }
+
+
+def get_collection_decks(path):
+    """
+    Returns the names of the decks in an Anki collection file.
+
+    Args:
+        path (str or Path): The path to a collection.anki2 file.
+
+    Returns:
+        list: The sorted names of all decks except the default deck.
+    """
+    with open_anki_collection(path) as connection:
+        names = _read_collection_decks(connection).values()
+    return sorted(name for name in names if name.lower() != "default")
+
+
+def get_words_from_collection(path, deck_names):
+    """
+    Retrieves the unique words in several decks of an Anki collection file.
+
+    Notes are read with a single query over the cards in the selected
+    decks and their subdecks, including cards temporarily moved to a
+    filtered deck. The first two fields of each note are treated as its
+    front and back.
+
+    Args:
+        path (str or Path): The path to a collection.anki2 file.
+        deck_names (list): The names of the Anki decks.
+
+    Returns:
+        dict: The set of unique words in each deck, keyed by deck name.
+    """
+    word_lists = {name: set() for name in deck_names}
+
+    with open_anki_collection(path) as connection:
+        targets = {}
+        for deck_id, name in _read_collection_decks(connection).items():
+            for selected in deck_names:
+                if name.lower() == selected.lower() or \
+                        name.lower().startswith(selected.lower() + "::"):
+                    targets.setdefault(deck_id, []).append(selected)
+
+        if not targets:
+            return word_lists
+
+        connection.execute(
+            "CREATE TEMP TABLE target_decks (id INTEGER PRIMARY KEY)"
+            )
+        connection.executemany(
+            "INSERT INTO target_decks VALUES (?)",
+            ((deck_id,) for deck_id in targets)
+            )
+        rows = connection.execute(
+            "SELECT c.nid, c.did, c.odid, n.flds FROM cards c "
+            "JOIN notes n ON n.id = c.nid "
+            "WHERE c.did IN target_decks "
+            "OR c.odid IN target_decks ORDER BY c.nid"
+            )
+
+        last_note_id = None
+        for note_id, deck_id, original_deck_id, fields in rows:
+            if note_id != last_note_id:
+                front, _, back = fields.partition("\x1f")
+                words = _extract_words(front, back.partition("\x1f")[0])
+                last_note_id = note_id
+            for name in targets.get(deck_id, []) + \
+                    targets.get(original_deck_id, []):
+                word_lists[name].update(words)
+
+    return word_lists
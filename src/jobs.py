@@ -0,0 +1,510 @@
+"""
+Runs word list jobs without prompting.
+
+A job counts the words in a set of inputs, removes known words and writes
+the word list. The interactive script and batch manifests both use these
+functions, so a manifest job produces the same word list as the same
+choices made at the prompts.
+
+Example manifest (TOML; the same structure can be written as JSON):
+
+    parallel_jobs = 2
+
+    [defaults]
+    known_words = ["known.idx"]
+
+    [[jobs]]
+    name = "season-1"
+    inputs = ["shows/season1", "https://example.com/sitemap.xml"]
+    subtitle_languages = ["English"]
+    anki_decks = ["Spanish::Vocab"]
+    output = "lists/season-1.csv"
+
+    [[jobs]]
+    inputs = ["books"]
+    order = "frequency"
+    top = 5000
+    output = "lists/books-top.jsonl"
+"""
+
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from urllib.parse import urlparse
+
+try:
+    import utils
+    import anki_utils
+except ImportError:
+    from src import utils, anki_utils
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+SUPPORTED_EXTENSIONS = (
+    ".srt", ".txt", ".md", ".docx", ".pdf", ".epub", ".mkv"
+    )
+
+DEFAULT_PARALLEL_JOBS = 1
+
+JOB_FIELDS = {
+    "name": str,
+    "inputs": list,
+    "output": str,
+    "crawl_depth": int,
+    "subtitle_languages": list,
+    "subtitle_tracks": list,
+    "known_words": list,
+    "anki_decks": list,
+    "anki_collection": str,
+    "workers": int,
+    "format": str,
+    "order": str,
+    "top": int,
+    "min_count": int,
+}
+
+PATH_FIELDS = ("output", "anki_collection")
+
+PATH_LIST_FIELDS = ("inputs", "known_words")
+
+
+def parse_urls(source):
+    """
+    Splits an input into URLs, if it consists only of URLs.
+
+    Args:
+        source (str): A filepath, or one or more URLs separated by spaces.
+
+    Returns:
+        list: The URLs, or an empty list if any part is not a web URL.
+    """
+    urls = source.split()
+    for url in urls:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            return []
+    return urls
+
+
+def iter_media_word_counts(files, languages=None, workers=None, cache=None,
+                           track_ids=None):
+    """
+    Counts the words in text files and the subtitles of MKV files.
+
+    Args:
+        files (list): A list of filepaths.
+        languages (list): The subtitle languages to extract from MKV files
+            (optional). Every text subtitle track is extracted by default.
+        workers (int): The number of worker processes (optional).
+        cache (DiskCache): A cache of previous results (optional).
+        track_ids (list): The subtitle track IDs to extract from MKV files
+            (optional).
+
+    Yields:
+        tuple: The filepath, its word counts and None, or the filepath,
+            None and the exception raised.
+    """
+    mkv_files = [file for file in files if Path(file).suffix == ".mkv"]
+    text_files = [file for file in files if Path(file).suffix != ".mkv"]
+    return chain(
+        utils.iter_file_word_counts(text_files, workers, cache),
+        utils.iter_mkv_word_counts(
+            mkv_files, languages, workers, cache, track_ids
+            )
+        )
+
+
+def iter_source_word_counts(source, cache=None, crawl_depth=0,
+                            languages=None, track_ids=None, workers=None):
+    """
+    Counts the words in a file, a directory or one or more URLs.
+
+    Several URLs, sitemaps and crawls are downloaded concurrently, and the
+    files of a directory are processed across a pool of worker processes.
+
+    Args:
+        source (str or Path): A filepath, a directory path, or one or
+            more URLs separated by spaces.
+        cache (DiskCache): A cache of previous results (optional).
+        crawl_depth (int): The number of same-site link levels to follow
+            from each URL (optional).
+        languages (list): The subtitle languages to extract from MKV files
+            (optional).
+        track_ids (list): The subtitle track IDs to extract from MKV files
+            (optional).
+        workers (int): The number of worker processes (optional).
+
+    Yields:
+        tuple: (item, counts, error) for each file or page. Either counts
+            is a dictionary of word counts and error is None, or counts is
+            None and error is the exception raised.
+    """
+    if workers is None:
+        workers = utils.get_worker_count()
+
+    urls = parse_urls(source) if isinstance(source, str) else []
+    if len(urls) == 1 and not crawl_depth and \
+            not utils.is_sitemap_url(urls[0]):
+        try:
+            text = utils.extract_text_from_url(urls[0])
+        except ValueError as e:
+            yield urls[0], None, e
+        else:
+            yield urls[0], utils.generate_word_list(text), None
+        return
+
+    if urls:
+        page_urls = []
+        for url in urls:
+            if not utils.is_sitemap_url(url):
+                page_urls.append(url)
+                continue
+            try:
+                page_urls.extend(utils.iter_sitemap_urls(url))
+            except ValueError as e:
+                yield url, None, e
+        for url, text, error in utils.iter_url_texts(page_urls, crawl_depth):
+            yield url, None if error else utils.generate_word_list(text), error
+        return
+
+    path = Path(source)
+    if path.is_dir():
+        files = utils.extract_file_list(path, SUPPORTED_EXTENSIONS)
+        if not files:
+            yield source, None, FileNotFoundError(
+                "No valid files found in directory."
+                )
+        yield from iter_media_word_counts(
+            files, languages, workers, cache, track_ids
+            )
+    elif not path.is_file():
+        yield source, None, FileNotFoundError(f"File not found: {source}")
+    elif path.suffix == ".mkv":
+        yield from utils.iter_mkv_word_counts(
+            [path], languages, 1, cache, track_ids
+            )
+    else:
+        try:
+            counts = utils.count_words_in_file(
+                path, workers=workers, cache=cache
+                )
+        except Exception as e:
+            yield source, None, e
+        else:
+            yield source, counts, None
+
+
+def get_deck_words(deck_names, anki_collection=None, sync=False):
+    """
+    Retrieves the unique words in several Anki decks.
+
+    Args:
+        deck_names (list): The names of the Anki decks.
+        anki_collection (Path): An Anki collection file to read decks
+            from instead of AnkiConnect (optional).
+        sync (bool): Whether to sync the decks incrementally through the
+            local sync state, rather than downloading every note.
+
+    Returns:
+        dict: The set of unique words in each deck, keyed by deck name.
+    """
+    if anki_collection:
+        return anki_utils.get_words_from_collection(
+            anki_collection, deck_names
+            )
+    if sync:
+        return anki_utils.sync_words_from_decks(deck_names)
+    return anki_utils.get_words_from_decks(deck_names)
+
+
+def remove_known_words(word_counts, known_sources):
+    """
+    Removes known words from a word list and closes any open indexes.
+
+    Args:
+        word_counts (dict): A dictionary containing words and word counts.
+        known_sources (list): (name, words) pairs, where words is a set,
+            dict or KnownWordsIndex.
+
+    Returns:
+        tuple: A new dictionary without the known words, and a dictionary
+            of the number of words removed by each source, keyed by name.
+    """
+    try:
+        word_counts, removed_counts = utils.filter_known_words(
+            word_counts, [source for _, source in known_sources]
+            )
+    finally:
+        _close_known_sources(known_sources)
+
+    removed = {}
+    for (name, _), count in zip(known_sources, removed_counts):
+        removed[str(name)] = removed.get(str(name), 0) + count
+    return word_counts, removed
+
+
+def _close_known_sources(known_sources):
+    """Closes the known-words indexes among (name, words) pairs."""
+    for _, source in known_sources:
+        if isinstance(source, utils.KnownWordsIndex):
+            source.close()
+
+
+def load_manifest(filepath):
+    """
+    Reads and validates a job manifest in JSON or TOML format.
+
+    Keys in the optional "defaults" table apply to every job, and relative
+    paths are resolved against the folder containing the manifest.
+
+    Args:
+        filepath (str or Path): The path to a .json or .toml manifest.
+
+    Returns:
+        dict: The manifest, with "parallel_jobs" and a list of "jobs".
+
+    Raises:
+        ValueError: If the manifest cannot be parsed or is invalid.
+    """
+    filepath = Path(filepath)
+
+    if filepath.suffix.lower() == ".toml":
+        if tomllib is None:
+            raise ValueError(
+                "TOML manifests require Python 3.11 or the tomli package."
+                )
+        with open(filepath, "rb") as f:
+            try:
+                manifest = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Invalid TOML manifest: {e}") from e
+    else:
+        with open(filepath, encoding="utf-8-sig") as f:
+            try:
+                manifest = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON manifest: {e}") from e
+
+    if not isinstance(manifest, dict):
+        raise ValueError("The manifest must be a table of settings.")
+
+    parallel_jobs = manifest.get("parallel_jobs", DEFAULT_PARALLEL_JOBS)
+    if not _is_int(parallel_jobs) or parallel_jobs < 1:
+        raise ValueError("parallel_jobs must be a positive integer.")
+
+    defaults = manifest.get("defaults", {})
+    jobs = manifest.get("jobs")
+    if not isinstance(defaults, dict):
+        raise ValueError("defaults must be a table of job settings.")
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError("The manifest must contain a list of jobs.")
+
+    base_dir = filepath.resolve().parent
+    jobs = [
+        _validate_job({**defaults, **job} if isinstance(job, dict) else job,
+                      number, base_dir)
+        for number, job in enumerate(jobs, 1)
+        ]
+
+    outputs = Counter(job["output"] for job in jobs)
+    duplicates = sorted(str(path) for path, n in outputs.items() if n > 1)
+    if duplicates:
+        raise ValueError(
+            f"Several jobs write to the same output: {', '.join(duplicates)}"
+            )
+    names = Counter(job["name"] for job in jobs)
+    duplicates = sorted(name for name, n in names.items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate job names: {', '.join(duplicates)}")
+
+    return {"parallel_jobs": parallel_jobs, "jobs": jobs}
+
+
+def _is_int(value):
+    """Checks that a value is an integer and not a boolean."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_job(job, number, base_dir):
+    """Checks the settings of a manifest job and resolves its paths."""
+    if not isinstance(job, dict):
+        raise ValueError(f"Job {number} must be a table of settings.")
+
+    label = f"Job {job.get('name', number)}"
+    unknown = sorted(set(job) - set(JOB_FIELDS))
+    if unknown:
+        raise ValueError(f"{label} has unknown settings: {', '.join(unknown)}")
+
+    for field in ("inputs", "output"):
+        if not job.get(field):
+            raise ValueError(f"{label} is missing {field}.")
+
+    for field, kind in JOB_FIELDS.items():
+        value = job.get(field)
+        if value is None:
+            continue
+        if kind is int:
+            if not _is_int(value) or value < 0:
+                raise ValueError(
+                    f"{label}: {field} must be a non-negative integer."
+                    )
+        elif not isinstance(value, kind):
+            raise ValueError(f"{label}: {field} must be a {kind.__name__}.")
+
+    for field in ("inputs", "subtitle_languages", "known_words",
+                  "anki_decks"):
+        if not all(isinstance(item, str) for item in job.get(field, [])):
+            raise ValueError(f"{label}: {field} must be a list of strings.")
+    if not all(_is_int(item) for item in job.get("subtitle_tracks", [])):
+        raise ValueError(f"{label}: subtitle_tracks must be a list of IDs.")
+    formats, orders = utils.WORD_LIST_FORMATS, utils.WORD_LIST_ORDERS
+    if job.get("format", "csv") not in formats:
+        raise ValueError(
+            f"{label}: format must be one of {', '.join(formats)}."
+            )
+    if job.get("order", "alpha") not in orders:
+        raise ValueError(
+            f"{label}: order must be one of {', '.join(orders)}."
+            )
+
+    job = dict(job)
+    job.setdefault("name", Path(job["output"]).stem)
+    for field in PATH_FIELDS:
+        if job.get(field):
+            job[field] = base_dir / Path(job[field]).expanduser()
+    for field in PATH_LIST_FIELDS:
+        job[field] = [
+            item if field == "inputs" and parse_urls(item)
+            else str(base_dir / Path(item).expanduser())
+            for item in job.get(field, [])
+            ]
+    return job
+
+
+def run_job(job, cache=None, workers=None):
+    """
+    Runs one job: counts the words in its inputs, removes known words and
+    writes the word list.
+
+    Args:
+        job (dict): A validated job from load_manifest().
+        cache (DiskCache): A cache of previous results (optional).
+        workers (int): The number of worker processes, unless the job sets
+            its own (optional).
+
+    Returns:
+        dict: A summary with the job's name, status ("ok", "partial" if
+            some inputs failed, or "failed"), inputs processed, errors,
+            number of words written, words removed by each source and
+            output path.
+    """
+    started = time.perf_counter()
+    summary = {
+        "name": job["name"],
+        "status": "failed",
+        "inputs_processed": 0,
+        "errors": [],
+        "words": 0,
+        "removed": {},
+        "output": str(job["output"]),
+    }
+
+    try:
+        word_counts = Counter()
+        for source in job["inputs"]:
+            results = iter_source_word_counts(
+                source, cache, job.get("crawl_depth", 0),
+                job.get("subtitle_languages"), job.get("subtitle_tracks"),
+                job.get("workers") or workers
+                )
+            for item, counts, error in results:
+                if error:
+                    summary["errors"].append(
+                        {"input": str(item), "error": str(error)}
+                        )
+                else:
+                    word_counts.update(counts)
+                    summary["inputs_processed"] += 1
+
+        if not summary["inputs_processed"]:
+            raise ValueError("No inputs were processed.")
+
+        known_sources = []
+        try:
+            for known_words_path in job.get("known_words", []):
+                known_sources.append((
+                    known_words_path,
+                    utils.load_known_words(known_words_path)
+                    ))
+            if job.get("anki_decks"):
+                known_sources.extend(get_deck_words(
+                    job["anki_decks"], job.get("anki_collection"),
+                    cache is not None
+                    ).items())
+        except Exception:
+            _close_known_sources(known_sources)
+            raise
+        word_counts, summary["removed"] = remove_known_words(
+            word_counts, known_sources
+            )
+
+        Path(job["output"]).parent.mkdir(parents=True, exist_ok=True)
+        summary["words"] = utils.write_word_list(
+            word_counts, job["output"], job.get("format"),
+            job.get("order", "alpha"), job.get("top"),
+            job.get("min_count", 1)
+            )
+        summary["status"] = "partial" if summary["errors"] else "ok"
+
+    except Exception as e:
+        summary["errors"].append({"input": None, "error": str(e)})
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_manifest(manifest, cache=None, parallel_jobs=None, workers=None):
+    """
+    Runs the jobs of a manifest, several at a time.
+
+    Each job runs in its own thread and processes its files in its own
+    pool of worker processes, so parallel_jobs times workers processes
+    may run at once.
+
+    Args:
+        manifest (dict): A manifest from load_manifest().
+        cache (DiskCache): A cache of previous results (optional).
+        parallel_jobs (int): The number of jobs run at once, overriding
+            the manifest (optional).
+        workers (int): The number of worker processes per job (optional).
+
+    Returns:
+        dict: The summary of each job, in manifest order, and the number
+            of jobs with each status.
+    """
+    started = time.perf_counter()
+    jobs = manifest["jobs"]
+    parallel_jobs = min(parallel_jobs or manifest["parallel_jobs"], len(jobs))
+
+    with ThreadPoolExecutor(max_workers=parallel_jobs) as pool:
+        summaries = list(pool.map(
+            lambda job: run_job(job, cache, workers), jobs
+            ))
+
+    statuses = Counter(summary["status"] for summary in summaries)
+    return {
+        "ok": statuses["ok"],
+        "partial": statuses["partial"],
+        "failed": statuses["failed"],
+        "seconds": round(time.perf_counter() - started, 3),
+        "jobs": summaries,
+    }
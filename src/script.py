@@ -2,47 +2,129 @@
 The purpose of the script is to:
     - Extract words from a file.
     - Filter the words using an Anki deck (optional).
-    - Export a word list to a .csv file.
+    - Export a word list to a .csv, .tsv or .jsonl file.
 
 Usage:
     Run the script and follow the prompts to:
     - Provide a file (.txt, .srt, .md, .docx, .pdf, .epub, .mkv) or a URL.
     - Optionally filter words using an Anki deck
-    - Export the processed word list to a CSV file
+    - Export the processed word list to a CSV, TSV or JSON Lines file
+
+    Or run the jobs in a JSON or TOML manifest without prompting, with
+    --manifest FILE. A JSON summary of the jobs is printed when they finish.
 
 Dependencies:
     - utils.py (contains text extraction and word list generation functions)
     - anki_utils.py (handles interaction with Anki)
+    - jobs.py (runs word list jobs for both modes)
     - pathlib (for file path handling)
 
 Example:
     $ python script.py
+    $ python script.py --manifest jobs.toml --parallel-jobs 2
 """
 
 
 from utils import (
-    extract_text_from_file,
+    iter_text_from_file,
     generate_word_list,
-    check_for_new_words,
-    convert_word_list_to_csv,
+    count_words,
+    write_word_list,
+    WORD_LIST_FORMATS,
+    WORD_LIST_ORDERS,
     extract_file_list,
-    extract_text_from_url,
     list_subtitle_tracks,
     extract_text_from_mkv,
-    optionally_save_text)
-from anki_utils import get_anki_decks, get_words_from_deck
+    ask_to_save_text,
+    save_chunks,
+    iter_subtitle_tracks,
+    MKV_SUBTITLE_SUFFIXES,
+    get_worker_count,
+    validate_text_file,
+    count_words_in_file,
+    get_disk_cache,
+    clear_disk_cache,
+    get_supported_languages,
+    is_sitemap_url,
+    load_known_words,
+    KnownWordsIndex)
+from anki_utils import (
+    get_anki_decks, get_anki_collection_path, get_collection_decks
+    )
+from jobs import (
+    SUPPORTED_EXTENSIONS,
+    parse_urls,
+    iter_source_word_counts,
+    iter_media_word_counts,
+    get_deck_words,
+    remove_known_words,
+    load_manifest,
+    run_manifest)
 from pathlib import Path
+from collections import Counter
+import argparse
+import json
+import sqlite3
+from multiprocessing import freeze_support
 import time
 import sys
 from urllib.parse import urlparse
 
 
-def word_list_generator():
-    """Runs the interactive word list generation process."""
-    file_texts = []
-    valid_extensions = [
-        '.srt', '.txt', '.md', '.docx', '.pdf', '.epub', '.mkv'
-        ]
+def print_subtitle_inventory(mkv_files, cache=None):
+    """
+    Prints the languages of the text subtitle tracks in several MKV files.
+
+    Args:
+        mkv_files (list): A list of MKV filepaths.
+        cache (DiskCache): A cache of previously listed tracks (optional).
+
+    Returns:
+        Counter: The number of files with subtitles in each language.
+    """
+    inventory = Counter()
+    for file, tracks, error in iter_subtitle_tracks(
+        mkv_files, get_worker_count(), cache
+    ):
+        if error:
+            print(f"Could not list the subtitle tracks of {file}: {error}")
+            continue
+        inventory.update({
+            track["language"] for track in tracks
+            if track["codec"] in MKV_SUBTITLE_SUFFIXES
+        })
+
+    print("\nText subtitle languages found in the MKV files:\n")
+    for language, count in sorted(inventory.items()):
+        print(f"{language}: {count} of {len(mkv_files)} files")
+    return inventory
+
+
+def word_list_generator(cache=None, crawl_depth=0, anki_collection=None,
+                        known_words=(), export_known_words=None,
+                        output_format="csv", order="alpha", top=None,
+                        min_count=1):
+    """
+    Runs the interactive word list generation process.
+
+    Args:
+        cache (DiskCache): A cache of previously extracted text (optional).
+        crawl_depth (int): The number of same-site link levels to follow
+            from each URL entered (optional).
+        anki_collection (Path): An Anki collection file to read decks
+            from instead of AnkiConnect (optional).
+        known_words (list): Known-words index or list files whose words
+            are removed from the word list (optional).
+        export_known_words (Path): A file to save the words of the selected
+            Anki decks to as a known-words index (optional).
+        output_format (str): The default word list format: "csv", "tsv"
+            or "jsonl" (optional).
+        order (str): "alpha", "frequency" or "none" (optional).
+        top (int): The number of most frequent words to keep (optional).
+        min_count (int): The lowest word frequency to keep (optional).
+    """
+    word_counts = Counter()
+    inputs_processed = 0
 
     while True:
         path_input = input(
@@ -53,25 +135,28 @@ def word_list_generator():
         if path_input.lower() == 'a':
             break
 
-        parsed = urlparse(path_input)
-        is_url = parsed.scheme in ("http", "https") and parsed.netloc != ""
+        urls = parse_urls(path_input)
 
-        if is_url:
-            try:
-                text = extract_text_from_url(path_input)
-                file_texts.append(text)
-                print(
-                    "\nText processed successfully. "
-                    "To add more text to the word list, "
-                    "enter another URL or filepath."
-                    )
-                default_name = Path(parsed.path).stem + ".csv"
-                default_dir = Path.cwd()
-                continue
-            except ValueError:
-                print("\nError. Invalid URL provided.")
-                time.sleep(0.5)
-                continue
+        if urls:
+            results = iter_source_word_counts(path_input, cache, crawl_depth)
+            for url, counts, error in results:
+                if error:
+                    print(f"Error processing {url}: {error}")
+                else:
+                    word_counts.update(counts)
+                    inputs_processed += 1
+                    print(f"Processed page: {url}")
+
+            if len(urls) > 1 or crawl_depth > 0 or is_sitemap_url(urls[0]):
+                default_name = urlparse(urls[0]).netloc + ".csv"
+            else:
+                default_name = Path(urlparse(urls[0]).path).stem + ".csv"
+            default_dir = Path.cwd()
+            print(
+                "\nTo add more text to the word list, "
+                "enter another URL or filepath."
+                )
+            continue
 
         else:
             path = Path(path_input)
@@ -79,29 +164,46 @@ def word_list_generator():
             default_dir = path.parent
 
             if path.is_dir():
-                files = extract_file_list(path_input, valid_extensions)
+                files = extract_file_list(path_input, SUPPORTED_EXTENSIONS)
                 if not files:
                     print(
                         "\nNo valid files found "
                         "in directory. Please try again."
                         )
                     continue
+                mkv_files = [file for file in files if file.suffix == ".mkv"]
+                languages = []
+                if mkv_files:
+                    print_subtitle_inventory(mkv_files, cache)
+                    languages = input(
+                        f"\nEnter the subtitle languages to extract from "
+                        f"the {len(mkv_files)} MKV files, separated by "
+                        "commas, or press Enter to extract every text "
+                        "subtitle track: "
+                        ).split(",")
+                    languages = [
+                        language.strip() for language in languages
+                        if language.strip()
+                        ]
                 print(
                     f"\nProcessing {len(files)} files from "
                     f"the following directory: {path_input}"
                     )
-                for file in files:
-                    try:
-                        text = extract_text_from_file(file)
-                        file_texts.append(text)
+                results = iter_media_word_counts(
+                    files, languages, get_worker_count(), cache
+                    )
+                for file, counts, error in results:
+                    if error:
+                        print(f"Error processing {file}: {error}")
+                    else:
+                        word_counts.update(counts)
+                        inputs_processed += 1
                         print(f"Processed file: {file}")
-                    except Exception as e:
-                        print(f"Error processing {file}: {e}")
 
             elif path.is_file():
 
                 if path.suffix == '.mkv':
-                    tracks = list_subtitle_tracks(path_input)
+                    tracks = list_subtitle_tracks(path_input, True, cache)
 
                     if not tracks:
                         print(
@@ -158,10 +260,16 @@ def word_list_generator():
                             srt_name = None
 
                         try:
+                            codec = next(
+                                track['codec'] for track in tracks
+                                if track['id'] == chosen_track
+                                )
                             text = extract_text_from_mkv(
-                                path_input, chosen_track, srt_name
+                                path_input, chosen_track, srt_name, cache,
+                                codec
                                 )
-                            file_texts.append(text)
+                            word_counts.update(generate_word_list(text))
+                            inputs_processed += 1
                             print(
                                 "\nText successfully extracted from"
                                 f" subtitle track {choice} of {path_input}."
@@ -174,9 +282,20 @@ def word_list_generator():
 
                 else:
                     try:
-                        text = extract_text_from_file(path_input)
-                        optionally_save_text(text, path.with_suffix(".txt"))
-                        file_texts.append(text)
+                        validate_text_file(path_input)
+                        save_path = ask_to_save_text(path.with_suffix(".txt"))
+                        if save_path:
+                            chunks = iter_text_from_file(
+                                path_input, cache=cache
+                                )
+                            chunks = save_chunks(chunks, save_path)
+                            counts = count_words(chunks)
+                        else:
+                            counts = count_words_in_file(
+                                path_input, cache=cache
+                                )
+                        word_counts.update(counts)
+                        inputs_processed += 1
                         print(
                             f"\nFile processed successfully: {path_input}."
                             "To add text from another file to the word list,"
@@ -199,14 +318,20 @@ def word_list_generator():
                 time.sleep(0.5)
                 continue
 
-    if file_texts:
-        combined_text = "".join(file_texts)
+    if inputs_processed:
         print("\nText successfully extracted.")
     else:
         print("\nNo valid files were processed.")
         sys.exit()
 
-    word_counts = generate_word_list(combined_text)
+    known_sources = []
+    for known_words_path in known_words:
+        try:
+            known_sources.append(
+                (known_words_path, load_known_words(known_words_path))
+                )
+        except (OSError, ValueError) as e:
+            print(f"Could not read known words from {known_words_path}: {e}")
 
     anki_check = input(
         "\nDo you want to filter the word list "
@@ -215,7 +340,17 @@ def word_list_generator():
 
     while True:
         if anki_check == 'y':
-            decks = get_anki_decks()[1:]
+            if anki_collection:
+                try:
+                    decks = get_collection_decks(anki_collection)
+                except (OSError, sqlite3.DatabaseError) as e:
+                    print(
+                        f"\nCould not read Anki collection: {e}. "
+                        "Proceeding without Anki filtering."
+                        )
+                    break
+            else:
+                decks = get_anki_decks()[1:]
 
             print(
                 "\nWhich deck(s) would you like to filter by?"
@@ -254,8 +389,18 @@ def word_list_generator():
 
                 for deck in selected_decks:
                     print(f"{deck}\n")
-                    deck_words = get_words_from_deck(deck)
-                    word_counts = check_for_new_words(word_counts, deck_words)
+
+                deck_words = get_deck_words(
+                    selected_decks, anki_collection, cache is not None
+                    )
+
+                known_sources.extend(deck_words.items())
+
+                if export_known_words:
+                    KnownWordsIndex.build(
+                        set().union(*deck_words.values()), export_known_words
+                        ).close()
+                    print(f"Known words saved to: {export_known_words}")
 
                 break
 
@@ -269,21 +414,33 @@ def word_list_generator():
         else:
             break
 
+    if known_sources:
+        word_counts, removed_counts = remove_known_words(
+            word_counts, known_sources
+            )
+        print()
+        for name, removed in removed_counts.items():
+            print(f"Removed {removed} known words found in: {name}")
+
+    suffix = f".{output_format}"
+
     while True:
         csv_name = input(
             "\nPlease enter the destination filepath "
-            "for the output CSV file, "
+            f"for the output {output_format.upper()} file, "
             "or press A to save the file in the original directory: "
             )
 
         if csv_name.lower() == "a" or not csv_name:
-            csv_path_obj = default_dir / default_name
+            csv_path_obj = (default_dir / default_name).with_suffix(suffix)
             break
 
         csv_path_obj = Path(csv_name)
 
-        if csv_path_obj.suffix.lower() != ".csv":
-            csv_path_obj = csv_path_obj.with_suffix(".csv")
+        if csv_path_obj.suffix.lower() not in [
+            f".{name}" for name in WORD_LIST_FORMATS
+        ]:
+            csv_path_obj = csv_path_obj.with_suffix(suffix)
 
         if (
             not csv_path_obj.parent.exists()
@@ -296,16 +453,157 @@ def word_list_generator():
             csv_path_obj = default_dir / csv_path_obj.name
         break
 
-    print('\nCreating CSV file...')
+    print('\nCreating word list file...')
 
     try:
-        convert_word_list_to_csv(word_counts, csv_path_obj)
+        write_word_list(
+            word_counts, csv_path_obj, None, order, top, min_count
+            )
     except FileNotFoundError:
         filename = Path.cwd() / csv_path_obj.name
-        convert_word_list_to_csv(word_counts, filename)
+        write_word_list(word_counts, filename, None, order, top, min_count)
 
     print(f"Word list file created: {csv_path_obj}")
 
 
+def run_batch(manifest_path, cache=None, parallel_jobs=None,
+              summary_path=None):
+    """
+    Runs the jobs in a manifest without prompting and reports a summary.
+
+    Args:
+        manifest_path (Path): A JSON or TOML job manifest.
+        cache (DiskCache): A cache of previously extracted text (optional).
+        parallel_jobs (int): The number of jobs run at once, overriding
+            the manifest (optional).
+        summary_path (Path): A file to write the JSON summary to, instead
+            of printing it (optional).
+
+    Returns:
+        int: The exit status: 0 if every job succeeded, 1 if any job
+            failed or skipped some inputs, or 2 if the manifest is invalid.
+    """
+    try:
+        manifest = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        summary = {"error": str(e)}
+        status = 2
+    else:
+        summary = run_manifest(manifest, cache, parallel_jobs)
+        status = 0 if summary["ok"] == len(summary["jobs"]) else 1
+
+    output = json.dumps(summary, indent=2, ensure_ascii=False)
+    if summary_path:
+        Path(summary_path).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    return status
+
+
+def parse_args(argv=None):
+    """
+    Parses the command-line options.
+
+    Args:
+        argv (list): Command-line arguments (optional).
+
+    Returns:
+        Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate a word list from files, URLs and subtitles."
+        )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="do not read or write cached extraction results"
+        )
+    parser.add_argument(
+        "--clear-cache", action="store_true",
+        help="delete all cached extraction results and exit"
+        )
+    parser.add_argument(
+        "--refresh-languages", action="store_true",
+        help="rebuild the saved table of translation languages and exit"
+        )
+    parser.add_argument(
+        "--crawl-depth", type=int, default=0, metavar="N",
+        help="follow same-site links up to N levels from each URL"
+        )
+    parser.add_argument(
+        "--anki-collection", type=Path, default=get_anki_collection_path(),
+        metavar="PATH",
+        help="read decks from an Anki collection file instead of AnkiConnect"
+        )
+    parser.add_argument(
+        "--known-words", type=Path, action="append", default=[],
+        metavar="FILE",
+        help="remove the words in a known-words index, CSV or text list "
+             "(can be repeated)"
+        )
+    parser.add_argument(
+        "--export-known-words", type=Path, metavar="FILE",
+        help="save the words of the selected Anki decks as a known-words "
+             "index"
+        )
+    parser.add_argument(
+        "--format", choices=list(WORD_LIST_FORMATS), default="csv",
+        help="the default format of the word list file"
+        )
+    parser.add_argument(
+        "--order", choices=WORD_LIST_ORDERS, default="alpha",
+        help="sort words alphabetically, most frequent first, or not at all"
+        )
+    parser.add_argument(
+        "--top", type=int, metavar="N",
+        help="keep only the N most frequent words"
+        )
+    parser.add_argument(
+        "--min-count", type=int, default=1, metavar="N",
+        help="keep only words that appear at least N times"
+        )
+    parser.add_argument(
+        "--manifest", type=Path, metavar="FILE",
+        help="run the jobs in a JSON or TOML manifest without prompting"
+        )
+    parser.add_argument(
+        "--parallel-jobs", type=int, metavar="N",
+        help="run up to N manifest jobs at once"
+        )
+    parser.add_argument(
+        "--summary", type=Path, metavar="FILE",
+        help="write the JSON summary of the manifest jobs to FILE"
+        )
+    return parser.parse_args(argv)
+
+
+def main():
+    """Runs the word list generator with the command-line options."""
+    args = parse_args()
+
+    if args.clear_cache:
+        clear_disk_cache()
+        print("Cache cleared.")
+        return
+
+    if args.refresh_languages:
+        languages = get_supported_languages(refresh=True)
+        print(f"Language table refreshed: {len(languages)} languages.")
+        return
+
+    cache = None if args.no_cache else get_disk_cache()
+
+    if args.manifest:
+        sys.exit(run_batch(
+            args.manifest, cache, args.parallel_jobs, args.summary
+            ))
+
+    word_list_generator(
+        cache, args.crawl_depth, args.anki_collection, args.known_words,
+        args.export_known_words, args.format, args.order, args.top,
+        args.min_count
+        )
+
+
 if __name__ == '__main__':
-    word_list_generator()
+    freeze_support()
+    main()
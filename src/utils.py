@@ -1,305 +1,2579 @@
 import re
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, deque, namedtuple
+from collections.abc import Mapping, Set as AbstractSet
+from itertools import chain, repeat
+from functools import lru_cache, partial
+from urllib.parse import unquote, urljoin, urldefrag, urlsplit
+import posixpath
+import zipfile
 from string import punctuation
 import csv
-from deep_translator import GoogleTranslator
 import unicodedata
-import docx
-from pypdf import PdfReader
-from bs4 import BeautifulSoup
-import requests
-from ebooklib import epub, ITEM_DOCUMENT
 import tempfile
 import subprocess
 import json
-import pycountry
 import sys
 import platform
 import shutil
+import os
+import codecs
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+import struct
+import gzip
+import heapq
+import mmap
+from array import array
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait,
+    FIRST_COMPLETED
+    )
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_subtitle_pattern = re.compile(
+    r'\d+\s+'
+    r'\d{2}:\d{2}:\d{2},\d{3} --> '
+    r'\d{2}:\d{2}:\d{2},\d{3}\s*'
+    r'|<.*?>'
+)
+_cleanup_patterns = [
+    (re.compile(r'[\u200B\u200C\u200D\u2060\uFEFF]'), ''),
+    (re.compile(r'\\an8}'), ''),
+    (re.compile(r'\d\.\w+(?:\.\w+)?'), ''),
+    (re.compile(r'—(?<=\w—)(?=\w)'), ' '),
+]
+
+
+def clean_text(text):
+    """
+    Removes timestamps, tags and formatting artifacts from extracted text.
+
+    Args:
+        text (str): Text extracted from a file.
+
+    Returns:
+        str: The cleaned, NFC-normalised text.
+    """
+    return _clean_artifacts(_subtitle_pattern.sub("", text))
+
+
+def _clean_artifacts(text):
+    """Removes formatting artifacts from text without subtitle timestamps
+    or tags, and NFC-normalises it."""
+    for pattern, replacement in _cleanup_patterns:
+        text = pattern.sub(replacement, text)
+    return unicodedata.normalize("NFC", text)
+
+
+_timestamp_start_pattern = re.compile(r"\s*(?:\d{2}:|$)")
+
+MAX_CHUNK_SIZE_FACTOR = 16
+
+
+def _is_chunk_boundary(buffer, next_piece):
+    """
+    Checks whether cleaned text may be split before the next piece of text.
+
+    Only the subtitle timestamp pattern can match across a line break: its
+    cue number may be followed by whitespace and a timestamp on a later
+    line, and a timestamp swallows the line breaks after it, joining the
+    text around it. A split is therefore allowed after a line break,
+    unless the last non-blank line holds a timestamp, or ends with a
+    number and the next piece may continue with a timestamp.
+    """
+    if not buffer[-1][-1:].isspace():
+        return False
+    previous = buffer[-1]
+    if not previous.strip():
+        if len(buffer) < 2 or not buffer[-2].strip():
+            return False
+        previous = buffer[-2]
+    if "-->" in previous:
+        return False
+    return not (
+        previous.rstrip()[-1:].isdecimal()
+        and _timestamp_start_pattern.match(next_piece)
+    )
+
+
+def _iter_clean_chunks(pieces, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Groups pieces of raw text into cleaned chunks of roughly chunk_size.
+
+    If no safe boundary is found, a chunk is split anyway once it reaches
+    MAX_CHUNK_SIZE_FACTOR times chunk_size, so that memory stays bounded.
+
+    Args:
+        pieces (iterable): Pieces of raw text, usually lines.
+        chunk_size (int): Minimum number of characters per chunk.
+
+    Yields:
+        str: Cleaned text. Joining the chunks gives the same result as
+            cleaning the whole text at once, unless a chunk had to be
+            split at the size limit.
+    """
+    buffer = []
+    size = 0
+    max_size = max(chunk_size, 1) * MAX_CHUNK_SIZE_FACTOR
+    for piece in pieces:
+        if buffer and size >= chunk_size and (
+            size >= max_size or _is_chunk_boundary(buffer, piece)
+        ):
+            yield clean_text("".join(buffer))
+            buffer = []
+            size = 0
+        buffer.append(piece)
+        size += len(piece)
+    if buffer:
+        yield clean_text("".join(buffer))
+
+
+def _iter_cue_chunks(cues, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Groups the text of subtitle cues into cleaned chunks of roughly
+    chunk_size, separating cues with a blank line.
+
+    No cleanup pattern can match across a blank line, so a chunk may end
+    after any cue.
+    """
+    buffer = []
+    size = 0
+    for piece in _join_pieces(cues, "\n\n"):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield _clean_artifacts("".join(buffer))
+            buffer = []
+            size = 0
+    if buffer:
+        yield _clean_artifacts("".join(buffer))
+
+
+def _iter_lines(pieces):
+    """Re-splits pieces of text that were joined without separators into
+    lines, each ending with a newline except possibly the last."""
+    partial = ""
+    for piece in pieces:
+        lines = (partial + piece).split("\n")
+        partial = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if partial:
+        yield partial
+
+
+def validate_text_file(filepath):
+    """
+    Checks that a file exists and has a supported text format.
+
+    Args:
+        filepath (str): The path to a file containing some text.
+
+    Returns:
+        Path: The filepath.
+    """
+    valid_formats = ['.srt', '.txt', '.md', '.docx', '.pdf', '.epub']
+
+    filepath = Path(filepath)
+
+    if not filepath.exists():
+        raise FileNotFoundError(f"Error: The file '{filepath}' was not found.")
+
+    if not any(filepath.suffix == ext for ext in valid_formats):
+        raise IOError(
+            f"Error: Could not read the file contents of '{filepath.name}'."
+            " File format is invalid.")
+
+    return filepath
+
+
+def iter_text_from_file(
+    filepath, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, cache=None
+):
+    """
+    Extracts cleaned text from a file in chunks of bounded size.
+
+    Plain text, SRT, Markdown and SSA files are read line by line, so memory
+    use depends on chunk_size rather than on the size of the file.
+
+    Args:
+        filepath (str): The path to a file containing some text.
+        chunk_size (int): Approximate number of characters per chunk.
+        workers (int): The number of worker processes used to extract
+            PDF pages and EPUB chapters (optional).
+        cache (DiskCache): A cache of previously extracted text (optional).
+
+    Returns:
+        generator: Chunks of text with timestamps/formatting removed.
+    """
+    filepath = validate_text_file(filepath)
+
+    if cache is None:
+        return _iter_file_chunks(filepath, chunk_size, workers)
+
+    key = f"text:{cache.file_digest(filepath)}:{EXTRACTOR_VERSION}"
+    return cache.iter_text(
+        key, lambda: _iter_file_chunks(filepath, chunk_size, workers),
+        chunk_size
+        )
+
+
+def _iter_file_chunks(filepath, chunk_size, workers):
+    """Yields the cleaned text chunks for iter_text_from_file()."""
+    try:
+        if filepath.suffix == '.docx':
+            import docx
+
+            doc = docx.Document(filepath)
+            yield clean_text('\n'.join([p.text for p in doc.paragraphs]))
+
+        elif filepath.suffix == '.pdf':
+            pages = iter_pdf_pages(filepath, workers=workers)
+            yield from _iter_clean_chunks(_iter_lines(pages), chunk_size)
+
+        elif filepath.suffix == '.epub':
+            chapters = iter_epub_chapters(filepath, workers)
+            chapters = _join_pieces(chapters, "\n")
+            yield from _iter_clean_chunks(_iter_lines(chapters), chunk_size)
+
+        else:
+            with open(filepath, encoding="utf-8-sig") as f:
+                yield from _iter_text_chunks(f, filepath.suffix, chunk_size)
+
+    except RuntimeError:
+        raise RuntimeError(f"Error: Could not read the file '{filepath}'")
+
+
+def _iter_text_chunks(lines, suffix, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Cleans the lines of a plain-text or subtitle file in chunks.
+
+    Files with an .ass or .ssa suffix are parsed as SSA scripts, and other
+    files are detected as SSA scripts from their first non-blank line.
+    Otherwise, files with an .srt suffix are parsed as SRT subtitles.
+    """
+    lines = iter(lines)
+    head = []
+    if suffix not in (".ass", ".ssa"):
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                break
+
+    if suffix in (".ass", ".ssa") or (
+        head and head[-1].strip().startswith("[Script Info]")
+    ):
+        dialogue = iter_ssa_text(lines)
+        return _iter_clean_chunks(_join_pieces(dialogue, " "), chunk_size)
+    if suffix == ".srt":
+        return _iter_cue_chunks(iter_srt_cues(chain(head, lines)), chunk_size)
+    return _iter_clean_chunks(chain(head, lines), chunk_size)
+
+
+def extract_text_from_file(filepath, cache=None):
+    """
+    Removes timestamps and formatting from SRT subtitle files.
+
+    Args:
+        filepath (str): The path to a file containing some text.
+        cache (DiskCache): A cache of previously extracted text (optional).
+
+    Returns:
+        str: The text from the file, with timestamps/formatting removed.
+    """
+    return "".join(iter_text_from_file(filepath, cache=cache))
+
+
+MIN_PDF_PAGES_PER_WORKER = 8
+
+
+def _extract_pdf_page_range(filepath, start, stop):
+    """Extracts the text of the PDF pages from start up to stop."""
+    from pypdf import PdfReader
+
+    pdf_reader = PdfReader(filepath)
+    return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def iter_pdf_pages(filepath, page_range=None, workers=None):
+    """
+    Extracts the text of each page of a PDF file, in page order.
+
+    Large page ranges are split into contiguous batches that are extracted
+    by a pool of worker processes.
+
+    Args:
+        filepath (str): The path to the PDF file.
+        page_range (tuple): Zero-based start and stop page indices, as for
+            a slice (optional).
+        workers (int): The number of worker processes (optional).
+
+    Yields:
+        str: The text of each page.
+    """
+    from pypdf import PdfReader
+
+    pdf_reader = PdfReader(filepath)
+    start, stop, _ = slice(*(page_range or (None,))).indices(
+        len(pdf_reader.pages)
+        )
+    page_count = max(stop - start, 0)
+
+    if workers is None:
+        workers = get_worker_count()
+    workers = min(workers, page_count // MIN_PDF_PAGES_PER_WORKER)
+
+    if workers <= 1:
+        for i in range(start, stop):
+            yield pdf_reader.pages[i].extract_text()
+        return
+
+    batch_count = workers * 4
+    bounds = [
+        start + page_count * i // batch_count for i in range(batch_count + 1)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batches = pool.map(
+            _extract_pdf_page_range,
+            repeat(str(filepath)), bounds[:-1], bounds[1:]
+            )
+        for texts in batches:
+            yield from texts
+
+
+def extract_pdf_text(filepath, page_range=None, workers=None):
+    """
+    Extracts the text from a PDF file.
+
+    Args:
+        filepath (str): The path to the PDF file.
+        page_range (tuple): Zero-based start and stop page indices, as for
+            a slice (optional).
+        workers (int): The number of worker processes (optional).
+
+    Returns:
+        str: The text of the selected pages.
+    """
+    return "".join(iter_pdf_pages(filepath, page_range, workers))
+
+
+_container_ns = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
+_opf_ns = {"opf": "http://www.idpf.org/2007/opf"}
+_html_media_types = ("application/xhtml+xml", "text/html")
+
+
+def _get_epub_spine(archive):
+    """Returns the archive paths of the HTML documents in spine order."""
+    from lxml import etree
+
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    container = etree.fromstring(
+        archive.read("META-INF/container.xml"), parser
+        )
+    opf_path = container.find(".//c:rootfile", _container_ns).get("full-path")
+    package = etree.fromstring(archive.read(opf_path), parser)
+    manifest = {
+        item.get("id"): item
+        for item in package.iterfind(".//opf:manifest/opf:item", _opf_ns)
+    }
+
+    base = posixpath.dirname(opf_path)
+    paths = []
+    for itemref in package.iterfind(".//opf:spine/opf:itemref", _opf_ns):
+        item = manifest.get(itemref.get("idref"))
+        if item is not None and item.get("media-type") in _html_media_types:
+            href = unquote(item.get("href").split("#")[0])
+            paths.append(posixpath.normpath(posixpath.join(base, href)))
+    return paths
+
+
+def _html_to_text(content):
+    """Returns the text content of an HTML document, parsed with lxml,
+    leaving out scripts and style sheets."""
+    from lxml import etree
+
+    root = etree.fromstring(content, etree.HTMLParser())
+    if root is None:
+        return ""
+    etree.strip_elements(root, "script", "style", "noscript", with_tail=False)
+    return root.xpath("string()").strip()
+
+
+def _map_in_order(pool, func, items, window):
+    """Maps func over items in a pool with at most window tasks pending,
+    yielding results in order."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+MIN_EPUB_CHAPTERS_PER_WORKER = 4
+
+
+def iter_epub_chapters(filepath, workers=None):
+    """
+    Extracts the text of each chapter of an EPUB file, in spine order.
+
+    Chapters are read from the archive one at a time. With several
+    workers, up to two chapters per worker are parsed ahead in a pool of
+    worker processes. Books with too few chapters to share out are parsed
+    in this process, as starting the pool would take longer.
+
+    Args:
+        filepath (str): The path to the EPUB file.
+        workers (int): The number of worker processes (optional).
+
+    Yields:
+        str: The text of each chapter.
+    """
+    with zipfile.ZipFile(filepath) as archive:
+        paths = _get_epub_spine(archive)
+        contents = (archive.read(path) for path in paths)
+
+        if workers is None:
+            workers = get_worker_count()
+        workers = min(workers, len(paths) // MIN_EPUB_CHAPTERS_PER_WORKER)
+
+        if workers <= 1:
+            for content in contents:
+                yield _html_to_text(content)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from _map_in_order(
+                pool, _html_to_text, contents, workers * 2
+                )
+
+
+def _join_pieces(pieces, separator):
+    """Appends a separator to every piece except the last."""
+    pieces = iter(pieces)
+    previous = next(pieces, None)
+    if previous is None:
+        return
+    for piece in pieces:
+        yield previous + separator
+        previous = piece
+    yield previous
+
+
+_ssa_override_pattern = re.compile(r"\{.*?\}")
+_ssa_break_pattern = re.compile(r"\\[Nnh]")
+
+
+def iter_ssa_text(lines):
+    """
+    Yields the dialogue from the lines of an SSA-formatted subtitle file.
+
+    The position of the Text field is read from the Format line of the
+    [Events] section, falling back to the tenth field used by SSA v4 and
+    ASS scripts. Override blocks are removed, and line breaks and hard
+    spaces are replaced with spaces.
+
+    Args:
+        lines (iterable): Lines of an SSA-formatted file.
+
+    Yields:
+        str: The text of each dialogue line, with formatting removed.
+    """
+    field_count = 10
+    text_field = 9
+    in_events = False
+
+    for line in lines:
+        if line.startswith("Dialogue:"):
+            parts = line[9:].rstrip("\r\n").split(",")
+            extra = len(parts) - field_count
+            if extra < 0:
+                continue
+            dialogue_text = ",".join(
+                parts[text_field:text_field + extra + 1]
+                )
+            if "{" in dialogue_text:
+                dialogue_text = _ssa_override_pattern.sub("", dialogue_text)
+            if "\\" in dialogue_text:
+                dialogue_text = _ssa_break_pattern.sub(" ", dialogue_text)
+
+            yield unicodedata.normalize("NFC", dialogue_text)
+
+        elif line.startswith("["):
+            in_events = line.strip().lower() == "[events]"
+
+        elif in_events and line.startswith("Format:"):
+            fields = [field.strip() for field in line[7:].split(",")]
+            if "Text" in fields:
+                field_count = len(fields)
+                text_field = fields.index("Text")
+
+
+_srt_timestamp = r"(\d+):(\d{2}):(\d{2})[,.](\d{1,3})"
+_srt_timing_pattern = re.compile(
+    rf"(?:(\d+)\s+)?{_srt_timestamp}\s*-->\s*{_srt_timestamp}"
+)
+_tag_pattern = re.compile(r"<.*?>")
+
+
+class SubtitleCue(namedtuple("SubtitleCue", "index start end text")):
+    """
+    A subtitle cue with its index and times in milliseconds.
+
+    The index and times are None for text found outside any cue.
+    """
+
+    __slots__ = ()
+
+
+def _srt_milliseconds(hours, minutes, seconds, fraction):
+    """Converts the parts of an SRT timestamp to milliseconds."""
+    return (
+        ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000
+        + int(fraction.ljust(3, "0"))
+    )
+
+
+def _make_cue(cue, lines, timing):
+    """Joins the lines of a cue and removes their HTML tags."""
+    text = "\n".join(lines)
+    if "<" in text:
+        text = _tag_pattern.sub("", text)
+    return SubtitleCue(*cue, text) if timing else text
+
+
+def iter_srt_cues(lines, timing=False):
+    """
+    Yields the text of each cue in the lines of an SRT subtitle file.
+
+    The lines are parsed one at a time, so memory use does not depend on
+    the size of the file. Timestamps may use a comma or a dot before the
+    milliseconds, and cue numbers may share a line with the timestamps or
+    be missing. HTML tags are removed, and text outside any cue is kept.
+
+    Args:
+        lines (iterable): Lines of an SRT file.
+        timing (bool): Whether to yield the index and times of each cue.
+
+    Yields:
+        str: The lines of text of each cue, separated by "\\n", or a
+            SubtitleCue if timing is True.
+    """
+    match_timing = _srt_timing_pattern.match
+    cue = (None, None, None)
+    in_cue = False
+    text = []
+    number = None
+
+    for line in lines:
+        line = line.strip()
+
+        if "-->" in line:
+            match = match_timing(line)
+            if match is not None:
+                if text:
+                    yield _make_cue(cue, text, timing)
+                    text = []
+                if timing:
+                    index = match.group(1) or number
+                    cue = (
+                        None if index is None else int(index),
+                        _srt_milliseconds(*match.group(2, 3, 4, 5)),
+                        _srt_milliseconds(*match.group(6, 7, 8, 9)),
+                        )
+                in_cue = True
+                number = None
+                continue
+
+        if number is not None:
+            text.append(number)
+            number = None
+
+        if not line:
+            if text:
+                yield _make_cue(cue, text, timing)
+                text = []
+            cue = (None, None, None)
+            in_cue = False
+        elif line.isdecimal():
+            number = line
+        else:
+            text.append(line)
+
+    if number is not None and (text or in_cue):
+        text.append(number)
+    if text:
+        yield _make_cue(cue, text, timing)
+
+
+def extract_ssa_text(filepath):
+    """
+    Removes timestamps and formatting from SSA-formatted subtitle files.
+
+    Args:
+        filepath (str): The path to a file containing some text.
+
+    Returns:
+        str: The text from the file, with timestamps/formatting removed.
+    """
+    filepath = Path(filepath)
+
+    with open(filepath, encoding="utf-8-sig") as f:
+        return " ".join(iter_ssa_text(f))
+
+
+EXTRA_PUNCTUATION = '¿¡♪«»—©‘’–‚”“„•[]【】〔〕〚〛'
+
+
+class WordTokenizer:
+    """
+    Splits text into cleaned, lowercase words and counts them.
+
+    All cleaning rules are compiled once. Text is split with str.split() and
+    each distinct raw token is cleaned only once, so repeated words cost a
+    dictionary lookup rather than a series of regex substitutions.
+
+    Args:
+        extra_punctuation (str): Characters stripped from the start and end
+            of words in addition to ASCII punctuation.
+        cache_size (int): Maximum number of cleaned tokens to remember.
+    """
+
+    _leading_digits = re.compile(r"^\d+(?=[^\W\d_])")
+    _bracketed_number = re.compile(r"\[\d+\W*")
+
+    def __init__(self, extra_punctuation=EXTRA_PUNCTUATION, cache_size=500000):
+        self._strip_chars = punctuation + extra_punctuation
+        self._cache = {}
+        self._cache_size = cache_size
+
+    def clean_word(self, token):
+        """
+        Cleans a single lowercase token.
+
+        Args:
+            token (str): A whitespace-delimited, lowercase token.
+
+        Returns:
+            str: The cleaned word, or an empty string if the token
+                contains no letters.
+        """
+        if token[:1].isdecimal():
+            token = self._leading_digits.sub("", token)
+        if "[" in token:
+            token = self._bracketed_number.sub("", token)
+        token = token.strip(self._strip_chars)
+        if not any(map(str.isalpha, token)):
+            return ""
+        return token
+
+    def count(self, text, counts=None):
+        """
+        Counts the cleaned words in a text.
+
+        Args:
+            text (str): Text containing the words to be counted.
+            counts (Counter): An existing counter to update (optional).
+
+        Returns:
+            Counter: Words and word counts.
+        """
+        if not text:
+            return Counter() if counts is None else counts
+        return self.count_tokens(Counter(text.lower().split()), counts)
+
+    def count_tokens(self, tokens, counts=None):
+        """
+        Counts the cleaned words for already split, lowercase tokens.
+
+        Args:
+            tokens (dict): Raw tokens and the number of times each occurs.
+            counts (Counter): An existing counter to update (optional).
+
+        Returns:
+            Counter: Words and word counts.
+        """
+        if counts is None:
+            counts = Counter()
+
+        cache = self._cache
+        for token, count in tokens.items():
+            word = cache.get(token)
+            if word is None:
+                if len(cache) >= self._cache_size:
+                    cache.clear()
+                word = cache[token] = self.clean_word(token)
+            if word:
+                counts[word] += count
+        return counts
+
+
+_word_tokenizer = WordTokenizer()
+
+
+class WordCounter:
+    """
+    Accumulates word counts from text that arrives in pieces.
+
+    The last word of each piece is held back until the next piece shows
+    whether it continues, so words split across pieces are counted once.
+    Text without whitespace, such as Chinese or Japanese, is counted once
+    the held-back text grows past max_pending characters, so it is not
+    copied again with every piece.
+
+    Args:
+        tokenizer (WordTokenizer): The tokenizer used to clean words
+            (optional).
+        max_pending (int): The most characters held back between pieces
+            (optional).
+    """
+
+    def __init__(self, tokenizer=None, max_pending=DEFAULT_CHUNK_SIZE):
+        self.tokenizer = tokenizer or _word_tokenizer
+        self.max_pending = max_pending
+        self._counts = Counter()
+        self._pending = ""
+
+    def update(self, text):
+        """
+        Counts the complete words in the next piece of text.
+
+        Args:
+            text (str): The next piece of text.
+
+        Returns:
+            None
+        """
+        text = self._pending + text
+        if not text or text[-1].isspace():
+            self._pending = ""
+        else:
+            parts = text.rsplit(None, 1)
+            text = parts[0] if len(parts) == 2 else ""
+            self._pending = parts[-1]
+        self.tokenizer.count(text, self._counts)
+        if len(self._pending) > self.max_pending:
+            self.tokenizer.count(self._pending, self._counts)
+            self._pending = ""
+
+    def flush(self):
+        """
+        Counts any word held back from the last piece of text.
+
+        Returns:
+            Counter: The final words and word counts.
+        """
+        if self._pending:
+            self.tokenizer.count(self._pending, self._counts)
+            self._pending = ""
+        return self._counts
+
+    @property
+    def counts(self):
+        """Counter: The running word counts, including any held-back word."""
+        if not self._pending:
+            return self._counts
+        return self.tokenizer.count(self._pending, self._counts.copy())
+
+
+def generate_word_list(text):
+    """
+    Generates a list of words and word frequencies in a given text.
+
+    Args:
+        text (str): Text containing the words to be counted.
+
+    Returns:
+        Counter: A dictionary containing words and word counts.
+    """
+    counter = WordCounter()
+    counter.update(text)
+    return counter.flush()
+
+
+def count_words(chunks):
+    """
+    Counts the words in a sequence of text chunks.
+
+    Args:
+        chunks (iterable): Chunks of text, as produced by iter_text_from_file.
+
+    Returns:
+        Counter: A dictionary containing words and word counts.
+    """
+    counter = WordCounter()
+    for chunk in chunks:
+        counter.update(chunk)
+    return counter.flush()
+
+
+_ascii_space = rb"[\t\n\x0b-\x0d\x1c-\x1f ]"
+
+_ascii_subtitle_pattern = re.compile(
+    _subtitle_pattern.pattern.encode("ascii").replace(rb"\s", _ascii_space)
+    )
+
+_ascii_numbered_name_pattern = re.compile(rb"\d\.\w+(?:\.\w+)?")
+
+
+class _NotCleanUTF8(Exception):
+    """Raised when bytes are not valid UTF-8."""
+
+
+def _decode(data):
+    """Decodes UTF-8 bytes, raising _NotCleanUTF8 if they are invalid."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        raise _NotCleanUTF8
+
+
+def clean_bytes(data):
+    """
+    Removes timestamps, tags and formatting artifacts from UTF-8 bytes.
+
+    Gives the same result as encoding the output of clean_text(). ASCII
+    text is cleaned as bytes; any other text is decoded and cleaned by
+    clean_text().
+
+    Args:
+        data (bytes): UTF-8 text with "\\n" line endings.
+
+    Returns:
+        bytes: The cleaned text.
+
+    Raises:
+        _NotCleanUTF8: If data is not valid UTF-8.
+    """
+    if not data.isascii():
+        return clean_text(_decode(data)).encode("utf-8")
+    data = _ascii_subtitle_pattern.sub(b"", data)
+    data = data.replace(b"\\an8}", b"")
+    return _ascii_numbered_name_pattern.sub(b"", data)
+
+
+def _decode_lines(data):
+    """Decodes bytes and splits them into lines like a text-mode file."""
+    text = _decode(data)
+    return text.replace("\r\n", "\n").replace("\r", "\n").splitlines(True)
+
+
+def _iter_byte_chunks(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits UTF-8 bytes into chunks at the same safe line boundaries used by
+    _iter_clean_chunks(), with line endings translated to "\n", and with
+    the same size limit.
+    """
+    max_size = max(chunk_size, 1) * MAX_CHUNK_SIZE_FACTOR
+    start = 3 if data[:3] == b"\xef\xbb\xbf" else 0
+    while start < len(data):
+        end = data.find(b"\n", start + max(chunk_size, 1) - 1)
+        while end != -1 and end + 1 - start < max_size:
+            previous = data.rfind(b"\n", start, end)
+            if previous > start:
+                previous = data.rfind(b"\n", start, previous)
+            previous = max(previous + 1, start)
+            following = data.find(b"\n", end + 1)
+            following = len(data) if following == -1 else following + 1
+            if following > end + 1 and _is_chunk_boundary(
+                _decode_lines(data[previous:end + 1]),
+                _decode_lines(data[end + 1:following])[0]
+            ):
+                break
+            end = data.find(b"\n", end + 1)
+        stop = len(data) if end == -1 else end + 1
+        chunk = data[start:stop]
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        yield chunk
+        start = stop
+
+
+def _count_words_in_bytes(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts the words in UTF-8 text without decoding the whole text.
+
+    Each chunk is cleaned as bytes and split on ASCII whitespace, and only
+    the distinct tokens are decoded, normalised and lowercased.
+
+    Raises:
+        _NotCleanUTF8: If the bytes cannot be counted exactly like the
+            decoded text.
+    """
+    tokens = Counter()
+    pending = b""
+    for chunk in _iter_byte_chunks(data, chunk_size):
+        chunk = pending + clean_bytes(chunk)
+        pending = b""
+        if chunk and not chunk[-1:].isspace():
+            parts = chunk.rsplit(None, 1)
+            chunk = parts[0] if len(parts) == 2 else b""
+            pending = parts[-1]
+        tokens.update(chunk.split())
+    if pending:
+        tokens[pending] += 1
+
+    words = Counter()
+    for token, count in tokens.items():
+        text = _decode(token)
+        if not text.isascii():
+            text = unicodedata.normalize("NFC", text)
+        for word in text.lower().split():
+            words[word] += count
+    return _word_tokenizer.count_tokens(words)
+
+
+BYTES_FAST_PATH_FORMATS = (".txt", ".md")
+
+BYTES_FAST_PATH_MIN_SIZE = 1024 * 1024
+
+
+def _count_words_with_mmap(filepath, chunk_size):
+    """
+    Counts the words in a plain-text file by memory-mapping its bytes.
+
+    Returns None if the file is empty, is an SSA script, or is not clean
+    UTF-8, so that the caller can use the str path instead.
+    """
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                if _is_ssa_script(data):
+                    return None
+                return _count_words_in_bytes(data, chunk_size)
+            except _NotCleanUTF8:
+                return None
+
+
+def _is_ssa_script(data):
+    """Checks whether the first non-blank line of UTF-8 bytes starts an SSA
+    script, as iter_text_from_file() does."""
+    start = 3 if data[:3] == b"\xef\xbb\xbf" else 0
+    while start < len(data):
+        end = data.find(b"\n", start)
+        end = len(data) if end == -1 else end + 1
+        for line in _decode_lines(data[start:end]):
+            if line.strip():
+                return line.strip().startswith("[Script Info]")
+        start = end
+    return False
+
+
+def count_words_in_file(
+    filepath, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, cache=None
+):
+    """
+    Counts the words in a file without holding all of its text in memory.
+
+    Large plain-text and Markdown files are memory-mapped and cleaned as
+    bytes, so that only their distinct words are decoded.
+
+    Args:
+        filepath (str): The path to a file containing some text.
+        chunk_size (int): Approximate number of characters read at a time.
+        workers (int): The number of worker processes used to extract
+            PDF pages and EPUB chapters (optional).
+        cache (DiskCache): A cache of previous word counts (optional).
+
+    Returns:
+        Counter: A dictionary containing words and word counts.
+    """
+    filepath = validate_text_file(filepath)
+
+    if cache is None:
+        return _count_file_words(filepath, chunk_size, workers)
+
+    key = f"counts:{cache.file_digest(filepath)}:{EXTRACTOR_VERSION}"
+    cached = cache.get(key)
+    if cached is not None:
+        return Counter(dict(json.loads(zlib.decompress(cached))))
+
+    counts = _count_file_words(filepath, chunk_size, workers)
+    value = json.dumps(list(counts.items()), ensure_ascii=False)
+    cache.set(key, zlib.compress(value.encode("utf-8")))
+    return counts
+
+
+def _count_file_words(filepath, chunk_size, workers):
+    """Counts the words in a validated file, memory-mapping large ones."""
+    if filepath.suffix in BYTES_FAST_PATH_FORMATS and \
+            filepath.stat().st_size >= BYTES_FAST_PATH_MIN_SIZE:
+        counts = _count_words_with_mmap(filepath, chunk_size)
+        if counts is not None:
+            return counts
+    return count_words(iter_text_from_file(filepath, chunk_size, workers))
+
+
+def get_worker_count():
+    """
+    Retrieves the number of worker processes as an environment variable.
+
+    Args:
+        None.
+
+    Returns:
+        int: The WORD_LIST_WORKERS value, or the number of CPUs.
+    """
+    try:
+        workers = int(os.getenv("WORD_LIST_WORKERS", ""))
+    except ValueError:
+        workers = os.cpu_count() or 1
+    return max(workers, 1)
+
+
+def iter_file_word_counts(files, workers=None, cache=None):
+    """
+    Counts the words in several files across a pool of worker processes.
+
+    Each worker returns the word counts for one file, so no raw text is
+    passed between processes.
+
+    Args:
+        files (list): A list of filepaths.
+        workers (int): The number of worker processes (optional).
+        cache (DiskCache): A cache of previous word counts (optional).
+
+    Yields:
+        tuple: The filepath, its word counts and None, or the filepath,
+            None and the exception raised, in order of completion.
+    """
+    return _iter_pool_results(
+        partial(count_words_in_file, workers=1, cache=cache), files, workers
+        )
+
+
+def _iter_pool_results(function, files, workers=None):
+    """
+    Calls a function on each file across a pool of worker processes.
+
+    Yields:
+        tuple: The filepath, the result and None, or the filepath, None
+            and the exception raised, in order of completion.
+    """
+    files = list(files)
+    if workers is None:
+        workers = get_worker_count()
+
+    if workers <= 1 or len(files) <= 1:
+        for file in files:
+            try:
+                yield file, function(file), None
+            except Exception as e:
+                yield file, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        futures = {pool.submit(function, file): file for file in files}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
+EXTRACTOR_VERSION = 3
+
+DEFAULT_CACHE_SIZE = 512
+
+_cache_schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+
+def get_cache_dir():
+    """
+    Retrieves the cache directory as an environment variable or default value.
+
+    Args:
+        None.
+
+    Returns:
+        Path: The WORD_LIST_CACHE_DIR value, or a folder in ~/.cache.
+    """
+    default = Path.home() / ".cache" / "word-list-generator"
+    return Path(os.getenv("WORD_LIST_CACHE_DIR", default))
+
+
+def get_disk_cache():
+    """
+    Returns the default disk cache, unless caching is disabled.
+
+    Caching is disabled by setting the WORD_LIST_NO_CACHE environment
+    variable. The cache size in megabytes is read from WORD_LIST_CACHE_SIZE.
+
+    Args:
+        None.
+
+    Returns:
+        DiskCache: The default cache, or None if caching is disabled.
+    """
+    if os.getenv("WORD_LIST_NO_CACHE"):
+        return None
+    try:
+        size = int(os.getenv("WORD_LIST_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    except ValueError:
+        size = DEFAULT_CACHE_SIZE
+    return DiskCache(get_cache_dir() / "cache.sqlite3", size * 1024 * 1024)
+
+
+def clear_disk_cache():
+    """
+    Deletes everything stored in the default disk cache.
+
+    This includes the words saved from previously synced Anki decks and
+    the indexes built from known-words lists.
+
+    Args:
+        None.
+
+    Returns:
+        None
+    """
+    DiskCache(get_cache_dir() / "cache.sqlite3").clear()
+    shutil.rmtree(get_cache_dir() / "anki", ignore_errors=True)
+    shutil.rmtree(get_cache_dir() / "known-words", ignore_errors=True)
+
+
+class DiskCache:
+    """
+    A size-bounded, least-recently-used cache stored in an SQLite database.
+
+    The content hash of each file is remembered with its size and
+    modification time, so looking up an unchanged file costs a stat call.
+    The cache can be shared between threads and passed to worker processes.
+
+    Args:
+        path (str): The path to the database file.
+        max_bytes (int): The maximum total size of the cached values.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_SIZE * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"])
+
+    def _connect(self):
+        """Opens the database on first use."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+                )
+            connection.executescript(_cache_schema)
+            self._connection = connection
+        return self._connection
+
+    def get(self, key):
+        """
+        Retrieves a cached value and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            bytes: The cached value, or None if the key is not cached.
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            with connection:
+                connection.execute(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    (time.time(), key)
+                    )
+            return row[0]
+
+    def set(self, key, value):
+        """
+        Stores a value, evicting the least recently used values if needed.
+
+        Args:
+            key (str): The cache key.
+            value (bytes): The value to store.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time())
+                    )
+                self._evict(connection)
+
+    def get_many(self, keys):
+        """
+        Retrieves several cached values in one transaction.
+
+        The keys are written to a temporary table and joined with the
+        cached entries, so any number of keys is looked up in one query.
+
+        Args:
+            keys (iterable): The cache keys.
+
+        Returns:
+            dict: The cached values, keyed by cache key. Missing keys are
+                left out.
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS requested_keys "
+                    "(key TEXT PRIMARY KEY)"
+                    )
+                connection.execute("DELETE FROM requested_keys")
+                connection.executemany(
+                    "INSERT OR IGNORE INTO requested_keys VALUES (?)",
+                    ((key,) for key in keys)
+                    )
+                values = dict(connection.execute(
+                    "SELECT key, value FROM entries "
+                    "JOIN requested_keys USING (key)"
+                    ))
+                now = time.time()
+                connection.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in values]
+                    )
+        return values
+
+    def set_many(self, items):
+        """
+        Stores several values in one transaction.
+
+        Args:
+            items (dict): The values to store, keyed by cache key.
+
+        Returns:
+            None
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    [
+                        (key, value, len(value), now)
+                        for key, value in items.items()
+                    ]
+                    )
+                self._evict(connection)
+
+    def _evict(self, connection):
+        """Deletes the least recently used values above max_bytes."""
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        rows = connection.execute(
+            "SELECT key, size FROM entries ORDER BY last_used"
+            )
+        for key, size in rows:
+            evicted.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self):
+        """
+        Removes all cached values and file hashes.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM entries")
+                connection.execute("DELETE FROM files")
+
+    def file_digest(self, filepath):
+        """
+        Returns the SHA-256 hash of a file's contents.
+
+        The file is only read if its size or modification time has changed
+        since it was last hashed.
+
+        Args:
+            filepath (str): The path to a file.
+
+        Returns:
+            str: The hexadecimal digest.
+        """
+        filepath = Path(filepath).resolve()
+        stat = filepath.stat()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT size, mtime_ns, digest FROM files WHERE path = ?",
+                (str(filepath),)
+                ).fetchone()
+        if row and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return row[2]
+
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (str(filepath), stat.st_size, stat.st_mtime_ns, digest)
+                    )
+        return digest
+
+    def get_text(self, key):
+        """
+        Retrieves cached text.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The cached text, or None if the key is not cached.
+        """
+        value = self.get(key)
+        if value is None:
+            return None
+        return zlib.decompress(value).decode("utf-8")
+
+    def set_text(self, key, text):
+        """
+        Stores text in compressed form.
+
+        Args:
+            key (str): The cache key.
+            text (str): The text to store.
+
+        Returns:
+            None
+        """
+        self.set(key, zlib.compress(text.encode("utf-8")))
+
+    def iter_text(self, key, extract, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields cached text in chunks, extracting and caching it on a miss.
+
+        Text is compressed and decompressed incrementally, so only the
+        compressed text is held in memory.
+
+        Args:
+            key (str): The cache key.
+            extract (callable): Returns an iterable of text chunks.
+            chunk_size (int): Approximate number of characters per chunk.
+
+        Yields:
+            str: Chunks of the cached or extracted text.
+        """
+        value = self.get(key)
+
+        if value is not None:
+            decompressor = zlib.decompressobj()
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            while value:
+                data = decompressor.decompress(value, chunk_size)
+                value = decompressor.unconsumed_tail
+                yield decoder.decode(data)
+            yield decoder.decode(decompressor.flush(), final=True)
+            return
+
+        compressor = zlib.compressobj()
+        compressed = []
+        for chunk in extract():
+            compressed.append(compressor.compress(chunk.encode("utf-8")))
+            yield chunk
+        compressed.append(compressor.flush())
+        self.set(key, b"".join(compressed))
+
+
+def check_for_new_words(text_words, *known_words, deck_loader=None):
+    """
+    Removes words from a dictionary if they are part of an existing set.
+
+    Args:
+        text_words (dict): A dictionary containing words and words frequencies.
+        *known_words: Collections of unique words, such as sets or a
+            KnownWordsIndex, or deck names resolved with deck_loader.
+        deck_loader (callable, optional): Returns the set of words in a
+            deck, given its name.
+
+    Returns:
+        dict: A new dictionary with the words from the set removed.
+    """
+    return filter_known_words(text_words, known_words, deck_loader)[0]
+
+
+def filter_known_words(text_words, sources, deck_loader=None):
+    """
+    Removes the words found in any of several sources in a single pass.
+
+    Set-like sources are intersected with the dictionary's key view, and
+    other sources are only checked for words not already removed. Each
+    removed word is credited to the first source containing it.
+
+    Args:
+        text_words (dict): A dictionary containing words and words frequencies.
+        sources (list): Collections of unique words, such as sets, dicts or
+            a KnownWordsIndex, or deck names resolved with deck_loader.
+        deck_loader (callable, optional): Returns the set of words in a
+            deck, given its name.
+
+    Returns:
+        tuple: A new dictionary without the known words, and a list of the
+            number of words removed by each source.
+
+    Raises:
+        ValueError: If a deck name is given without a deck_loader.
+    """
+    remaining = text_words.keys()
+    removed_counts = []
+
+    for source in sources:
+        if isinstance(source, str):
+            if deck_loader is None:
+                raise ValueError(f"Cannot load words from deck: {source}")
+            source = deck_loader(source)
+        if isinstance(source, Mapping):
+            source = source.keys()
+
+        if isinstance(source, AbstractSet):
+            matched = remaining & source
+        else:
+            matched = {word for word in remaining if word in source}
+
+        removed_counts.append(len(matched))
+        if matched:
+            remaining = remaining - matched
+
+    if len(remaining) == len(text_words):
+        return dict(text_words), removed_counts
+
+    new_words = {
+        word: count for word, count in text_words.items()
+        if word in remaining
+        }
+    return new_words, removed_counts
+
+
+class KnownWordsIndex:
+    """
+    A sorted table of known words stored in a file and read through mmap.
+
+    The file holds a header, an array of (count + 1) 32-bit offsets and
+    the UTF-8 encoded words in byte order, so it opens without reading
+    the words into memory and supports membership tests by binary search.
+    It can be used in place of a set with check_for_new_words().
+
+    Attributes:
+        path (Path): The index file.
+    """
+
+    MAGIC = b"WLKWIDX1"
+
+    _header = struct.Struct("<8sQ")
+
+    def __init__(self, path):
+        """
+        Opens an existing index file.
+
+        Args:
+            path (str or Path): The index file.
+
+        Raises:
+            ValueError: If the file is not a known-words index.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, count = self._header.unpack_from(self._data)
+        except struct.error:
+            magic, count = None, 0
+        end = self._header.size + 4 * (count + 1)
+        if magic != self.MAGIC or len(self._data) < end:
+            self._data.close()
+            raise ValueError(f"Not a known-words index: {self.path}")
+
+        self._count = count
+        view = memoryview(self._data)[self._header.size:end]
+        if sys.byteorder == "little":
+            self._offsets = view.cast("I")
+        else:
+            self._offsets = array("I", view.tobytes())
+            self._offsets.byteswap()
+            view.release()
+
+    @classmethod
+    def build(cls, words, path):
+        """
+        Writes an index of words to a file and opens it.
+
+        Args:
+            words (iterable): The known words.
+            path (str or Path): The destination file, which is replaced
+                once the index has been written.
+
+        Returns:
+            KnownWordsIndex: The new index.
+        """
+        entries = sorted({word.encode("utf-8") for word in words if word})
+        offsets = array("I", [0])
+        size = 0
+        for entry in entries:
+            size += len(entry)
+            offsets.append(size)
+        offsets = array("I", (
+            cls._header.size + 4 * len(offsets) + offset
+            for offset in offsets
+            ))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".part")
+        with open(temp_path, "wb") as f:
+            f.write(cls._header.pack(cls.MAGIC, len(entries)))
+            offsets.tofile(f)
+            for entry in entries:
+                f.write(entry)
+        os.replace(temp_path, path)
+        return cls(path)
+
+    @classmethod
+    def is_index_file(cls, path):
+        """
+        Checks whether a file starts with the known-words index header.
+
+        Args:
+            path (str or Path): A file path.
+
+        Returns:
+            bool: True if the file is a known-words index.
+        """
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        if not isinstance(word, str):
+            return False
+        key = word.encode("utf-8")
+        data, offsets = self._data, self._offsets
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry = data[offsets[middle]:offsets[middle + 1]]
+            if entry < key:
+                low = middle + 1
+            elif entry > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __iter__(self):
+        data, offsets = self._data, self._offsets
+        for i in range(self._count):
+            yield data[offsets[i]:offsets[i + 1]].decode("utf-8")
+
+    def close(self):
+        """Releases the memory map of the index file."""
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_word_count_suffix = re.compile(r":\s*\d+\s*$")
+
+
+def read_word_list(filepath):
+    """
+    Yields the words in a known-words list file.
+
+    CSV files contribute the first column of each row, such as a word list
+    created by this application; a "word: count" entry, as written to
+    translated word lists, contributes its word. Other files contribute
+    each word on each line. Words are cleaned and NFC-normalised in the
+    same way as generated word lists, and entries without letters are
+    skipped.
+
+    Args:
+        filepath (str or Path): A .csv or plain text file.
+
+    Yields:
+        str: Each word in the file.
+    """
+    clean_word = _word_tokenizer.clean_word
+
+    with open(filepath, encoding="utf-8-sig", newline="") as f:
+        if Path(filepath).suffix.lower() == ".csv":
+            entries = (
+                _word_count_suffix.sub("", row[0]).strip()
+                for row in csv.reader(f) if row
+                )
+        else:
+            entries = (word for line in f for word in line.split())
+
+        for entry in entries:
+            word = clean_word(unicodedata.normalize("NFC", entry.lower()))
+            if word:
+                yield word
+
+
+def load_known_words(filepath, cache_dir=None):
+    """
+    Opens a known-words index, building one for word list files.
+
+    Indexes built from CSV or text lists are stored in the cache directory
+    under the SHA-256 of the list, so later runs open them instantly.
+
+    Args:
+        filepath (str or Path): An index file, or a .csv or text word list.
+        cache_dir (Path, optional): The folder holding built indexes.
+            Defaults to "known-words" inside the cache directory.
+
+    Returns:
+        KnownWordsIndex: An index of the known words.
+    """
+    if KnownWordsIndex.is_index_file(filepath):
+        return KnownWordsIndex(filepath)
+
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    if cache_dir is None:
+        cache_dir = get_cache_dir() / "known-words"
+    index_path = Path(cache_dir) / f"{digest.hexdigest()}.idx"
+    if KnownWordsIndex.is_index_file(index_path):
+        return KnownWordsIndex(index_path)
+    return KnownWordsIndex.build(read_word_list(filepath), index_path)
+
+
+TRANSLATION_CHUNK_SIZE = 25
+
+TRANSLATION_WORKERS = 4
+
+TRANSLATION_DELAY = 0.5
+
+TRANSLATION_RETRIES = 3
+
+# Requests to the translator share one throttle slot, whatever the backend.
+_TRANSLATION_THROTTLE_KEY = "translator://batch"
+
+
+def google_translate_batch(words, source, target):
+    """
+    Translates several words with Google Translate.
+
+    Args:
+        words (list): The words to translate.
+        source (str): The language code of the input language.
+        target (str): The language code of the target language.
+
+    Returns:
+        list: The translation of each word.
+    """
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=source, target=target).translate_batch(
+        words
+        )
+
+
+def _translate_chunk(chunk, source, target, translator, throttle, retries):
+    """
+    Translates a chunk of words, retrying failed requests with exponential
+    backoff.
+
+    Returns:
+        tuple: The chunk and the translation of each of its words.
+    """
+    for attempt in range(retries + 1):
+        throttle.wait(_TRANSLATION_THROTTLE_KEY)
+        try:
+            translations = list(translator(chunk, source, target))
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(throttle.delay * 2 ** attempt)
+            continue
+        if len(translations) != len(chunk):
+            raise ValueError(
+                f"Expected {len(chunk)} translations, "
+                f"received {len(translations)}."
+                )
+        return chunk, translations
+
+
+def translate_words(words, source, target, translator=None, cache=None,
+                    chunk_size=TRANSLATION_CHUNK_SIZE,
+                    workers=TRANSLATION_WORKERS, delay=TRANSLATION_DELAY,
+                    retries=TRANSLATION_RETRIES):
+    """
+    Translates words, only sending those without a cached translation.
+
+    Uncached words are split into chunks translated by a pool of threads.
+    The start of each request is spaced out by delay, and failed chunks
+    are retried. Each chunk is cached as soon as it is translated, so an
+    interrupted run resumes where it stopped.
+
+    Args:
+        words (iterable): The words to translate.
+        source (str): The language code of the input language.
+        target (str): The language code of the target language.
+        translator (callable, optional): Returns the list of translations
+            of a list of words, given the words and the source and target
+            language codes. Defaults to google_translate_batch.
+        cache (DiskCache, optional): A cache of previous translations,
+            keyed by word and language pair. Defaults to the disk cache in
+            the cache directory, unless caching is disabled.
+        chunk_size (int): The number of words sent per request.
+        workers (int): The maximum number of simultaneous requests.
+        delay (float): The minimum delay between the start of two
+            requests, doubled before each retry.
+        retries (int): The number of times a failed chunk is retried.
+
+    Returns:
+        dict: The translation of each word.
+
+    Raises:
+        Exception: The last error of a chunk that failed every retry,
+            once the other chunks have finished.
+    """
+    if translator is None:
+        translator = google_translate_batch
+    if cache is None:
+        cache = get_disk_cache()
+
+    words = list(dict.fromkeys(words))
+    keys = {f"translation:{source}:{target}:{word}": word for word in words}
+    translations = {}
+    if cache is not None:
+        for key, value in cache.get_many(keys).items():
+            translations[keys[key]] = value.decode("utf-8")
+
+    missing = [word for word in words if word not in translations]
+    chunks = [
+        missing[start:start + chunk_size]
+        for start in range(0, len(missing), chunk_size)
+        ]
+    if not chunks:
+        return translations
+
+    throttle = HostThrottle(delay)
+    error = None
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        futures = [
+            pool.submit(
+                _translate_chunk, chunk, source, target, translator,
+                throttle, retries
+                )
+            for chunk in chunks
+            ]
+        for future in as_completed(futures):
+            try:
+                chunk, results = future.result()
+            except Exception as e:
+                error = e
+                continue
+            done = dict(zip(chunk, results))
+            translations.update(done)
+            if cache is not None:
+                cache.set_many({
+                    f"translation:{source}:{target}:{word}":
+                        translation.encode("utf-8")
+                    for word, translation in done.items()
+                    if translation is not None
+                })
+
+    if error is not None:
+        raise error
+    return translations
+
+
+def convert_word_list_to_csv_with_translations(words, filepath, lang, target,
+                                               translator=None, cache=None):
+    """
+    Creates a CSV file containing words and their translations.
+
+    Args:
+        words (dict): A dictionary containing words and word frequencies.
+        filepath (str): The intended filepath of the CSV file.
+        lang (str): The language code of the input language.
+        target (str): The language code of the target language.
+        translator (callable, optional): The translation backend passed to
+            translate_words. Defaults to Google Translate.
+        cache (DiskCache, optional): A cache of previous translations.
+            Defaults to the disk cache in the cache directory, unless
+            caching is disabled.
+
+    Returns:
+        None
+    """
+    sorted_words = sorted(words.items())
+    translations = translate_words(
+        [word for word, count in sorted_words], lang, target, translator,
+        cache
+        )
+    translated_words = [translations[word] for word, count in sorted_words]
+
+    with open(filepath, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        for (word, count), translation in zip(sorted_words, translated_words):
+            writer.writerow([f"{word}: {count}", translation])
+
+
+_supported_languages = {}
+
+
+def get_supported_languages(refresh=False, cache_dir=None):
+    """
+    Returns the languages supported for translation.
+
+    The table is saved as languages.json in the cache directory when it is
+    first needed, and read from there afterwards, so checking a language
+    needs neither a network connection nor the translator package. Each
+    table is then kept in memory, keyed by its path.
+
+    Args:
+        refresh (bool): Whether to rebuild the saved table from the
+            translator package.
+        cache_dir (Path, optional): The folder holding the table. Defaults
+            to the cache directory.
+
+    Returns:
+        dict: Language codes keyed by lowercase language name.
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    path = Path(cache_dir) / "languages.json"
+    if path in _supported_languages and not refresh:
+        return _supported_languages[path]
+
+    languages = None
+    if not refresh:
+        try:
+            with open(path, encoding="utf-8") as f:
+                languages = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    if not isinstance(languages, dict) or not languages:
+        from deep_translator import GoogleTranslator
+
+        languages = GoogleTranslator().get_supported_languages(as_dict=True)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + ".part")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(languages, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    _supported_languages[path] = languages
+    return languages
+
+
+def resolve_language(user_lang, languages=None):
+    """
+    Finds the translation code of a language name or code.
+
+    Besides the translator's own names and codes, ISO 639 codes such as
+    "spa" or "ger" are accepted and resolved through pycountry.
+
+    Args:
+        user_lang (str): A language name or code, in any case.
+        languages (dict, optional): Language codes keyed by lowercase
+            name. Defaults to get_supported_languages().
+
+    Returns:
+        str: The language code, or None if the language is not supported.
+    """
+    if languages is None:
+        languages = get_supported_languages()
+
+    user_lang = user_lang.strip().lower()
+    codes = {code.lower(): code for code in languages.values()}
+
+    if user_lang in codes:
+        return codes[user_lang]
+    if user_lang in languages:
+        return languages[user_lang]
+    if not user_lang.isalpha() or len(user_lang) not in (2, 3):
+        return None
+    return languages.get(get_language_name(user_lang).lower())
+
+
+def get_user_language(test_inputs=None, refresh=False):
+    """
+    Obtains user-specified language for translation purposes.
+
+    Args:
+        test_inputs (list): Test inputs representing languages (optional).
+        refresh (bool): Whether to rebuild the saved language table.
+
+    Returns:
+        str: A two-letter code representing the user-specified language.
+    """
+    valid_languages = get_supported_languages(refresh)
+
+    if test_inputs:
+        test_inputs = iter(test_inputs)
+
+    while True:
+        if test_inputs:
+            user_lang = next(test_inputs)
+        else:
+            user_lang = input(
+                "Please enter a language name or two-letter language code."
+                "\nTo see a list of all available languages, press L.\n"
+                )
+        user_lang = user_lang.strip().lower()
+        lang_code = resolve_language(user_lang, valid_languages)
+
+        if lang_code:
+            return lang_code
+        elif user_lang == 'l':
+            print('Available languages: ')
+            for lang_name, lang_code in valid_languages.items():
+                print(f'{lang_name}: {lang_code}')
+            print('\n')
+        else:
+            print('Invalid input.')
+
+
+def convert_word_list_to_csv(words, filepath, order="alpha", top=None,
+                             min_count=1):
+    """
+    Creates a CSV file containing words and word frequencies from a given text.
+
+    Args:
+        words (dict): A dictionary containing words and word frequencies.
+        filepath (str): The intended filepath of the CSV file.
+        order (str): "alpha", "frequency" or "none" (optional).
+        top (int): The number of most frequent words to keep (optional).
+        min_count (int): The lowest word frequency to keep (optional).
+
+    Returns:
+        None
+    """
+    write_word_list(words, filepath, "csv", order, top, min_count)
+
+
+WORD_LIST_ORDERS = ("alpha", "frequency", "none")
+
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
+def _frequency_key(row):
+    """Orders rows by descending count, then alphabetically."""
+    return -row[1], row[0]
+
+
+def iter_word_list_rows(words, order="alpha", top=None, min_count=1):
+    """
+    Selects and orders the rows of a word list.
+
+    Words below min_count are skipped as the dictionary is read. The top
+    words are found with a heap of that size rather than by sorting every
+    word, and with order "none" the remaining rows are streamed unsorted.
+
+    Args:
+        words (dict): A dictionary containing words and word frequencies.
+        order (str): "alpha" for alphabetical order, "frequency" for the
+            most frequent words first, or "none" to keep dictionary order.
+        top (int): The number of most frequent words to keep (optional).
+        min_count (int): The lowest word frequency to keep (optional).
+
+    Returns:
+        iterable: (word, count) rows.
+
+    Raises:
+        ValueError: If the order is not recognised.
+    """
+    if order not in WORD_LIST_ORDERS:
+        raise ValueError(f"Unknown word list order: {order}")
+
+    rows = (
+        (word, count) for word, count in words.items()
+        if word and count >= min_count
+        )
+
+    if top is not None:
+        rows = heapq.nsmallest(top, rows, key=_frequency_key)
+        if order == "alpha":
+            rows.sort()
+        return rows
+
+    if order == "alpha":
+        return sorted(rows)
+    if order == "frequency":
+        return sorted(rows, key=_frequency_key)
+    return rows
+
+
+def _write_csv_rows(file, rows, delimiter=","):
+    """Writes word list rows as delimited values."""
+    csv.writer(file, delimiter=delimiter).writerows(rows)
+
+
+def _write_jsonl_rows(file, rows):
+    """Writes word list rows as JSON Lines."""
+    file.writelines(
+        json.dumps({"word": word, "count": count}, ensure_ascii=False) + "\n"
+        for word, count in rows
+        )
+
+
+WORD_LIST_FORMATS = {
+    "csv": ("utf-8-sig", _write_csv_rows),
+    "tsv": ("utf-8", partial(_write_csv_rows, delimiter="\t")),
+    "jsonl": ("utf-8", _write_jsonl_rows),
+}
+
+
+def get_word_list_format(filepath, default="csv"):
+    """
+    Finds the word list format matching a file extension.
+
+    Args:
+        filepath (str or Path): The path of the word list file.
+        default (str): The format used for other extensions.
+
+    Returns:
+        str: "csv", "tsv" or "jsonl".
+    """
+    suffix = Path(filepath).suffix.lower().lstrip(".")
+    return suffix if suffix in WORD_LIST_FORMATS else default
 
 
-def extract_text_from_file(filepath):
+def write_word_list(words, filepath, output_format=None, order="alpha",
+                    top=None, min_count=1):
     """
-    Removes timestamps and formatting from SRT subtitle files.
+    Writes a word list as CSV, TSV or JSON Lines.
+
+    Rows are streamed to a large write buffer, so no copy of the word list
+    is built as text in memory.
 
     Args:
-        filepath (str): The path to a file containing some text.
+        words (dict): A dictionary containing words and word frequencies.
+        filepath (str or Path): The path of the output file.
+        output_format (str): "csv", "tsv" or "jsonl" (optional). Defaults
+            to the format matching the file extension, or CSV.
+        order (str): "alpha", "frequency" or "none" (optional).
+        top (int): The number of most frequent words to keep (optional).
+        min_count (int): The lowest word frequency to keep (optional).
 
     Returns:
-        str: The text from the file, with timestamps/formatting removed.
-    """
-    valid_formats = ['.srt', '.txt', '.md', '.docx', '.pdf', '.epub']
+        int: The number of words written.
 
-    filepath = Path(filepath)
+    Raises:
+        ValueError: If the format or order is not recognised.
+    """
+    if output_format is None:
+        output_format = get_word_list_format(filepath)
+    if output_format not in WORD_LIST_FORMATS:
+        raise ValueError(f"Unknown word list format: {output_format}")
 
-    if not filepath.exists():
-        raise FileNotFoundError(f"Error: The file '{filepath}' was not found.")
+    encoding, write_rows = WORD_LIST_FORMATS[output_format]
+    written = 0
 
-    if not any(filepath.suffix == ext for ext in valid_formats):
-        raise IOError(
-            f"Error: Could not read the file contents of '{filepath.name}'."
-            " File format is invalid.")
+    def counted(rows):
+        nonlocal written
+        for row in rows:
+            written += 1
+            yield row
 
-    try:
-        timestamp_pattern = (
-            r'\d+\s+'
-            r'\d{2}:\d{2}:\d{2},\d{3} --> '
-            r'\d{2}:\d{2}:\d{2},\d{3}\s*'
-        )
-        tag_pattern = r'<.*?>'
-        combined_pattern = rf"{timestamp_pattern}|{tag_pattern}"
+    rows = iter_word_list_rows(words, order, top, min_count)
+    with open(
+        filepath, mode="w", encoding=encoding, newline="",
+        buffering=OUTPUT_BUFFER_SIZE
+    ) as file:
+        write_rows(file, counted(rows))
+    return written
 
-        if filepath.suffix == '.docx':
-            doc = docx.Document(filepath)
-            text = '\n'.join([p.text for p in doc.paragraphs])
 
-        elif filepath.suffix == '.pdf':
-            pdf_reader = PdfReader(filepath)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+def extract_file_list(dir, exts):
+    """
+    Extracts a list of files in a directory that match a list of extensions.
 
-        elif filepath.suffix == '.epub':
-            book = epub.read_epub(str(filepath))
-            text = ""
-            for item in book.get_items():
-                if item.get_type() == ITEM_DOCUMENT:
-                    soup = BeautifulSoup(item.get_content(), 'html.parser')
-                    text += soup.get_text().strip()
+    Args:
+        dir (str): A directory path.
+        exts (list): A list of file extensions.
 
-        else:
-            with open(filepath, encoding="utf-8-sig") as f:
-                lines = f.readlines()
+    Returns:
+        list: A list of filepaths.
+    """
+    path = Path(dir)
 
-            first_line = next(
-                (
-                    line.strip() for line in lines if line.strip()
-                ),
-                ""
-            )
+    if not path.is_dir():
+        raise ValueError(f"Invalid directory: {dir}")
 
-            if first_line.startswith("[Script Info]"):
-                text = extract_ssa_text(filepath)
-            else:
-                text = "".join(lines)
+    files = [file for file in path.glob("**/*") if file.suffix in exts]
+    return files
 
-        cleaned_text = re.sub(combined_pattern, "", text)
-        cleaned_text = re.sub(
-            r'[\u200B\u200C\u200D\u2060\uFEFF]', '', cleaned_text
-            )
-        cleaned_text = re.sub(r'\\an8}', '', cleaned_text)
-        cleaned_text = re.sub(r'\d\.\w+(?:\.\w+)?', '', cleaned_text)
-        cleaned_text = re.sub(r'(?<=\w)—(?=\w)', ' ', cleaned_text)
-        cleaned_text = unicodedata.normalize("NFC", cleaned_text)
 
-        return cleaned_text
+DEFAULT_HTTP_TIMEOUT = 10
 
-    except RuntimeError:
-        raise RuntimeError(f"Error: Could not read the file '{filepath}'")
+DEFAULT_HTTP_POOL_SIZE = 10
 
 
-def extract_ssa_text(filepath):
+class HTTPSession:
     """
-    Removes timestamps and formatting from SSA-formatted subtitle files.
+    Wraps a requests session with keep-alive connection pools and a
+    default timeout.
 
-    Args:
-        filepath (str): The path to a file containing some text.
+    requests is only imported when a session is created, so that it is
+    not loaded until a network call is made.
 
-    Returns:
-        str: The text from the file, with timestamps/formatting removed.
+    Attributes:
+        session (requests.Session): The wrapped session.
+        timeout (float): The timeout in seconds for requests made without
+            an explicit timeout.
     """
-    filepath = Path(filepath)
 
-    with open(filepath, encoding="utf-8-sig") as f:
-        text = f.read()
+    def __init__(self, timeout=DEFAULT_HTTP_TIMEOUT,
+                 pool_size=DEFAULT_HTTP_POOL_SIZE, host_pool_sizes=None):
+        """
+        Creates a session and mounts its connection pools.
 
-    lines = text.splitlines()
-    cleaned_lines = []
+        Args:
+            timeout (float): The default request timeout in seconds.
+            pool_size (int): The number of connections kept per host.
+            host_pool_sizes (dict, optional): Pool sizes for specific URL
+                prefixes (e.g. {"http://localhost:8765": 2}).
+        """
+        import requests
 
-    for line in lines:
-        if line.startswith("Dialogue:"):
-            parts = line.split(",", 9)
-            if len(parts) == 10:
-                dialogue_text = parts[-1]
-                dialogue_text = re.sub(r"\{.*?\}", "", dialogue_text)
-                dialogue_text = re.sub(r'\\[Nn]', ' ', dialogue_text)
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.mount_pool("http://", pool_size)
+        self.mount_pool("https://", pool_size)
+        for prefix, size in (host_pool_sizes or {}).items():
+            self.mount_pool(prefix, size)
 
-                cleaned_lines.append(dialogue_text)
+    def mount_pool(self, prefix, pool_size):
+        """
+        Uses a connection pool of the given size for URLs with a prefix.
 
-    return unicodedata.normalize("NFC", " ".join(cleaned_lines))
+        Args:
+            prefix (str): The URL prefix, such as a scheme and host.
+            pool_size (int): The number of connections kept per host.
 
+        Returns:
+            None
+        """
+        from requests.adapters import HTTPAdapter
 
-def generate_word_list(text):
-    """
-    Generates a list of words and word frequencies in a given text.
+        self.session.mount(prefix, HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+            ))
 
-    Args:
-        text (str): Text containing the words to be counted.
+    def get_adapter(self, url):
+        """Returns the connection adapter used for a URL."""
+        return self.session.get_adapter(url)
 
-    Returns:
-        dict: A dictionary containing words and word counts.
-    """
-    word_freq = defaultdict(int)
-    extra_punc = '¿¡♪«»—©‘’–‚”“„•[]【】〔〕〚〛'
-    punc_chars = re.escape(punctuation + extra_punc)
-    if text:
-        words = text.lower().split()
-        for word in words:
-            word = re.sub(r"^\d+(?=[^\W\d_])", "", word, flags=re.UNICODE)
-            word = re.sub(r"\[\d+\W*", "", word)
-            word = re.sub(rf'^[{punc_chars}]*|[{punc_chars}]*$', '', word)
-            if not word or not any(char.isalpha() for char in word):
-                continue
-            word_freq[word] += 1
-    return word_freq
+    def get(self, url, **kwargs):
+        """Sends a GET request, applying the default timeout if none is
+        given."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Sends a POST request, applying the default timeout if none is
+        given."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        """Closes the connections held by the session."""
+        self.session.close()
 
 
-def check_for_new_words(text_words, anki_words):
+_http_session = None
+
+_http_session_pid = None
+
+_http_session_lock = threading.Lock()
+
+
+def _parse_host_pool_sizes(value):
     """
-    Removes words from a dictionary if they are part of an existing set.
+    Parses pool sizes for URL prefixes from a setting such as
+    "http://localhost:8765=2,https://example.com=4".
+
+    Entries without a prefix or a positive size are ignored.
+    """
+    sizes = {}
+    for entry in value.split(","):
+        prefix, _, size = entry.strip().rpartition("=")
+        try:
+            size = int(size)
+        except ValueError:
+            continue
+        if prefix and size > 0:
+            sizes[prefix] = size
+    return sizes
+
+
+def get_http_session():
+    """
+    Returns the session shared by every network call in this process.
+
+    The timeout and per-host pool size are read from the
+    WORD_LIST_HTTP_TIMEOUT and WORD_LIST_HTTP_POOL_SIZE environment
+    variables. Pool sizes for specific URL prefixes are read from
+    WORD_LIST_HTTP_HOST_POOLS, as comma-separated prefix=size entries. A
+    new session is created after a fork, so worker processes never share
+    sockets with their parent.
 
     Args:
-        text_words (dict): A dictionary containing words and words frequencies.
-        anki_words (set): A set containing unique words.
+        None.
 
     Returns:
-        dict: A new dictionary with the words from the set removed.
+        HTTPSession: The shared session.
     """
-    new_words = {}
-    for key, value in text_words.items():
-        if key not in anki_words:
-            new_words[key] = value
-    return new_words
+    global _http_session, _http_session_pid
+
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            try:
+                timeout = float(os.getenv("WORD_LIST_HTTP_TIMEOUT", ""))
+            except ValueError:
+                timeout = DEFAULT_HTTP_TIMEOUT
+            try:
+                pool_size = int(os.getenv("WORD_LIST_HTTP_POOL_SIZE", ""))
+            except ValueError:
+                pool_size = DEFAULT_HTTP_POOL_SIZE
+            host_pool_sizes = _parse_host_pool_sizes(
+                os.getenv("WORD_LIST_HTTP_HOST_POOLS", "")
+                )
+            _http_session = HTTPSession(
+                timeout, max(pool_size, 1), host_pool_sizes
+                )
+            _http_session_pid = os.getpid()
+        return _http_session
 
 
-def convert_word_list_to_csv_with_translations(words, filepath, lang, target):
+def extract_text_from_url(url):
     """
-    Creates a CSV file containing words and their translations.
+    Extracts text from a URL, including body and header.
 
     Args:
-        words (dict): A dictionary containing words and word frequencies.
-        filepath (str): The intended filepath of the CSV file.
-        lang (str): The language code of the input language.
-        target (str): The language code of the target language.
+        url (str): The URL of a webpage.
 
     Returns:
-        None
+        str: The text content from the webpage.
     """
-    sorted_words = sorted(words.items())
-    translator = GoogleTranslator(source=lang, target=target)
+    import requests
 
-    word_list = [word for word, count in sorted_words]
-    translated_words = translator.translate_batch(word_list)
+    try:
+        response = get_http_session().get(url)
+        return _parse_html(response.content)[0]
 
-    with open(filepath, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        for (word, count), translation in zip(sorted_words, translated_words):
-            writer.writerow([f"{word}: {count}", translation])
+    except requests.RequestException:
+        raise ValueError("Text extraction failed. URL may be invalid.")
 
 
-def get_user_language(test_inputs=None):
+def _parse_html(content, base_url=None):
     """
-    Obtains user-specified language for translation purposes.
+    Extracts the visible text and links from an HTML page.
 
     Args:
-        test_inputs (list): Test inputs representing languages (optional).
+        content (bytes): The HTML content of the page.
+        base_url (str, optional): The page URL, used to resolve links.
+            If omitted, no links are collected.
 
     Returns:
-        str: A two-letter code representing the user-specified language.
+        tuple: The page text and a list of absolute link URLs.
     """
-    valid_languages = GoogleTranslator().get_supported_languages(as_dict=True)
+    from bs4 import BeautifulSoup
 
-    if test_inputs:
-        test_inputs = iter(test_inputs)
+    content = BeautifulSoup(content, "html.parser")
 
-    while True:
-        if test_inputs:
-            user_lang = next(test_inputs)
-        else:
-            user_lang = input(
-                "Please enter a language name or two-letter language code."
-                "\nTo see a list of all available languages, press L.\n"
-                )
-        user_lang = user_lang.strip().lower()
+    for element in content(['script', 'style', 'noscript']):
+        element.decompose()
+    text = content.get_text(separator=' ', strip=True)
 
-        if user_lang in valid_languages.values():
-            return user_lang
-        elif user_lang in valid_languages.keys():
-            return valid_languages[user_lang]
-        elif user_lang == 'l':
-            print('Available languages: ')
-            for lang_name, lang_code in valid_languages.items():
-                print(f'{lang_name}: {lang_code}')
-            print('\n')
-        else:
-            print('Invalid input.')
+    links = []
+    if base_url:
+        for anchor in content.find_all("a", href=True):
+            link = urldefrag(urljoin(base_url, anchor["href"].strip()))[0]
+            if urlsplit(link).scheme in ("http", "https"):
+                links.append(link)
+
+    return text, links
+
+
+DEFAULT_CRAWL_WORKERS = 8
+
+DEFAULT_CRAWL_DELAY = 0.5
 
+HTML_MEDIA_TYPES = ("text/html", "application/xhtml+xml")
 
-def convert_word_list_to_csv(words, filepath):
+
+class HostThrottle:
+    """
+    Spaces out requests to the same host by a minimum delay.
+
+    Attributes:
+        delay (float): The minimum number of seconds between the start of
+            two requests to one host.
     """
-    Creates a CSV file containing words and word frequencies from a given text.
+
+    def __init__(self, delay=DEFAULT_CRAWL_DELAY):
+        """
+        Creates a throttle with no previous requests.
+
+        Args:
+            delay (float): The per-host delay in seconds.
+        """
+        self.delay = delay
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """
+        Blocks until a request to the URL's host is allowed.
+
+        Args:
+            url (str): The URL about to be requested.
+
+        Returns:
+            None
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _fetch_page(url, throttle, collect_links):
+    """
+    Downloads a page and extracts its text, waiting for the host throttle.
 
     Args:
-        words (dict): A dictionary containing words and word frequencies.
-        filepath (str): The intended filepath of the CSV file.
+        url (str): The URL of the page.
+        throttle (HostThrottle): The per-host request throttle.
+        collect_links (bool): Whether to return the links on the page.
 
     Returns:
-        None
+        tuple: The page text and a list of absolute link URLs, or None if
+            the response is not an HTML page.
     """
-    sorted_words = sorted(words.items())
+    throttle.wait(url)
+    with get_http_session().get(url, stream=True) as response:
+        response.raise_for_status()
+        media_type = response.headers.get("Content-Type", "text/html")
+        if media_type.split(";")[0].strip().lower() not in HTML_MEDIA_TYPES:
+            return None
+        content = response.content
+    return _parse_html(content, url if collect_links else None)
+
+
+def iter_url_texts(urls, depth=0, workers=DEFAULT_CRAWL_WORKERS,
+                   delay=DEFAULT_CRAWL_DELAY):
+    """
+    Downloads several pages concurrently, optionally crawling their links.
 
-    with open(filepath, mode="w", encoding="utf-8-sig", newline="") as file:
-        writer = csv.writer(file)
-        for word, count in sorted_words:
-            if word:
-                writer.writerow([word, count])
+    Pages are fetched and parsed in a pool of threads, and each result is
+    yielded as soon as it is ready, so the caller can count the words of
+    one page while others are still downloading. When depth is above 0,
+    links to the same hosts as the starting URLs are followed up to that
+    many levels.
+
+    Args:
+        urls (list): The starting URLs.
+        depth (int): The number of link levels to follow.
+        workers (int): The maximum number of simultaneous downloads.
+        delay (float): The minimum delay between requests to one host.
+
+    Linked pages that are not HTML, such as images or PDF files, are
+    skipped; a starting URL that is not HTML is reported as an error.
+
+    Yields:
+        tuple: (url, text, error) for each page. Either text is a string
+            and error is None, or text is None and error is the exception
+            raised while fetching or parsing the page.
+    """
+    throttle = HostThrottle(delay)
+    pending = deque()
+    seen = set()
+    for url in urls:
+        url = urldefrag(url)[0]
+        if url not in seen:
+            seen.add(url)
+            pending.append((url, 0))
+    hosts = {urlsplit(url).netloc for url, _ in pending}
+
+    pool = ThreadPoolExecutor(max(workers, 1))
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < max(workers, 1):
+                url, level = pending.popleft()
+                future = pool.submit(_fetch_page, url, throttle, level < depth)
+                running[future] = (url, level)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, level = running.pop(future)
+                try:
+                    page = future.result()
+                except Exception as exc:
+                    yield url, None, exc
+                    continue
+                if page is None:
+                    if level == 0:
+                        yield url, None, ValueError(
+                            "URL does not point to an HTML page."
+                            )
+                    continue
+
+                text, links = page
+
+                for link in links:
+                    if link not in seen and urlsplit(link).netloc in hosts:
+                        seen.add(link)
+                        pending.append((link, level + 1))
+
+                yield url, text, None
+    finally:
+        for future in running:
+            future.cancel()
+        pool.shutdown(wait=False)
 
 
-def extract_file_list(dir, exts):
+def iter_sitemap_urls(url, seen=None):
     """
-    Extracts a list of files in a directory that match a list of extensions.
+    Yields the page URLs listed in a sitemap, following sitemap indexes.
 
     Args:
-        dir (str): A directory path.
-        exts (list): A list of file extensions.
+        url (str): The URL of a sitemap, optionally gzip-compressed.
+        seen (set, optional): The sitemap URLs already read, so that an
+            index listing itself or an earlier index is not read again.
 
-    Returns:
-        list: A list of filepaths.
+    Yields:
+        str: Each page URL in the sitemap.
     """
-    path = Path(dir)
+    import requests
+    from lxml import etree
 
-    if not path.is_dir():
-        raise ValueError(f"Invalid directory: {dir}")
+    if seen is None:
+        seen = set()
+    seen.add(url)
 
-    files = [file for file in path.glob("**/*") if file.suffix in exts]
-    return files
+    try:
+        response = get_http_session().get(url)
+        response.raise_for_status()
+        content = response.content
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        root = etree.fromstring(content, parser)
+    except (requests.RequestException, OSError, etree.XMLSyntaxError):
+        raise ValueError("Sitemap could not be read. URL may be invalid.")
+
+    kind = etree.QName(root).localname
+    if kind not in ("urlset", "sitemapindex"):
+        raise ValueError("Sitemap could not be read. URL may be invalid.")
+
+    locations = [
+        loc.text.strip() for loc in root.iter("{*}loc") if loc.text
+        ]
+    if kind == "sitemapindex":
+        for location in locations:
+            if location not in seen:
+                yield from iter_sitemap_urls(location, seen)
+    else:
+        yield from locations
 
 
-def extract_text_from_url(url):
+def is_sitemap_url(url):
     """
-    Extracts text from a URL, including body and header.
+    Checks whether a URL points to an XML sitemap.
 
     Args:
-        url (str): The URL of a webpage.
+        url (str): A URL.
 
     Returns:
-        str: The text content from the webpage.
+        bool: True if the URL path ends in .xml or .xml.gz.
     """
-    try:
-        response = requests.get(url, timeout=10)
-        content = BeautifulSoup(response.content, "html.parser")
+    return urlsplit(url).path.lower().endswith((".xml", ".xml.gz"))
 
-        for element in content(['script', 'style', 'noscript']):
-            element.decompose()
-        text = content.get_text(separator=' ', strip=True)
-        return text
 
-    except requests.RequestException:
-        raise ValueError("Text extraction failed. URL may be invalid.")
+MKV_SUBTITLE_SUFFIXES = {
+    "S_TEXT/UTF8": ".srt",
+    "S_TEXT/ASCII": ".srt",
+    "S_TEXT/ASS": ".ass",
+    "S_TEXT/SSA": ".ssa",
+}
 
 
-def extract_text_from_mkv(filepath, track_num, output_path=None):
+def extract_text_from_mkv(
+    filepath, track_num, output_path=None, cache=None, codec=None
+):
     """
     Extracts text from the subtitles of an MKV file.
 
@@ -307,55 +2581,250 @@ def extract_text_from_mkv(filepath, track_num, output_path=None):
         filepath (str): The path to the MKV file.
         track_num (int): Subtitle track number to extract.
         output_path (Optional, str): The destination filepath.
+        cache (Optional, DiskCache): A cache of previously extracted
+            subtitles, used unless output_path is given.
+        codec (Optional, str): The codec ID of the track, which selects
+            the subtitle parser.
 
     Returns:
         str: The text content from the subtitles.
     """
-    if output_path:
-        output = output_path
-    else:
-        with tempfile.NamedTemporaryFile(
-            suffix=".srt", delete=False
-        ) as temp_subs:
-            output = temp_subs.name
+    if not output_path:
+        return extract_mkv_tracks(filepath, {track_num: codec}, cache)[
+            track_num
+            ]
+
+    suffix = _get_mkv_subtitle_suffix(track_num, codec)
+    subprocess.run([
+            get_binary_path("mkvextract"), filepath, "tracks",
+            f"{track_num}:{output_path}"
+        ], check=True)
 
+    with open(output_path, encoding="utf-8-sig") as f:
+        return "".join(_iter_text_chunks(f, suffix))
+
+
+def extract_mkv_tracks(filepath, tracks, cache=None):
+    """
+    Extracts the text of several subtitle tracks of an MKV file at once.
+
+    All tracks are demuxed by a single mkvextract process. Each track is
+    written to a named pipe and parsed as it arrives, so no subtitle files
+    are written to disk; temporary files are used on systems without
+    named pipes.
+
+    Args:
+        filepath (str): The path to the MKV file.
+        tracks (dict): The codec ID of each track number to extract, as
+            returned by list_subtitle_tracks(). A codec of None, or a
+            list of track numbers, lets the parser be chosen from the
+            first line of the subtitles.
+        cache (Optional, DiskCache): A cache of previously extracted
+            subtitles.
+
+    Returns:
+        dict: The text of each track, by track number.
+
+    Raises:
+        ValueError: If a track does not hold text subtitles.
+        subprocess.CalledProcessError: If mkvextract fails.
+    """
+    if not isinstance(tracks, Mapping):
+        tracks = dict.fromkeys(tracks)
+    suffixes = {
+        track: _get_mkv_subtitle_suffix(track, codec)
+        for track, codec in tracks.items()
+    }
+
+    texts = {}
+    keys = {}
+    if cache is not None:
+        digest = cache.file_digest(filepath)
+        for track in suffixes:
+            keys[track] = f"mkv:{digest}:{track}:{EXTRACTOR_VERSION}"
+            text = cache.get_text(keys[track])
+            if text is not None:
+                texts[track] = text
+
+    missing = {
+        track: suffix for track, suffix in suffixes.items()
+        if track not in texts
+    }
+    if missing:
+        extracted = _demux_mkv_subtitles(filepath, missing)
+        for track, text in extracted.items():
+            if cache is not None:
+                cache.set_text(keys[track], text)
+        texts.update(extracted)
+    return {track: texts[track] for track in suffixes}
+
+
+def _get_mkv_subtitle_suffix(track_num, codec):
+    """Returns the file suffix that selects the parser for a codec ID."""
+    if codec is None:
+        return ".srt"
+    if codec not in MKV_SUBTITLE_SUFFIXES:
+        raise ValueError(
+            f"Track {track_num} holds {codec} subtitles, "
+            "which are not text subtitles."
+            )
+    return MKV_SUBTITLE_SUFFIXES[codec]
+
+
+def _demux_mkv_subtitles(filepath, suffixes):
+    """Runs mkvextract once for several tracks and returns their text."""
+    command = [get_binary_path("mkvextract"), str(filepath), "tracks"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {
+            track: os.path.join(directory, f"track{track}{suffix}")
+            for track, suffix in suffixes.items()
+        }
+        command += [f"{track}:{path}" for track, path in paths.items()]
+
+        if _make_fifos(paths.values()):
+            return _read_mkv_pipes(command, paths, suffixes)
+
+        subprocess.run(command, check=True)
+        texts = {}
+        for track, path in paths.items():
+            with open(path, encoding="utf-8-sig") as f:
+                texts[track] = "".join(_iter_text_chunks(f, suffixes[track]))
+        return texts
+
+
+def _make_fifos(paths):
+    """Creates named pipes at the given paths, returning False if named
+    pipes are not supported."""
+    if not hasattr(os, "mkfifo"):
+        return False
     try:
-        subprocess.run([
-                get_binary_path("mkvextract"), filepath, "tracks",
-                f"{track_num}:{output}"
-            ], check=True)
+        for path in paths:
+            os.mkfifo(path)
+    except OSError:
+        for path in paths:
+            Path(path).unlink(missing_ok=True)
+        return False
+    return True
+
+
+def _read_mkv_pipes(command, paths, suffixes):
+    """Parses the named pipes written by an mkvextract command."""
+    texts = {}
+
+    def read(track):
+        with open(paths[track], encoding="utf-8-sig") as f:
+            texts[track] = "".join(_iter_text_chunks(f, suffixes[track]))
+
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        futures = [pool.submit(read, track) for track in paths]
+        returncode = subprocess.run(command).returncode
+
+        # Readers of pipes that mkvextract never opened are still waiting
+        # for a writer, so open each pipe briefly to give them end-of-file.
+        while wait(futures, timeout=0.05).not_done:
+            for path in paths.values():
+                try:
+                    os.close(os.open(path, os.O_WRONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+        for future in futures:
+            future.result()
+
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command)
+    return texts
+
+
+def iter_mkv_word_counts(files, languages=None, workers=None, cache=None,
+                         track_ids=None):
+    """
+    Counts the words in the subtitles of several MKV files across a pool
+    of worker processes.
+
+    The selected text subtitle tracks of each file are demuxed together,
+    so each file is read once.
 
-        text = extract_text_from_file(output)
+    Args:
+        files (list): A list of MKV filepaths.
+        languages (list): The names of the subtitle languages to extract
+            (optional). Every text subtitle track is extracted by default.
+        workers (int): The number of worker processes (optional).
+        cache (DiskCache): A cache of previously extracted subtitles
+            (optional).
+        track_ids (list): The IDs of the subtitle tracks to extract
+            (optional). Combined with languages, a track must match both.
+
+    Yields:
+        tuple: The filepath, its word counts and None, or the filepath,
+            None and the exception raised, in order of completion.
+    """
+    if languages:
+        languages = {language.lower() for language in languages}
+    if track_ids:
+        track_ids = set(track_ids)
+    return _iter_pool_results(
+        partial(
+            _count_mkv_words, languages=languages, cache=cache,
+            track_ids=track_ids
+            ),
+        files, workers
+        )
 
-        return text
 
-    finally:
-        if not output_path:
-            Path(output).unlink(missing_ok=True)
+def _count_mkv_words(filepath, languages=None, cache=None, track_ids=None):
+    """Counts the words in the selected subtitle tracks of an MKV file."""
+    tracks = {
+        track["id"]: track["codec"]
+        for track in list_subtitle_tracks(filepath, True, cache)
+        if track["codec"] in MKV_SUBTITLE_SUFFIXES
+        and (not languages or track["language"].lower() in languages)
+        and (not track_ids or track["id"] in track_ids)
+    }
+    if not tracks:
+        raise ValueError("No matching text subtitle tracks found.")
+    return count_words(extract_mkv_tracks(filepath, tracks, cache).values())
 
 
-def list_subtitle_tracks(filepath):
+def list_subtitle_tracks(filepath, details=False, cache=None):
     """
     Returns list of subtitle tracks with language info from an MKV file.
 
     Args:
         filepath (str): The path to the MKV file.
+        details (bool): Whether to include the codec ID of each track.
+        cache (DiskCache): A cache of previously listed tracks, keyed by
+            the path, size and modification time of the file (optional).
 
     Returns:
         list: A list of subtitle tracks.
     """
-    code_converter = {
-        "cze": "ces",
-        "ger": "deu",
-        "gre": "ell",
-        "fre": "fra",
-        "may": "msa",
-        "dut": "nld",
-        "rum": "ron",
-        "chi": "zho",
-        "baq": "eus",
-        }
+    tracks = None
+    if cache is not None:
+        stat = os.stat(filepath)
+        key = (
+            f"mkv-tracks:{Path(filepath).resolve()}:{stat.st_size}:"
+            f"{stat.st_mtime_ns}"
+            )
+        cached = cache.get(key)
+        if cached is not None:
+            tracks = json.loads(cached)
+
+    if tracks is None:
+        tracks = _read_subtitle_tracks(filepath)
+        if cache is not None:
+            cache.set(key, json.dumps(tracks).encode("utf-8"))
+
+    if details:
+        return tracks
+    return [
+        {"id": track["id"], "language": track["language"]}
+        for track in tracks
+    ]
+
 
+def _read_subtitle_tracks(filepath):
+    """Lists the subtitle tracks of an MKV file with mkvmerge."""
     try:
         result = subprocess.run(
             [get_binary_path("mkvmerge"), "-J", filepath],
@@ -370,24 +2839,12 @@ def list_subtitle_tracks(filepath):
             if track.get("type") == "subtitles":
                 properties = track.get("properties", {})
 
-                id = track.get("id")
-
-                lang_code = properties.get("language", None)
-
-                if lang_code in code_converter:
-                    lang_code = code_converter[lang_code]
-
-                lang = None
-                if lang_code:
-                    lang = pycountry.languages.get(alpha_3=lang_code)
-                    if lang is None:
-                        lang = pycountry.languages.get(alpha_2=lang_code)
-
-                lang_name = lang.name if lang else "undefined"
-
                 tracks.append({
-                    "id": id,
-                    "language": lang_name,
+                    "id": track.get("id"),
+                    "language": get_language_name(
+                        properties.get("language", None)
+                        ),
+                    "codec": properties.get("codec_id"),
                 })
 
         return tracks
@@ -396,6 +2853,78 @@ def list_subtitle_tracks(filepath):
         raise ValueError(f"An error occurred. {e}")
 
 
+_language_code_converter = {
+    "cze": "ces",
+    "ger": "deu",
+    "gre": "ell",
+    "fre": "fra",
+    "may": "msa",
+    "dut": "nld",
+    "rum": "ron",
+    "chi": "zho",
+    "baq": "eus",
+    }
+
+
+@lru_cache(maxsize=None)
+def get_language_name(lang_code):
+    """
+    Returns the English name of an ISO 639 language code.
+
+    Results are memoized, as pycountry loads its language database on
+    first use.
+
+    Args:
+        lang_code (str): A two- or three-letter language code, including
+            the bibliographic codes used by Matroska.
+
+    Returns:
+        str: The language name, or "undefined" if the code is unknown.
+    """
+    if not lang_code:
+        return "undefined"
+
+    import pycountry
+
+    lang_code = _language_code_converter.get(lang_code, lang_code)
+    lang = pycountry.languages.get(alpha_3=lang_code)
+    if lang is None:
+        lang = pycountry.languages.get(alpha_2=lang_code)
+    return lang.name if lang else "undefined"
+
+
+def iter_subtitle_tracks(files, workers=None, cache=None):
+    """
+    Lists the subtitle tracks of several MKV files across a thread pool.
+
+    Args:
+        files (list): A list of MKV filepaths.
+        workers (int): The number of threads (optional).
+        cache (DiskCache): A cache of previously listed tracks (optional).
+
+    Yields:
+        tuple: The filepath, its subtitle tracks with their codec IDs and
+            None, or the filepath, None and the exception raised, in order
+            of completion.
+    """
+    files = list(files)
+    if not files:
+        return
+    if workers is None:
+        workers = get_worker_count()
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        futures = {
+            pool.submit(list_subtitle_tracks, file, True, cache): file
+            for file in files
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
 def get_binary_path(tool_name):
     """
     Returns the absolute path to an executable binary.
@@ -452,13 +2981,15 @@ def get_binary_path(tool_name):
         raise RuntimeError(f"Unsupported operating system: {system}.")
 
 
-def optionally_save_text(text, default_path):
+def ask_to_save_text(default_path):
     """
-    Asks user whether to save text as a file.
+    Asks user whether to save extracted text as a file.
 
     Args:
-        text (str): Text extracted from a file
-        default_path (Path): Suggested output path (without suffix or with .txt)
+        default_path (Path): Suggested output path (without suffix or .txt)
+
+    Returns:
+        Path: The path to save the text to, or None.
     """
     choice = input(
         "\nWould you like to save a copy of the extracted text? "
@@ -466,10 +2997,25 @@ def optionally_save_text(text, default_path):
     ).strip().lower()
 
     if choice != "y":
-        return
+        return None
 
     if default_path.suffix == "":
         default_path = default_path.with_suffix(".txt")
+    return default_path
+
+
+def optionally_save_text(text, default_path):
+    """
+    Asks user whether to save text as a file.
+
+    Args:
+        text (str): Text extracted from a file
+        default_path (Path): Suggested output path (without suffix or with .txt)
+    """
+    default_path = ask_to_save_text(default_path)
+
+    if default_path is None:
+        return
 
     try:
         with default_path.open("w", encoding="utf-8") as f:
@@ -477,3 +3023,51 @@ def optionally_save_text(text, default_path):
         print(f"\nText saved to: {default_path}")
     except Exception as e:
         print(f"\nFailed to save text: {e}")
+
+
+def save_chunks(chunks, path):
+    """
+    Yields chunks of text while writing them to a file.
+
+    The text is written to a temporary file that replaces the destination
+    once all chunks are consumed, so the source file may be overwritten.
+
+    Args:
+        chunks (iterable): Chunks of text extracted from a file.
+        path (Path): The destination filepath.
+
+    Yields:
+        str: The same chunks of text.
+    """
+    temp_path = path.with_name(path.name + ".part")
+    try:
+        f = temp_path.open("w", encoding="utf-8")
+    except Exception as e:
+        print(f"\nFailed to save text: {e}")
+        yield from chunks
+        return
+
+    saved = True
+    try:
+        for chunk in chunks:
+            if saved:
+                try:
+                    f.write(chunk)
+                except OSError as e:
+                    print(f"\nFailed to save text: {e}")
+                    saved = False
+            yield chunk
+    except BaseException:
+        f.close()
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    try:
+        f.close()
+        if saved:
+            temp_path.replace(path)
+            print(f"\nText saved to: {path}")
+    except OSError as e:
+        print(f"\nFailed to save text: {e}")
+    finally:
+        temp_path.unlink(missing_ok=True)
@@ -1,14 +1,20 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from src.anki_utils import (
-    get_anki_decks, get_words_from_deck, get_anki_connect_url
+    get_anki_decks, get_words_from_deck, get_anki_connect_url,
+    sync_words_from_deck, get_sync_state_path, get_words_from_decks,
+    sync_words_from_decks, get_collection_decks, get_words_from_collection,
+    get_anki_collection_path, invoke, invoke_multi, AnkiConnectError
     )
 import os
+import json
+import sqlite3
+from pathlib import Path
 
 
 @pytest.fixture
 def mock_anki_post():
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         first_mock_response = MagicMock()
         first_mock_response.json.return_value = {
             "result": [1483959289817, 1483959291695],
@@ -33,7 +39,48 @@ def mock_anki_post():
         yield mock_post
 
 
-@patch("requests.post")
+def make_note(note_id, front, back, mod=1):
+    """Builds a note in the format returned by notesInfo."""
+    return {
+        "noteId": note_id,
+        "mod": mod,
+        "fields": {
+            "Front": {"value": front, "order": 0},
+            "Back": {"value": back, "order": 1}
+            }
+        }
+
+
+@pytest.fixture
+def fake_anki():
+    """Patches Session.post with a minimal AnkiConnect server."""
+    deck = {"notes": {}, "edited": set(), "requests": []}
+
+    def handle(action, params):
+        deck["requests"].append((action, params))
+        if action == "multi":
+            return [
+                {"result": handle(a["action"], a["params"]), "error": None}
+                for a in params["actions"]
+                ]
+        if action == "findNotes":
+            if "edited:" in params["query"]:
+                return sorted(deck["edited"])
+            return sorted(deck["notes"])
+        if action == "notesInfo":
+            return [deck["notes"].get(i, {}) for i in params["notes"]]
+
+    def respond(url, json, **kwargs):
+        result = handle(json["action"], json.get("params", {}))
+        response = MagicMock()
+        response.json.return_value = {"result": result, "error": None}
+        return response
+
+    with patch("requests.Session.post", side_effect=respond):
+        yield deck
+
+
+@patch("requests.Session.post")
 class TestGetAnkiDecks:
     """Tests for fetching deck names from Anki."""
 
@@ -67,6 +114,32 @@ class TestGetAnkiDecks:
         assert not output
 
 
+@patch("requests.Session.post")
+class TestInvoke:
+    """Tests for sending actions to AnkiConnect."""
+
+    def test_raises_on_error_response(self, mock_post):
+        """Should raise when AnkiConnect returns an error."""
+        mock_post.return_value.json.return_value = {
+            'result': None,
+            'error': 'collection is not available'
+        }
+        with pytest.raises(AnkiConnectError, match="not available"):
+            invoke("findNotes", query='deck:"Missing"')
+
+    def test_raises_on_failed_multi_action(self, mock_post):
+        """Should raise when one action of a multi request fails."""
+        mock_post.return_value.json.return_value = {
+            'result': [
+                {'result': [1], 'error': None},
+                {'result': None, 'error': 'invalid query'}
+            ],
+            'error': None
+        }
+        with pytest.raises(AnkiConnectError, match="findNotes"):
+            invoke_multi([("findNotes", {}), ("findNotes", {})])
+
+
 class TestGetWordsFromDeck:
     """Tests for extracting words from an Anki deck."""
 
@@ -87,7 +160,7 @@ class TestGetWordsFromDeck:
 
     def test_capitalisation_ignored_in_output(self):
         """Should ignore capitalisation producing the output set."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -114,7 +187,7 @@ class TestGetWordsFromDeck:
 
     def test_punctuation_ignored_in_output(self):
         """Should ignore punctuation when producing output set."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -144,7 +217,7 @@ class TestGetWordsFromDeck:
 
     def test_Spanish_punctuation_ignored_in_output(self):
         """Should ignore rare or Spanish-specific punctuation in output set."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -171,7 +244,7 @@ class TestGetWordsFromDeck:
 
     def test_maintains_hyphenation_in_compound_words(self):
         """Should ensure that hyphenated words are unchanged."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -198,7 +271,7 @@ class TestGetWordsFromDeck:
 
     def test_compiles_set_from_multiple_cards(self):
         """Ensures words from multiple Anki cards are compiled into one set."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -238,7 +311,7 @@ class TestGetWordsFromDeck:
 
     def test_multiple_punctuation_characters_ignored_in_output(self):
         """Ensures all punctuation characters are omitted from output set."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -268,7 +341,7 @@ class TestGetWordsFromDeck:
 
     def test_strips_out_html_tags(self):
         """Ensures that all HTML tags are stripped from extracted words."""
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             first_response = MagicMock()
             first_response.json.return_value = {
                 "result": [1483959289817, 1483959291695],
@@ -297,6 +370,195 @@ class TestGetWordsFromDeck:
             assert output == {'hello', 'goodbye', 'yes', 'no'}
 
 
+class TestSyncWordsFromDeck:
+    """Tests for the incrementally synced Anki deck cache."""
+
+    def test_first_sync_downloads_all_notes(self, fake_anki, tmp_path):
+        """Should fetch every note and save the words on the first sync."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        fake_anki["notes"][2] = make_note(2, "Adiós", "goodbye")
+        output = sync_words_from_deck("deck", tmp_path)
+        assert output == {"hola", "hello", "adiós", "goodbye"}
+        assert get_sync_state_path("deck", tmp_path).exists()
+
+    def test_later_sync_only_fetches_changed_notes(self, fake_anki, tmp_path):
+        """Should only request notes that were added or edited."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        fake_anki["notes"][2] = make_note(2, "Adiós", "goodbye")
+        sync_words_from_deck("deck", tmp_path)
+        fake_anki["requests"].clear()
+        fake_anki["notes"][2] = make_note(2, "Gato", "cat", mod=2)
+        fake_anki["notes"][3] = make_note(3, "Perro", "dog")
+        fake_anki["edited"] = {2, 3}
+        output = sync_words_from_deck("deck", tmp_path)
+        assert output == {"hola", "hello", "gato", "cat", "perro", "dog"}
+        fetched = [
+            sorted(params["notes"])
+            for action, params in fake_anki["requests"]
+            if action == "notesInfo"
+            ]
+        assert fetched == [[2, 3]]
+
+    def test_skips_notes_info_if_nothing_changed(self, fake_anki, tmp_path):
+        """Should not call notesInfo when no notes were added or edited."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        sync_words_from_deck("deck", tmp_path)
+        fake_anki["requests"].clear()
+        assert sync_words_from_deck("deck", tmp_path) == {"hola", "hello"}
+        actions = [action for action, _ in fake_anki["requests"]]
+        assert "notesInfo" not in actions
+
+    def test_removes_deleted_notes(self, fake_anki, tmp_path):
+        """Should drop the words of notes removed from the deck."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        fake_anki["notes"][2] = make_note(2, "Adiós", "goodbye")
+        sync_words_from_deck("deck", tmp_path)
+        del fake_anki["notes"][2]
+        assert sync_words_from_deck("deck", tmp_path) == {"hola", "hello"}
+        path = get_sync_state_path("deck", tmp_path)
+        state = json.loads(path.read_text(encoding="utf-8"))
+        assert list(state["notes"]) == ["1"]
+
+    def test_ignores_corrupt_state_file(self, fake_anki, tmp_path):
+        """Should fall back to a full sync if the state file is invalid."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        path = get_sync_state_path("deck", tmp_path)
+        path.write_text("not json")
+        assert sync_words_from_deck("deck", tmp_path) == {"hola", "hello"}
+
+    def test_decks_stored_separately(self, fake_anki, tmp_path):
+        """Should use a different state file for each deck."""
+        assert get_sync_state_path("a", tmp_path) != \
+            get_sync_state_path("b", tmp_path)
+
+
+class TestGetWordsFromDecks:
+    """Tests for fetching words from several decks at once."""
+
+    def test_requests_notes_in_chunks(self, fake_anki):
+        """Should split notesInfo requests into chunks of chunk_size."""
+        for i in range(5):
+            fake_anki["notes"][i] = make_note(i, f"word{i}", "")
+        output = get_words_from_deck("deck", chunk_size=2)
+        assert output == {f"word{i}" for i in range(5)}
+        sizes = [
+            len(params["notes"]) for action, params in fake_anki["requests"]
+            if action == "notesInfo"
+            ]
+        assert sizes == [2, 2, 1]
+
+    def test_batches_deck_queries_into_one_request(self, fake_anki):
+        """Should find the notes of every deck with one multi request."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        output = get_words_from_decks(["a", "b", "c"])
+        assert output == {name: {"hola", "hello"} for name in "abc"}
+        actions = [action for action, _ in fake_anki["requests"]]
+        assert actions.count("multi") == 1
+        assert actions.count("notesInfo") == 1
+
+    def test_sync_batches_deck_queries(self, fake_anki, tmp_path):
+        """Should sync several decks with one multi request."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        output = sync_words_from_decks(["a", "b"], tmp_path)
+        assert output == {"a": {"hola", "hello"}, "b": {"hola", "hello"}}
+        actions = [action for action, _ in fake_anki["requests"]]
+        assert actions == ["multi", "findNotes", "findNotes", "notesInfo"]
+
+    def test_missing_notes_not_saved(self, fake_anki, tmp_path):
+        """Should not save the sync state if a note could not be fetched."""
+        fake_anki["notes"][1] = make_note(1, "Hola", "hello")
+        fake_anki["notes"][2] = {}
+        assert sync_words_from_deck("deck", tmp_path) == {"hola", "hello"}
+        assert not get_sync_state_path("deck", tmp_path).exists()
+
+
+@pytest.fixture
+def anki_collection(tmp_path):
+    """Creates a small Anki collection database with nested decks."""
+    path = tmp_path / "collection.anki2"
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE decks (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE notes (id INTEGER PRIMARY KEY, flds TEXT);
+        CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, nid INTEGER, did INTEGER, odid INTEGER
+            );
+        INSERT INTO decks VALUES
+            (1, 'Default'), (2, 'Spanish'), (3, 'Spanish\x1fVerbs'),
+            (4, 'French'), (5, 'Filtered');
+        INSERT INTO notes VALUES
+            (10, 'Hola<br>\x1fhello\x1fextra field'),
+            (11, 'Correr\x1fto run'),
+            (12, 'Bonjour\x1fhello'),
+            (13, '¿Qué?\x1fwhat');
+        INSERT INTO cards VALUES
+            (100, 10, 2, 0), (101, 10, 2, 0), (102, 11, 3, 0),
+            (103, 12, 4, 0), (104, 13, 5, 2);
+        """)
+    connection.commit()
+    connection.close()
+    return path
+
+
+class TestGetWordsFromCollection:
+    """Tests for reading decks directly from an Anki collection file."""
+
+    def test_lists_deck_names(self, anki_collection):
+        """Should list every deck except Default, with subdeck names."""
+        output = get_collection_decks(anki_collection)
+        assert output == ["Filtered", "French", "Spanish", "Spanish::Verbs"]
+
+    def test_reads_words_from_decks(self, anki_collection):
+        """Should include subdecks and cards moved to filtered decks."""
+        output = get_words_from_collection(
+            anki_collection, ["spanish", "French", "Spanish::Verbs"]
+            )
+        assert output["spanish"] == {
+            "hola", "hello", "correr", "to", "run", "qué", "what"
+            }
+        assert output["French"] == {"bonjour", "hello"}
+        assert output["Spanish::Verbs"] == {"correr", "to", "run"}
+
+    def test_unknown_deck_returns_empty_set(self, anki_collection):
+        """Should return an empty set for decks that do not exist."""
+        output = get_words_from_collection(anki_collection, ["Missing"])
+        assert output == {"Missing": set()}
+
+    def test_reads_legacy_deck_json(self, tmp_path):
+        """Should read deck names from the col table in old collections."""
+        path = tmp_path / "collection.anki2"
+        connection = sqlite3.connect(path)
+        connection.executescript("""
+            CREATE TABLE col (decks TEXT);
+            CREATE TABLE notes (id INTEGER PRIMARY KEY, flds TEXT);
+            CREATE TABLE cards (
+                id INTEGER PRIMARY KEY, nid INTEGER, did INTEGER,
+                odid INTEGER
+                );
+            INSERT INTO notes VALUES (10, 'Gato\x1fcat');
+            INSERT INTO cards VALUES (100, 10, 7, 0);
+            """)
+        connection.execute("INSERT INTO col VALUES (?)", (json.dumps({
+            "1": {"name": "Default"}, "7": {"name": "Animals"}
+            }),))
+        connection.commit()
+        connection.close()
+        assert get_collection_decks(path) == ["Animals"]
+        assert get_words_from_collection(path, ["Animals"]) == {
+            "Animals": {"gato", "cat"}
+            }
+
+    def test_missing_collection_raises_error(self, tmp_path):
+        """Should raise FileNotFoundError if the collection is missing."""
+        with pytest.raises(FileNotFoundError):
+            get_collection_decks(tmp_path / "missing.anki2")
+
+    @patch.dict(os.environ, {"ANKI_COLLECTION_PATH": "/a/collection.anki2"})
+    def test_collection_path_read_from_environment(self):
+        """Should read the collection path from ANKI_COLLECTION_PATH."""
+        assert get_anki_collection_path() == Path("/a/collection.anki2")
+
+
 class TestGetAnkiConnectURL:
     """Tests for retrieving the AnkiConnect URL."""
 
@@ -0,0 +1,310 @@
+import pytest
+from unittest.mock import patch
+from src.jobs import (
+    parse_urls, iter_source_word_counts, remove_known_words,
+    load_manifest, run_job, run_manifest
+    )
+from src.utils import KnownWordsIndex
+import json
+import csv
+
+
+@pytest.fixture
+def text_dir(tmp_path):
+    """Creates a folder of text files and an unsupported file."""
+    folder = tmp_path / "texts"
+    folder.mkdir()
+    (folder / "one.txt").write_text("the cat sat", encoding="utf-8")
+    (folder / "two.md").write_text("the dog sat", encoding="utf-8")
+    (folder / "image.png").write_bytes(b"\x89PNG")
+    return folder
+
+
+def write_manifest(path, manifest):
+    """Writes a manifest as JSON and returns its path."""
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return path
+
+
+def read_csv(path):
+    """Reads a word list CSV file into a dictionary."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return {word: int(count) for word, count in csv.reader(f)}
+
+
+class TestParseUrls:
+    """Tests for the parse_urls function."""
+
+    def test_splits_urls(self):
+        """Checks that URLs separated by spaces are returned."""
+        assert parse_urls("https://a.com/x http://b.com") == [
+            "https://a.com/x", "http://b.com"
+            ]
+
+    def test_rejects_paths(self):
+        """Checks that an input containing a filepath is not a URL."""
+        assert parse_urls("https://a.com notes.txt") == []
+        assert parse_urls("/home/user/notes.txt") == []
+
+
+class TestIterSourceWordCounts:
+    """Tests for the iter_source_word_counts function."""
+
+    def test_counts_directory_files(self, text_dir):
+        """Checks that each supported file in a directory is counted."""
+        results = {
+            file.name: (counts, error)
+            for file, counts, error in iter_source_word_counts(
+                text_dir, workers=1
+                )
+        }
+        assert results == {
+            "one.txt": ({"the": 1, "cat": 1, "sat": 1}, None),
+            "two.md": ({"the": 1, "dog": 1, "sat": 1}, None),
+        }
+
+    def test_counts_single_file(self, text_dir):
+        """Checks that a single file is counted."""
+        [(file, counts, error)] = iter_source_word_counts(
+            str(text_dir / "one.txt")
+            )
+        assert (counts, error) == ({"the": 1, "cat": 1, "sat": 1}, None)
+
+    def test_reports_missing_file(self, tmp_path):
+        """Checks that a missing file yields an error."""
+        [(file, counts, error)] = iter_source_word_counts(
+            str(tmp_path / "missing.txt")
+            )
+        assert counts is None
+        assert isinstance(error, FileNotFoundError)
+
+    def test_reports_empty_directory(self, tmp_path):
+        """Checks that a directory without supported files is reported."""
+        [(file, counts, error)] = iter_source_word_counts(str(tmp_path))
+        assert counts is None
+        assert isinstance(error, FileNotFoundError)
+
+    @patch("src.jobs.utils.extract_text_from_url")
+    def test_counts_single_url(self, mock_extract):
+        """Checks that the text of a single URL is counted."""
+        mock_extract.return_value = "hola hola mundo"
+        [(url, counts, error)] = iter_source_word_counts(
+            "https://example.com/page"
+            )
+        assert (counts, error) == ({"hola": 2, "mundo": 1}, None)
+
+    @patch("src.jobs.utils.iter_url_texts")
+    def test_counts_several_urls(self, mock_iter):
+        """Checks that several URLs are downloaded together."""
+        error = ValueError("Not found")
+        mock_iter.return_value = iter([
+            ("https://a.com", "hola", None),
+            ("https://b.com", None, error),
+        ])
+        results = list(
+            iter_source_word_counts("https://a.com https://b.com")
+            )
+        assert results == [
+            ("https://a.com", {"hola": 1}, None),
+            ("https://b.com", None, error),
+        ]
+        assert mock_iter.call_args.args == (
+            ["https://a.com", "https://b.com"], 0
+            )
+
+
+class TestRemoveKnownWords:
+    """Tests for the remove_known_words function."""
+
+    def test_reports_words_removed_by_source(self, tmp_path):
+        """Checks that removed words are counted per source."""
+        counts = {"the": 3, "cat": 1, "sat": 2}
+        words, removed = remove_known_words(counts, [
+            ("deck", {"the"}), ("list", {"the", "cat"})
+            ])
+        assert words == {"sat": 2}
+        assert removed == {"deck": 1, "list": 1}
+
+    def test_closes_indexes(self, tmp_path):
+        """Checks that known-words indexes are closed afterwards."""
+        index = KnownWordsIndex.build(["cat"], tmp_path / "known.idx")
+        with patch.object(index, "close") as mock_close:
+            remove_known_words({"cat": 1}, [("index", index)])
+        mock_close.assert_called_once()
+        index.close()
+
+
+class TestLoadManifest:
+    """Tests for the load_manifest function."""
+
+    def test_loads_json_manifest(self, tmp_path):
+        """Checks that defaults apply and relative paths are resolved."""
+        path = write_manifest(tmp_path / "jobs.json", {
+            "parallel_jobs": 2,
+            "defaults": {"known_words": ["known.txt"]},
+            "jobs": [
+                {"inputs": ["texts", "https://a.com"], "output": "a.csv"},
+                {"name": "b", "inputs": ["/abs/b.txt"], "output": "b.csv",
+                 "known_words": []},
+            ],
+        })
+        manifest = load_manifest(path)
+        first, second = manifest["jobs"]
+        assert manifest["parallel_jobs"] == 2
+        assert first["name"] == "a"
+        assert first["inputs"] == [str(tmp_path / "texts"), "https://a.com"]
+        assert first["known_words"] == [str(tmp_path / "known.txt")]
+        assert first["output"] == tmp_path / "a.csv"
+        assert second["inputs"] == ["/abs/b.txt"]
+        assert second["known_words"] == []
+
+    def test_loads_toml_manifest(self, tmp_path):
+        """Checks that TOML manifests are read."""
+        pytest.importorskip("tomllib")
+        path = tmp_path / "jobs.toml"
+        path.write_text(
+            'parallel_jobs = 3\n\n[[jobs]]\ninputs = ["a.txt"]\n'
+            'output = "a.csv"\nsubtitle_tracks = [2, 3]\n',
+            encoding="utf-8"
+            )
+        manifest = load_manifest(path)
+        assert manifest["parallel_jobs"] == 3
+        assert manifest["jobs"][0]["subtitle_tracks"] == [2, 3]
+
+    @pytest.mark.parametrize("manifest, message", [
+        ({}, "list of jobs"),
+        ({"jobs": [{"output": "a.csv"}]}, "missing inputs"),
+        ({"jobs": [{"inputs": ["a"], "output": "a.csv", "tracks": [1]}]},
+         "unknown settings: tracks"),
+        ({"jobs": [{"inputs": "a", "output": "a.csv"}]}, "must be a list"),
+        ({"jobs": [{"inputs": ["a"], "output": "a.csv",
+                    "crawl_depth": -1}]}, "non-negative"),
+        ({"parallel_jobs": 0, "jobs": []}, "parallel_jobs"),
+        ({"jobs": [{"inputs": ["a"], "output": "a.csv"},
+                   {"inputs": ["b"], "output": "a.csv"}]}, "same output"),
+        ({"jobs": [{"inputs": ["a"], "output": "a.csv",
+                    "format": "xml"}]}, "format must be one of"),
+        ({"jobs": [{"inputs": ["a"], "output": "a.csv",
+                    "order": "random"}]}, "order must be one of"),
+    ])
+    def test_rejects_invalid_manifests(self, tmp_path, manifest, message):
+        """Checks that invalid manifests raise a descriptive ValueError."""
+        path = write_manifest(tmp_path / "jobs.json", manifest)
+        with pytest.raises(ValueError, match=message):
+            load_manifest(path)
+
+    def test_rejects_invalid_json(self, tmp_path):
+        """Checks that malformed JSON raises a ValueError."""
+        path = tmp_path / "jobs.json"
+        path.write_text("{", encoding="utf-8")
+        with pytest.raises(ValueError, match="Invalid JSON"):
+            load_manifest(path)
+
+
+class TestRunJob:
+    """Tests for the run_job function."""
+
+    def test_writes_filtered_word_list(self, tmp_path, text_dir):
+        """Checks that known words are removed before the list is written."""
+        (tmp_path / "known.txt").write_text("the\n", encoding="utf-8")
+        path = write_manifest(tmp_path / "jobs.json", {"jobs": [{
+            "inputs": ["texts"], "known_words": ["known.txt"],
+            "output": "out/words.csv", "workers": 1,
+        }]})
+        [job] = load_manifest(path)["jobs"]
+        with patch("src.utils.get_cache_dir", return_value=tmp_path):
+            summary = run_job(job)
+
+        assert summary["status"] == "ok"
+        assert summary["inputs_processed"] == 2
+        assert summary["words"] == 3
+        assert summary["removed"] == {str(tmp_path / "known.txt"): 1}
+        assert read_csv(tmp_path / "out" / "words.csv") == {
+            "cat": 1, "dog": 1, "sat": 2
+            }
+
+    @patch("src.jobs.anki_utils.get_words_from_decks")
+    def test_filters_anki_decks(self, mock_decks, tmp_path, text_dir):
+        """Checks that the words of the job's Anki decks are removed."""
+        mock_decks.return_value = {"Deck": {"cat", "dog"}}
+        job = {
+            "name": "job", "inputs": [str(text_dir / "one.txt")],
+            "anki_decks": ["Deck"], "output": tmp_path / "words.csv",
+        }
+        summary = run_job(job)
+        mock_decks.assert_called_once_with(["Deck"])
+        assert summary["removed"] == {"Deck": 1}
+        assert read_csv(tmp_path / "words.csv") == {"the": 1, "sat": 1}
+
+    def test_writes_top_words_as_jsonl(self, tmp_path, text_dir):
+        """Checks that the job's output settings are applied."""
+        job = {
+            "name": "job", "inputs": [str(text_dir)],
+            "output": tmp_path / "words.jsonl", "order": "frequency",
+            "top": 2, "workers": 1,
+        }
+        summary = run_job(job)
+        lines = (tmp_path / "words.jsonl").read_text(encoding="utf-8")
+        assert summary["words"] == 2
+        assert [json.loads(line) for line in lines.splitlines()] == [
+            {"word": "sat", "count": 2}, {"word": "the", "count": 2}
+            ]
+
+    def test_reports_partial_jobs(self, tmp_path, text_dir):
+        """Checks that a job with a failed input still writes its list."""
+        job = {
+            "name": "job", "output": tmp_path / "words.csv",
+            "inputs": [str(text_dir / "one.txt"), str(tmp_path / "x.txt")],
+        }
+        summary = run_job(job)
+        assert summary["status"] == "partial"
+        assert summary["errors"][0]["input"] == str(tmp_path / "x.txt")
+        assert (tmp_path / "words.csv").exists()
+
+    def test_fails_without_inputs_processed(self, tmp_path):
+        """Checks that no file is written when every input fails."""
+        job = {
+            "name": "job", "output": tmp_path / "words.csv",
+            "inputs": [str(tmp_path / "x.txt")],
+        }
+        summary = run_job(job)
+        assert summary["status"] == "failed"
+        assert not (tmp_path / "words.csv").exists()
+
+    def test_fails_when_known_words_missing(self, tmp_path, text_dir):
+        """Checks that a missing filter source fails the job."""
+        job = {
+            "name": "job", "output": tmp_path / "words.csv",
+            "inputs": [str(text_dir / "one.txt")],
+            "known_words": [str(tmp_path / "missing.txt")],
+        }
+        summary = run_job(job)
+        assert summary["status"] == "failed"
+        assert not (tmp_path / "words.csv").exists()
+
+
+class TestRunManifest:
+    """Tests for the run_manifest function."""
+
+    def test_runs_jobs_in_parallel(self, tmp_path, text_dir):
+        """Checks that every job runs and summaries keep manifest order."""
+        path = write_manifest(tmp_path / "jobs.json", {
+            "parallel_jobs": 3,
+            "jobs": [
+                {"name": name, "inputs": [f"texts/{name}"],
+                 "output": f"{name}.csv"}
+                for name in ("one.txt", "two.md", "missing.txt")
+            ],
+        })
+        summary = run_manifest(load_manifest(path), workers=1)
+
+        assert [job["name"] for job in summary["jobs"]] == [
+            "one.txt", "two.md", "missing.txt"
+            ]
+        assert (summary["ok"], summary["partial"], summary["failed"]) == (
+            2, 0, 1
+            )
+        assert read_csv(tmp_path / "two.md.csv") == {
+            "the": 1, "dog": 1, "sat": 1
+            }
+        json.dumps(summary)
@@ -9,7 +9,44 @@ from src.utils import (extract_text_from_file,
                        extract_text_from_mkv,
                        list_subtitle_tracks,
                        get_binary_path,
-                       extract_ssa_text)
+                       extract_ssa_text,
+                       WordTokenizer,
+                       iter_text_from_file,
+                       WordCounter,
+                       count_words_in_file,
+                       iter_file_word_counts,
+                       get_worker_count,
+                       count_words,
+                       ask_to_save_text,
+                       save_chunks,
+                       iter_pdf_pages,
+                       extract_pdf_text,
+                       iter_epub_chapters,
+                       DiskCache,
+                       get_disk_cache,
+                       HTTPSession,
+                       get_http_session,
+                       iter_url_texts,
+                       iter_sitemap_urls,
+                       is_sitemap_url,
+                       HostThrottle,
+                       KnownWordsIndex,
+                       load_known_words,
+                       filter_known_words,
+                       clean_bytes,
+                       clean_text,
+                       iter_srt_cues,
+                       SubtitleCue,
+                       iter_ssa_text,
+                       extract_mkv_tracks,
+                       iter_mkv_word_counts,
+                       get_language_name,
+                       iter_subtitle_tracks,
+                       iter_word_list_rows,
+                       write_word_list,
+                       translate_words,
+                       get_supported_languages,
+                       resolve_language)
 import pytest
 import csv
 import docx
@@ -18,10 +55,31 @@ from unittest.mock import patch, Mock
 import requests
 from ebooklib import epub
 from pathlib import Path
+from collections import Counter
 import subprocess
 import json
 import textwrap
 import sys
+import os
+import pickle
+import hashlib
+import gzip
+import zipfile
+import threading
+import time
+import unicodedata
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keeps the default cache directory out of the user's home folder."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("WORD_LIST_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("WORD_LIST_NO_CACHE", raising=False)
+    monkeypatch.setattr("src.utils._supported_languages", {})
+    return cache_dir
 
 
 @pytest.fixture
@@ -235,10 +293,10 @@ class TestExtractTextFromFile:
 
     def test_ssa_extractor_correctly_called(self, example_ssa):
         """Checks that correct function is called for .ssa files."""
-        with patch("src.utils.extract_ssa_text") as mock_ssa:
-            mock_ssa.return_value = "dummy text"
+        with patch("src.utils.iter_ssa_text") as mock_ssa:
+            mock_ssa.return_value = iter(["dummy text"])
             result = extract_text_from_file(example_ssa)
-            mock_ssa.assert_called_once_with(example_ssa)
+            mock_ssa.assert_called_once()
             assert result == "dummy text"
 
     def test_handles_ssa_files(self, example_ssa):
@@ -260,6 +318,276 @@ class TestExtractTextFromFile:
         assert output == "Kamo misliš da ideš? - Razmišljao sam. - Da?"
 
 
+class TestIterTextFromFile:
+    """Tests for the iter_text_from_file() function in utils.py"""
+
+    def test_returns_generator_of_chunks(self, example_srt):
+        """Should yield the cleaned text as one or more chunks."""
+        example_srt.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello!")
+        output = iter_text_from_file(example_srt)
+        assert not isinstance(output, str)
+        assert list(output) == ["Hello!"]
+
+    def test_splits_large_files_into_chunks(self, example_srt):
+        """Should yield several chunks when the text exceeds chunk_size."""
+        cues = "".join(
+            f"{i}\n00:00:{i % 60:02},000 --> 00:00:{i % 60:02},500\n"
+            f"<i>Line number {i}</i>\n\n"
+            for i in range(1, 200)
+        )
+        example_srt.write_text(cues)
+        chunks = list(iter_text_from_file(example_srt, chunk_size=500))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1000 for chunk in chunks)
+        assert "".join(chunks) == extract_text_from_file(example_srt)
+        assert "".join(chunks).count("Line number") == 199
+
+    def test_chunks_match_whole_text_cleaning(self, example_srt):
+        """Joined chunks should not depend on the chunk size."""
+        text = "\n".join(
+            f"{i}\nword—word 3.example.com caf\u0065\u0301 {i}"
+            for i in range(300)
+        )
+        example_srt.write_text(text)
+        expected = extract_text_from_file(example_srt)
+        for chunk_size in (1, 50, 4096):
+            chunks = iter_text_from_file(example_srt, chunk_size=chunk_size)
+            assert "".join(chunks) == expected
+
+    @pytest.mark.parametrize("line", [
+        "    indented line of text\n",
+        "— ¿Dónde estás? — dijo ella.\n",
+        "- [ ] 1. «item»\n",
+    ])
+    def test_bounds_chunk_size(self, tmp_path, line):
+        """Should split lines that do not start with a letter."""
+        path = tmp_path / "example.txt"
+        path.write_text(line * 2000, encoding="utf-8")
+        chunks = list(iter_text_from_file(path, chunk_size=1000))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1000 + len(line) for chunk in chunks)
+        assert "".join(chunks) == extract_text_from_file(path)
+
+    def test_splits_at_size_limit(self, tmp_path):
+        """Should split text without a safe boundary at the size limit."""
+        path = tmp_path / "example.txt"
+        path.write_text("12\n\n" * 2000, encoding="utf-8")
+        chunks = list(iter_text_from_file(path, chunk_size=100))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1700 for chunk in chunks)
+
+    def test_streams_ssa_dialogue(self, example_ssa):
+        """Should split SSA dialogue into chunks separated by spaces."""
+        with example_ssa.open("a") as f:
+            for i in range(50):
+                f.write(
+                    f"\nDialogue: 0,0:00:25.77,0:00:27.23,Default,,0,0,0,,"
+                    f"{{\\i1}}Replika {i}{{\\i0}}"
+                )
+        chunks = list(iter_text_from_file(example_ssa, chunk_size=100))
+        assert len(chunks) > 1
+        assert "".join(chunks) == " ".join(
+            f"Replika {i}" for i in range(50)
+        )
+
+    def test_raises_error_before_iteration(self, tmp_path):
+        """Should validate the filepath when called, not when iterated."""
+        with pytest.raises(FileNotFoundError):
+            iter_text_from_file(tmp_path / "missing.srt")
+
+
+class TestIterSrtCues:
+    """Tests for the iter_srt_cues() function in utils.py"""
+
+    def test_yields_text_of_each_cue(self):
+        """Should yield the lines of each cue without tags or timestamps."""
+        lines = [
+            "1\n", "00:00:01,000 --> 00:00:02,000\n",
+            "<i>Hello</i>\n", "there\n", "\n",
+            "2\n", "00:00:03,000 --> 00:00:04,000\n", "Bye\n",
+        ]
+        assert list(iter_srt_cues(lines)) == ["Hello\nthere", "Bye"]
+
+    def test_yields_index_and_times(self):
+        """Should yield SubtitleCue tuples with times in milliseconds."""
+        lines = [
+            "7\n", "01:02:03,045 --> 01:02:04,500\n", "Hello\n",
+        ]
+        output = list(iter_srt_cues(lines, timing=True))
+        assert output == [SubtitleCue(7, 3723045, 3724500, "Hello")]
+
+    def test_handles_timestamp_variants(self):
+        """Should accept dot milliseconds, inline or missing cue numbers,
+        and cues that are not separated by blank lines."""
+        lines = [
+            "00:00:01.5 --> 00:00:02.250 X1:10 X2:20\n", "One\n",
+            "3 00:00:03,000 --> 00:00:04,000\n", "Two\n",
+            "4\n", "00:00:05,000-->00:00:06,000\n", "Three\n",
+        ]
+        assert list(iter_srt_cues(lines, timing=True)) == [
+            SubtitleCue(None, 1500, 2250, "One"),
+            SubtitleCue(3, 3000, 4000, "Two"),
+            SubtitleCue(4, 5000, 6000, "Three"),
+        ]
+
+    def test_keeps_numbers_that_are_not_cue_numbers(self):
+        """Should keep numeric lines of dialogue, and drop a cue number
+        left at the end of the file."""
+        lines = [
+            "1\n", "00:00:01,000 --> 00:00:02,000\n", "Count:\n", "42\n",
+            "\n", "2\n", "00:00:03,000 --> 00:00:04,000\n", "7\n",
+            "\n", "3",
+        ]
+        assert list(iter_srt_cues(lines)) == ["Count:\n42", "7"]
+
+    def test_keeps_text_outside_cues(self):
+        """Should yield paragraphs of text that are not part of any cue."""
+        lines = ["Plain text\n", "10 lines\n", "\n", "\n", "More\n"]
+        output = list(iter_srt_cues(lines, timing=True))
+        assert output == [
+            SubtitleCue(None, None, None, "Plain text\n10 lines"),
+            SubtitleCue(None, None, None, "More"),
+        ]
+
+    def test_parses_lines_lazily(self):
+        """Should yield each cue before reading the lines that follow it."""
+        def lines():
+            yield from ["1\n", "00:00:01,000 --> 00:00:02,000\n"]
+            yield from ["Hello\n", "\n"]
+            raise AssertionError("read too far")
+
+        assert next(iter_srt_cues(lines())) == "Hello"
+
+    def test_used_for_srt_files(self, example_srt):
+        """Should be used to extract the text of SRT files."""
+        example_srt.write_text(
+            "1\n00:00:01.000 --> 00:00:02.000\nHola <b>amigo</b>\n\n"
+            "2\n00:00:03.000 --> 00:00:04.000\nAdiós\n\n3"
+        )
+        assert extract_text_from_file(example_srt) == "Hola amigo\n\nAdiós"
+
+
+@pytest.fixture
+def example_pdf(tmp_path):
+    """Creates a 20-page PDF file with the page number on each page."""
+    pdf_path = tmp_path / "pages.pdf"
+    file = Canvas(str(pdf_path))
+    for page in range(20):
+        file.drawString(72, 72, f"page {page}")
+        file.showPage()
+    file.save()
+    return pdf_path
+
+
+class TestIterPdfPages:
+    """Tests for the iter_pdf_pages() and extract_pdf_text() functions."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_yields_pages_in_order(self, example_pdf, workers):
+        """Should yield the text of every page in page order."""
+        pages = list(iter_pdf_pages(example_pdf, workers=workers))
+        assert [page.strip() for page in pages] == [
+            f"page {i}" for i in range(20)
+        ]
+
+    def test_extracts_page_range(self, example_pdf):
+        """Should only extract the pages in the given range."""
+        pages = list(iter_pdf_pages(example_pdf, page_range=(5, 8)))
+        assert [page.strip() for page in pages] == [
+            "page 5", "page 6", "page 7"
+        ]
+
+    def test_extract_pdf_text_joins_pages(self, example_pdf):
+        """Should join the text of all pages."""
+        text = extract_pdf_text(example_pdf, page_range=(0, 2), workers=1)
+        assert "page 0" in text and "page 1" in text
+        assert "page 2" not in text
+
+
+@pytest.fixture
+def example_epub(tmp_path):
+    """Creates an EPUB file whose spine order differs from item order."""
+    epub_path = tmp_path / "chapters.epub"
+    book = epub.EpubBook()
+    chapters = []
+    for i in range(3):
+        chapter = epub.EpubHtml(title=f"Chapter {i}", file_name=f"c{i}.xhtml")
+        chapter.content = f"<h1>Heading</h1><p>chapter {i} ends here</p>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.spine = list(reversed(chapters))
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    epub.write_epub(str(epub_path), book)
+    return epub_path
+
+
+class TestIterEpubChapters:
+    """Tests for the iter_epub_chapters() function."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    @patch("src.utils.MIN_EPUB_CHAPTERS_PER_WORKER", 1)
+    def test_yields_chapters_in_spine_order(self, example_epub, workers):
+        """Should yield one text per chapter, following the spine."""
+        chapters = list(iter_epub_chapters(example_epub, workers))
+        assert len(chapters) == 3
+        for chapter, number in zip(chapters, [2, 1, 0]):
+            assert chapter.endswith(f"chapter {number} ends here")
+
+    @patch("src.utils.ProcessPoolExecutor")
+    def test_parses_short_books_in_process(self, mock_pool, example_epub):
+        """Should not start worker processes for a few chapters."""
+        assert len(list(iter_epub_chapters(example_epub, 8))) == 3
+        mock_pool.assert_not_called()
+
+    def test_does_not_resolve_external_entities(self, example_epub, tmp_path):
+        """Should parse the package without loading external entities."""
+        (tmp_path / "secret.txt").write_text("secret", encoding="utf-8")
+        with zipfile.ZipFile(example_epub) as archive:
+            files = {name: archive.read(name) for name in archive.namelist()}
+        opf = files["EPUB/content.opf"].decode("utf-8")
+        declaration, rest = opf.split("\n", 1)
+        files["EPUB/content.opf"] = (
+            f"{declaration}\n<!DOCTYPE package [<!ENTITY secret SYSTEM "
+            f"\"{(tmp_path / 'secret.txt').as_uri()}\">]>\n"
+            + rest.replace("</metadata>", "<dc:source>&secret;</dc:source>"
+                           "</metadata>", 1)
+            ).encode("utf-8")
+        with zipfile.ZipFile(example_epub, "w") as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+
+        chapters = list(iter_epub_chapters(example_epub, 1))
+        assert len(chapters) == 3
+        assert not any("secret" in chapter for chapter in chapters)
+
+    def test_leaves_out_styles_and_scripts(self, tmp_path):
+        """Should not include the contents of style and script elements."""
+        book = epub.EpubBook()
+        chapter = epub.EpubHtml(title="Chapter One", file_name="c1.xhtml")
+        chapter.content = (
+            "<style>p { color: red; font-family: serif }</style>"
+            "<p>Hola mundo</p><script>var x = 1;</script>"
+            "<noscript>enable scripts</noscript>"
+            )
+        book.add_item(chapter)
+        book.spine = [chapter]
+        book.add_item(epub.EpubNcx())
+        book.add_item(epub.EpubNav())
+        epub.write_epub(str(tmp_path / "styled.epub"), book)
+
+        [text] = iter_epub_chapters(tmp_path / "styled.epub", 1)
+        assert "Hola mundo" in text
+        for word in ("color", "serif", "var", "scripts"):
+            assert word not in text
+
+    def test_chapters_not_merged_in_extracted_text(self, example_epub):
+        """Should keep words at chapter boundaries apart."""
+        words = generate_word_list(extract_text_from_file(example_epub))
+        assert words["heading"] == 3
+        assert words["here"] == 3
+
+
 class TestGenerateWordList:
     """Tests for the generate_word_list() function in utils.py."""
 
@@ -410,6 +738,238 @@ class TestGenerateWordList:
         }
 
 
+class TestWordTokenizer:
+    """Tests for the WordTokenizer class."""
+
+    def test_count_returns_counter(self):
+        """Should return a Counter of cleaned words."""
+        output = WordTokenizer().count("Hello, hello world!")
+        assert isinstance(output, Counter)
+        assert output == {"hello": 2, "world": 1}
+
+    def test_count_updates_existing_counter(self):
+        """Should add new counts to a counter that is passed in."""
+        counts = Counter({"hello": 1})
+        output = WordTokenizer().count("hello there", counts)
+        assert output is counts
+        assert counts == {"hello": 2, "there": 1}
+
+    def test_matches_generate_word_list(self):
+        """Should produce the same output as generate_word_list()."""
+        text = "2000-s, 22hello, фалаке[2 ¿Sueles «leer»? 4 don't 11:00"
+        assert WordTokenizer().count(text) == generate_word_list(text)
+
+    @pytest.mark.parametrize(
+        "token, expected",
+        [
+            ("«hello»", "hello"),
+            ("22все", "все"),
+            ("фалаке[2", "фалаке"),
+            ("3-year-old", "3-year-old"),
+            ("11:00", ""),
+            ("—", ""),
+        ]
+    )
+    def test_clean_word(self, token, expected):
+        """Should strip digits, references and punctuation from tokens."""
+        assert WordTokenizer().clean_word(token) == expected
+
+    def test_custom_punctuation(self):
+        """Should strip only the configured extra punctuation characters."""
+        tokenizer = WordTokenizer(extra_punctuation="")
+        assert tokenizer.count("«hello»") == {"«hello»": 1}
+
+
+class TestWordCounter:
+    """Tests for the WordCounter class."""
+
+    def test_counts_words_from_several_pieces(self):
+        """Should add up word counts from each piece of text."""
+        counter = WordCounter()
+        counter.update("hello world ")
+        counter.update("hello again")
+        assert counter.flush() == {"hello": 2, "world": 1, "again": 1}
+
+    def test_handles_word_split_across_pieces(self):
+        """Should join a word that is split between two pieces."""
+        counter = WordCounter()
+        counter.update("the quick bro")
+        counter.update("wn fox")
+        assert counter.flush() == {"the": 1, "quick": 1, "brown": 1, "fox": 1}
+
+    def test_running_counts_include_held_back_word(self):
+        """Should include the last partial word in the running counts."""
+        counter = WordCounter()
+        counter.update("hello wor")
+        assert counter.counts == {"hello": 1, "wor": 1}
+        counter.update("ld")
+        assert counter.counts == {"hello": 1, "world": 1}
+
+    def test_counts_text_without_whitespace_past_max_pending(self):
+        """Should not hold back more than max_pending characters."""
+        counter = WordCounter(max_pending=10)
+        for _ in range(5):
+            counter.update("日本語" * 2)
+            assert len(counter._pending) <= 10
+        assert counter.flush() == {"日本語" * 4: 2, "日本語" * 2: 1}
+
+    def test_matches_generate_word_list_for_any_split(self):
+        """Should give the same counts however the text is split."""
+        text = "¿Sueles leer «antes» de dormir? 22hello фалаке[2 ΟΔΟΣ"
+        expected = generate_word_list(text)
+        for size in range(1, len(text)):
+            counter = WordCounter()
+            for start in range(0, len(text), size):
+                counter.update(text[start:start + size])
+            assert counter.flush() == expected
+
+    def test_count_words_in_file(self, example_srt):
+        """Should count the words in a file in chunks."""
+        example_srt.write_text(
+            "1\n00:00:01,000 --> 00:00:02,000\n<i>Hello there!</i>\n\n"
+            "2\n00:00:03,000 --> 00:00:04,000\nHello again.\n"
+        )
+        output = count_words_in_file(example_srt, chunk_size=1)
+        assert output == {"hello": 2, "there": 1, "again": 1}
+
+
+class TestCountWords:
+    """Tests for the count_words() function."""
+
+    def test_counts_each_input_separately(self):
+        """Should not join the last word of one chunk to the next."""
+        output = count_words(["hello world\n", "again hello"])
+        assert output == {"hello": 2, "world": 1, "again": 1}
+
+    def test_consumes_generator(self, example_srt):
+        """Should count the chunks produced by iter_text_from_file()."""
+        example_srt.write_text("one two two")
+        output = count_words(iter_text_from_file(example_srt))
+        assert output == {"one": 1, "two": 2}
+
+
+class TestCleanBytes:
+    """Tests for the clean_bytes() function."""
+
+    @pytest.mark.parametrize("text", [
+        "1\n00:00:01,000 --> 00:00:02,000\nHola <i>señor</i>\n",
+        "\u0663\xa0\u0660\u0660:\u0660\u0660:01,000 --> "
+        "00:00:02,000\xa0Olé",
+        "3.ass 1.años 2.a\xabb.c caf\xe9\u200b\\\\an8}",
+        "a\u2014b \xf1\u2014\xf1 x \u2014y \u2014z \u65e5\u2014\u2014",
+        "12\x1c00:00:01,000 --> 00:00:02,000\x1f<b>Hi</b> 2.ass x\\an8}",
+    ])
+    def test_matches_clean_text(self, text):
+        """Should clean UTF-8 bytes exactly like clean_text() cleans str."""
+        expected = unicodedata.normalize("NFD", clean_text(text))
+        output = clean_bytes(text.encode("utf-8")).decode("utf-8")
+        assert unicodedata.normalize("NFD", output) == expected
+
+
+@pytest.fixture
+def bytes_fast_path():
+    """Uses the memory-mapped bytes path for files of any size."""
+    with patch("src.utils.BYTES_FAST_PATH_MIN_SIZE", 0):
+        yield
+
+
+class TestCountWordsWithMmap:
+    """Tests for counting large plain-text files as bytes."""
+
+    def test_matches_str_path(self, bytes_fast_path, tmp_path):
+        """Should give the same counts as the str path for every chunk
+        size."""
+        path = tmp_path / "example.txt"
+        path.write_bytes((
+            "\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\n"
+            "<i>¿Qué?</i> ÉCOLE e\u0301cole\r\n\r\n"
+            "2\r00:00:03,000 --> 00:00:04,000\r"
+            "Año\xa0años 1.años a\u2014b \u200bhello\r\r"
+        ).encode("utf-8"))
+        expected = count_words(iter_text_from_file(path))
+        assert expected["école"] == 2
+        for chunk_size in [1, 7, 64, 1 << 20]:
+            output = count_words_in_file(path, chunk_size=chunk_size)
+            assert output == expected
+
+    @pytest.mark.parametrize("line", [
+        "    indented line of text\n",
+        "— ¿Dónde estás? — dijo ella.\n",
+    ])
+    def test_bounds_byte_chunk_size(self, line):
+        """Should split lines that do not start with a letter into chunks
+        of roughly chunk_size bytes."""
+        from src.utils import _iter_byte_chunks
+
+        data = (line * 2000).encode("utf-8")
+        chunks = list(_iter_byte_chunks(data, 1000))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1000 + len(data) / 2000 for chunk in chunks)
+        assert b"".join(chunks) == data
+
+    def test_splits_byte_chunks_at_size_limit(self):
+        """Should split bytes without a safe boundary at the size limit."""
+        from src.utils import _iter_byte_chunks
+
+        chunks = list(_iter_byte_chunks(b"12\n\n" * 2000, 100))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 1700 for chunk in chunks)
+
+    def test_falls_back_for_invalid_utf8(self, bytes_fast_path, tmp_path):
+        """Should raise the same error as the str path for invalid UTF-8."""
+        path = tmp_path / "invalid.txt"
+        path.write_bytes(b"caf\xff hello\n")
+        with pytest.raises(UnicodeDecodeError):
+            count_words_in_file(path)
+
+    def test_parses_srt_files_as_cues(self, bytes_fast_path, example_srt):
+        """Should read large SRT files with the cue parser, like small ones."""
+        example_srt.write_text(
+            "1\n00:00:01.500 --> 00:00:02,000\n<i>Hola</i>\n\n"
+            "2 00:00:03,000 --> 00:00:04,000\nadiós\n", encoding="utf-8"
+            )
+        with patch("src.utils._count_words_with_mmap") as mock_mmap:
+            output = count_words_in_file(example_srt)
+        mock_mmap.assert_not_called()
+        assert output == {"hola": 1, "adiós": 1}
+
+    def test_falls_back_for_ssa(self, bytes_fast_path, example_ssa):
+        """Should parse SSA scripts saved with a .txt suffix."""
+        path = example_ssa.rename(example_ssa.with_suffix(".txt"))
+        with open(path, "a") as f:
+            f.write("Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,Hola\n")
+        assert count_words_in_file(path) == {"hola": 1}
+
+
+class TestSaveChunks:
+    """Tests for the ask_to_save_text() and save_chunks() functions."""
+
+    @patch("builtins.input", return_value="n")
+    def test_returns_none_if_user_declines(self, mock_input, tmp_path):
+        """Should return None if the user does not want to save the text."""
+        assert ask_to_save_text(tmp_path / "out.txt") is None
+
+    @patch("builtins.input", return_value="y")
+    def test_adds_txt_suffix(self, mock_input, tmp_path):
+        """Should add a .txt suffix to a path without one."""
+        assert ask_to_save_text(tmp_path / "out") == tmp_path / "out.txt"
+
+    def test_saves_chunks_as_they_are_consumed(self, tmp_path):
+        """Should write every chunk to the file and yield it unchanged."""
+        output = save_chunks(["hello ", "world"], tmp_path / "out.txt")
+        assert list(output) == ["hello ", "world"]
+        assert (tmp_path / "out.txt").read_text() == "hello world"
+
+    def test_can_overwrite_source_file(self, example_srt):
+        """Should only replace the source once all its text has been read."""
+        path = example_srt.with_suffix(".txt")
+        path.write_text("<i>hello</i> world")
+        chunks = save_chunks(iter_text_from_file(path), path)
+        assert count_words(chunks) == {"hello": 1, "world": 1}
+        assert path.read_text() == "hello world"
+        assert list(path.parent.iterdir()) == [path]
+
+
 class TestConvertToCSVWithTranslations:
     """Tests for the convert_word_list_to_csv_with_translations() function."""
 
@@ -493,6 +1053,158 @@ class TestCheckForNewWords:
         input_set = {'world'}
         assert check_for_new_words(input_dict, input_set) == {'hello': 1}
 
+    def test_accepts_known_words_index(self, tmp_path):
+        """Should remove words found in a KnownWordsIndex."""
+        input_dict = {'hello': 1, 'world': 2, 'señor': 3}
+        with KnownWordsIndex.build(['world', 'señor'], tmp_path / "k") as idx:
+            assert check_for_new_words(input_dict, idx) == {'hello': 1}
+
+    def test_accepts_several_sources(self):
+        """Should remove words found in any of the given sources."""
+        input_dict = {'a': 1, 'b': 2, 'c': 3, 'd': 4}
+        output = check_for_new_words(input_dict, {'a'}, ['b'], {'c': 1})
+        assert output == {'d': 4}
+
+    def test_resolves_deck_names_with_loader(self):
+        """Should load words for deck names using deck_loader."""
+        decks = {'Spanish': {'hola'}}
+        output = check_for_new_words(
+            {'hola': 1, 'adiós': 1}, 'Spanish', deck_loader=decks.get
+            )
+        assert output == {'adiós': 1}
+
+    def test_deck_name_without_loader_raises_error(self):
+        """Should raise ValueError if a deck name cannot be resolved."""
+        with pytest.raises(ValueError):
+            check_for_new_words({'hola': 1}, 'Spanish')
+
+
+class TestFilterKnownWords:
+    """Tests for the filter_known_words() function."""
+
+    def test_reports_words_removed_by_each_source(self):
+        """Should credit each removed word to the first matching source."""
+        input_dict = {'a': 1, 'b': 2, 'c': 3, 'd': 4}
+        output, removed = filter_known_words(
+            input_dict, [{'a', 'b'}, frozenset({'b', 'c'}), {'x'}]
+            )
+        assert output == {'d': 4}
+        assert removed == [2, 1, 0]
+
+    def test_preserves_word_order(self):
+        """Should keep the remaining words in their original order."""
+        input_dict = {'c': 1, 'a': 2, 'b': 3}
+        output, _ = filter_known_words(input_dict, [{'a'}])
+        assert list(output) == ['c', 'b']
+
+    def test_returns_copy_if_nothing_removed(self):
+        """Should return a new dictionary when no sources match."""
+        input_dict = Counter({'a': 1})
+        output, removed = filter_known_words(input_dict, [])
+        assert output == {'a': 1} and output is not input_dict
+        assert removed == []
+
+    def test_combines_indexes_and_sets(self, tmp_path):
+        """Should filter with indexes and sets in the same call."""
+        input_dict = {'uno': 1, 'dos': 2, 'tres': 3}
+        with KnownWordsIndex.build(['dos'], tmp_path / "k") as index:
+            output, removed = filter_known_words(
+                input_dict, [index, {'tres', 'dos'}]
+                )
+        assert output == {'uno': 1}
+        assert removed == [1, 1]
+
+
+class TestKnownWordsIndex:
+    """Tests for the KnownWordsIndex class."""
+
+    def test_membership(self, tmp_path):
+        """Should find every indexed word and no others."""
+        words = ["zebra", "apple", "ñandú", "éclair", "b", "apple"]
+        with KnownWordsIndex.build(words, tmp_path / "k.idx") as index:
+            assert len(index) == 5
+            assert all(word in index for word in words)
+            assert "appl" not in index
+            assert "zebras" not in index
+            assert "" not in index
+            assert 1 not in index
+
+    def test_iterates_in_sorted_order(self, tmp_path):
+        """Should yield the words in byte order."""
+        with KnownWordsIndex.build(["b", "é", "a"], tmp_path / "k") as index:
+            assert list(index) == ["a", "b", "é"]
+
+    def test_empty_index(self, tmp_path):
+        """Should support an index with no words."""
+        with KnownWordsIndex.build([], tmp_path / "k.idx") as index:
+            assert len(index) == 0
+            assert "word" not in index
+
+    def test_reopens_existing_file(self, tmp_path):
+        """Should read an index written earlier."""
+        KnownWordsIndex.build(["hola"], tmp_path / "k.idx").close()
+        with KnownWordsIndex(tmp_path / "k.idx") as index:
+            assert "hola" in index
+
+    def test_rejects_other_files(self, tmp_path):
+        """Should raise ValueError for files that are not indexes."""
+        path = tmp_path / "words.txt"
+        path.write_text("not an index")
+        with pytest.raises(ValueError):
+            KnownWordsIndex(path)
+
+
+class TestLoadKnownWords:
+    """Tests for the load_known_words() function."""
+
+    def test_builds_index_from_csv(self, tmp_path):
+        """Should index the first column of a CSV word list."""
+        path = tmp_path / "words.csv"
+        convert_word_list_to_csv({"Hola": 2, "adiós": 1}, path)
+        with load_known_words(path, tmp_path / "cache") as index:
+            assert list(index) == ["adiós", "hola"]
+
+    def test_reads_translated_word_lists(self, tmp_path):
+        """Should index the words of "word: count" entries."""
+        path = tmp_path / "words.csv"
+        path.write_text(
+            "hola: 2,hello\r\nadiós: 1,goodbye\r\n", encoding="utf-8"
+            )
+        with load_known_words(path, tmp_path / "cache") as index:
+            assert list(index) == ["adiós", "hola"]
+
+    def test_cleans_and_normalises_entries(self, tmp_path):
+        """Should clean and NFC-normalise words as word lists are."""
+        path = tmp_path / "words.txt"
+        path.write_text(
+            "«Adio\u0301s», ¿qué? 42\n", encoding="utf-8"
+            )
+        with load_known_words(path, tmp_path / "cache") as index:
+            assert list(index) == ["adiós", "qué"]
+
+    def test_builds_index_from_text(self, tmp_path):
+        """Should index every word of a text list."""
+        path = tmp_path / "words.txt"
+        path.write_text("one\ntwo three\n\n", encoding="utf-8")
+        with load_known_words(path, tmp_path / "cache") as index:
+            assert list(index) == ["one", "three", "two"]
+
+    def test_reuses_built_index(self, tmp_path):
+        """Should open the cached index instead of rebuilding it."""
+        path = tmp_path / "words.txt"
+        path.write_text("one", encoding="utf-8")
+        load_known_words(path, tmp_path / "cache").close()
+        with patch.object(KnownWordsIndex, "build") as mock_build:
+            with load_known_words(path, tmp_path / "cache") as index:
+                assert "one" in index
+            mock_build.assert_not_called()
+
+    def test_opens_index_files_directly(self, tmp_path):
+        """Should open an index file without building a new one."""
+        KnownWordsIndex.build(["uno"], tmp_path / "known.idx").close()
+        with load_known_words(tmp_path / "known.idx") as index:
+            assert index.path == tmp_path / "known.idx"
+
 
 class TestGetUserLanguage:
     """Tests for the get_user_language() function."""
@@ -526,6 +1238,76 @@ class TestGetUserLanguage:
         assert 'spanish: es' in captured.out
 
 
+class TestGetSupportedLanguages:
+    """Tests for the get_supported_languages() function."""
+
+    def test_saves_tmp_path(self, tmp_path):
+        """Should save the translator's languages in the cache folder."""
+        languages = get_supported_languages(cache_dir=tmp_path)
+        assert languages["spanish"] == "es"
+        with open(tmp_path / "languages.json", encoding="utf-8") as f:
+            assert json.load(f) == languages
+
+    def test_reads_saved_table(self, tmp_path, monkeypatch):
+        """Should use the saved table without loading the translator."""
+        (tmp_path / "languages.json").write_text(
+            '{"klingon": "tlh"}', encoding="utf-8"
+            )
+        monkeypatch.setitem(sys.modules, "deep_translator", None)
+        assert get_supported_languages(cache_dir=tmp_path) == {
+            "klingon": "tlh"
+            }
+
+    def test_refresh_rebuilds_table(self, tmp_path):
+        """Should replace the saved table when refresh is requested."""
+        (tmp_path / "languages.json").write_text(
+            '{"klingon": "tlh"}', encoding="utf-8"
+            )
+        languages = get_supported_languages(True, tmp_path)
+        assert "klingon" not in languages
+        assert get_supported_languages(cache_dir=tmp_path) is languages
+
+    def test_keeps_tables_of_each_folder(self, tmp_path):
+        """Should not return the table of another cache folder."""
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "languages.json").write_text(
+                f'{{"{name}": "{name}"}}', encoding="utf-8"
+                )
+        assert get_supported_languages(cache_dir=tmp_path / "a") == {
+            "a": "a"
+            }
+        assert get_supported_languages(cache_dir=tmp_path / "b") == {
+            "b": "b"
+            }
+
+    def test_uses_cache_directory_by_default(self, isolated_cache_dir):
+        """Should save the table in the default cache directory."""
+        get_supported_languages()
+        assert (isolated_cache_dir / "languages.json").exists()
+
+
+class TestResolveLanguage:
+    """Tests for the resolve_language() function."""
+
+    languages = {"spanish": "es", "german": "de", "hebrew": "iw",
+                 "chinese (simplified)": "zh-CN"}
+
+    @pytest.mark.parametrize("user_lang, expected", [
+        ("es", "es"),
+        ("Spanish", "es"),
+        ("zh-cn", "zh-CN"),
+        ("spa", "es"),
+        ("ger", "de"),
+        ("heb", "iw"),
+        ("fra", None),
+        ("invalid", None),
+    ])
+    def test_resolves_names_and_codes(self, user_lang, expected):
+        """Should accept translator and ISO 639 names and codes."""
+        assert resolve_language(user_lang, self.languages) == expected
+
+
 class TestConvertToCSV:
     """Tests for the convert_word_list_to_csv() function."""
 
@@ -561,6 +1343,186 @@ class TestConvertToCSV:
             assert third_row[0] == 'world'
             assert int(third_row[1]) == 1
 
+    def test_keeps_top_words_by_frequency(self, example_csv):
+        """Should keep the most frequent words when top is given."""
+        input = {'hello': 3, 'world': 1, 'abacus': 2}
+        convert_word_list_to_csv(input, example_csv, "frequency", 2)
+        with open(example_csv, encoding="utf-8-sig", newline="") as file:
+            assert list(csv.reader(file)) == [['hello', '3'], ['abacus', '2']]
+
+
+class TestIterWordListRows:
+    """Tests for the iter_word_list_rows() function."""
+
+    words = {'the': 5, 'cat': 2, 'sat': 2, 'on': 1, '': 9}
+
+    def test_sorts_alphabetically_by_default(self):
+        """Should sort the words alphabetically and skip empty words."""
+        assert list(iter_word_list_rows(self.words)) == [
+            ('cat', 2), ('on', 1), ('sat', 2), ('the', 5)
+            ]
+
+    def test_sorts_by_frequency(self):
+        """Should put the most frequent words first, breaking ties by word."""
+        assert list(iter_word_list_rows(self.words, "frequency")) == [
+            ('the', 5), ('cat', 2), ('sat', 2), ('on', 1)
+            ]
+
+    def test_keeps_top_words(self):
+        """Should keep the most frequent words, in the chosen order."""
+        assert list(iter_word_list_rows(self.words, "frequency", 2)) == [
+            ('the', 5), ('cat', 2)
+            ]
+        assert list(iter_word_list_rows(self.words, "alpha", 2)) == [
+            ('cat', 2), ('the', 5)
+            ]
+
+    def test_keeps_top_words_without_sorting_everything(self):
+        """Should select the top words with a heap instead of a sort."""
+        with patch("src.utils.sorted") as mock_sorted:
+            list(iter_word_list_rows(self.words, "frequency", 2))
+        mock_sorted.assert_not_called()
+
+    def test_applies_minimum_count(self):
+        """Should skip words that appear fewer than min_count times."""
+        assert list(iter_word_list_rows(self.words, "none", None, 2)) == [
+            ('the', 5), ('cat', 2), ('sat', 2)
+            ]
+
+    def test_rejects_unknown_order(self):
+        """Should raise a ValueError for an unknown order."""
+        with pytest.raises(ValueError):
+            iter_word_list_rows(self.words, "random")
+
+
+class TestWriteWordList:
+    """Tests for the write_word_list() function."""
+
+    words = {'niño': 2, 'casa': 1}
+
+    def test_writes_tsv(self, tmp_path):
+        """Should write tab-separated rows for a .tsv file."""
+        path = tmp_path / 'words.tsv'
+        assert write_word_list(self.words, path) == 2
+        assert path.read_text(encoding="utf-8") == "casa\t1\nniño\t2\n"
+
+    def test_writes_jsonl(self, tmp_path):
+        """Should write one JSON object per word for a .jsonl file."""
+        path = tmp_path / 'words.jsonl'
+        write_word_list(self.words, path, order="frequency")
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"word": "niño", "count": 2}, {"word": "casa", "count": 1}
+            ]
+
+    def test_format_overrides_extension(self, tmp_path):
+        """Should use the given format whatever the file extension."""
+        path = tmp_path / 'words.txt'
+        write_word_list(self.words, path, "csv")
+        assert path.read_text(encoding="utf-8-sig") == "casa,1\nniño,2\n"
+
+    def test_returns_number_of_words_written(self, tmp_path):
+        """Should return the number of rows written after filtering."""
+        path = tmp_path / 'words.csv'
+        assert write_word_list(self.words, path, min_count=2) == 1
+
+    def test_rejects_unknown_format(self, tmp_path):
+        """Should raise a ValueError for an unknown format."""
+        with pytest.raises(ValueError):
+            write_word_list(self.words, tmp_path / 'words.csv', "xml")
+
+
+def stub_translator(words, source, target):
+    """Translates words locally by tagging them with the language pair."""
+    return [f"{word}:{source}-{target}" for word in words]
+
+
+class TestTranslateWords:
+    """Tests for the translate_words() function."""
+
+    def test_translates_words_with_backend(self):
+        """Should return the backend's translation of each word."""
+        assert translate_words(
+            ["casa", "perro"], "es", "en", stub_translator, delay=0
+            ) == {"casa": "casa:es-en", "perro": "perro:es-en"}
+
+    def test_sends_words_in_chunks(self):
+        """Should send each unique word once, in chunks of chunk_size."""
+        translator = Mock(side_effect=stub_translator)
+        translations = translate_words(
+            ["a", "b", "c", "a", "d", "e"], "es", "en", translator,
+            chunk_size=2, delay=0
+            )
+        assert len(translations) == 5
+        assert sorted(
+            word for call in translator.call_args_list
+            for word in call.args[0]
+            ) == ["a", "b", "c", "d", "e"]
+        assert translator.call_count == 3
+
+    def test_only_translates_uncached_words(self, disk_cache):
+        """Should reuse cached translations for the same language pair."""
+        translate_words(["casa"], "es", "en", stub_translator, disk_cache,
+                        delay=0)
+        translator = Mock(side_effect=stub_translator)
+        translations = translate_words(
+            ["casa", "perro"], "es", "en", translator, disk_cache, delay=0
+            )
+        translator.assert_called_once_with(["perro"], "es", "en")
+        assert translations["casa"] == "casa:es-en"
+
+        translate_words(["casa"], "es", "de", translator, disk_cache,
+                        delay=0)
+        translator.assert_called_with(["casa"], "es", "de")
+
+    def test_caches_translations_by_default(self):
+        """Should send no words on a second call without a cache given."""
+        translate_words(["casa", "perro"], "es", "en", stub_translator,
+                        delay=0)
+        translator = Mock(side_effect=stub_translator)
+        translations = translate_words(
+            ["casa", "perro"], "es", "en", translator, delay=0
+            )
+        translator.assert_not_called()
+        assert translations == {"casa": "casa:es-en", "perro": "perro:es-en"}
+
+    def test_retries_failed_chunks(self):
+        """Should retry a chunk whose request failed."""
+        translator = Mock(side_effect=[
+            requests.ConnectionError("reset"), ["house"]
+            ])
+        assert translate_words(
+            ["casa"], "es", "en", translator, delay=0
+            ) == {"casa": "house"}
+        assert translator.call_count == 2
+
+    def test_raises_after_retries_and_keeps_progress(self, disk_cache):
+        """Should raise once retries run out, caching finished chunks."""
+        def flaky_translator(words, source, target):
+            if "perro" in words:
+                raise requests.ConnectionError("reset")
+            return stub_translator(words, source, target)
+
+        with pytest.raises(requests.ConnectionError):
+            translate_words(
+                ["casa", "perro"], "es", "en", flaky_translator,
+                disk_cache, chunk_size=1, delay=0, retries=1
+                )
+        translator = Mock(side_effect=stub_translator)
+        translate_words(["casa", "perro"], "es", "en", translator,
+                        disk_cache, delay=0)
+        translator.assert_called_once_with(["perro"], "es", "en")
+
+    def test_writes_translations_to_csv(self, example_csv):
+        """Should write each word with its translation from the backend."""
+        convert_word_list_to_csv_with_translations(
+            {"perro": 2, "casa": 1}, example_csv, "es", "en", stub_translator
+            )
+        with open(example_csv, newline="") as file:
+            assert list(csv.reader(file)) == [
+                ["casa: 1", "casa:es-en"], ["perro: 2", "perro:es-en"]
+                ]
+
 
 class TestExtractFileList:
 
@@ -612,6 +1574,178 @@ class TestExtractFileList:
         assert extract_file_list(tmp_path, file_extensions)
 
 
+@pytest.fixture
+def example_files(tmp_path):
+    """Creates several text files and one unreadable file."""
+    files = []
+    for i, text in enumerate(["hello world", "hello again", "world"]):
+        file = tmp_path / f"file{i}.txt"
+        file.write_text(text)
+        files.append(file)
+    invalid = tmp_path / "file.mkv"
+    invalid.touch()
+    return files, invalid
+
+
+class TestIterFileWordCounts:
+    """Tests for the iter_file_word_counts() function."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_returns_counts_for_each_file(self, example_files, workers):
+        """Should yield the word counts of every file."""
+        files, _ = example_files
+        output = {
+            file: counts
+            for file, counts, error in iter_file_word_counts(files, workers)
+        }
+        assert output == {
+            files[0]: {"hello": 1, "world": 1},
+            files[1]: {"hello": 1, "again": 1},
+            files[2]: {"world": 1},
+        }
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_reports_errors_per_file(self, example_files, workers):
+        """Should yield the error for a file that cannot be processed."""
+        files, invalid = example_files
+        results = list(iter_file_word_counts([invalid] + files, workers))
+        errors = [(file, error) for file, _, error in results if error]
+        assert len(results) == 4
+        assert len(errors) == 1
+        assert errors[0][0] == invalid
+        assert "File format is invalid." in str(errors[0][1])
+
+
+class TestGetWorkerCount:
+    """Tests for the get_worker_count() function."""
+
+    @patch.dict(os.environ, {"WORD_LIST_WORKERS": "3"})
+    def test_retrieves_environment_variable(self):
+        """Should use the WORD_LIST_WORKERS environment variable."""
+        assert get_worker_count() == 3
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_defaults_to_cpu_count(self):
+        """Should default to the number of CPUs."""
+        assert get_worker_count() == (os.cpu_count() or 1)
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """Creates a disk cache in a temporary directory."""
+    return DiskCache(tmp_path / "cache" / "cache.sqlite3")
+
+
+class TestDiskCache:
+    """Tests for the DiskCache class."""
+
+    def test_stores_and_retrieves_values(self, disk_cache):
+        """Should return stored values and None for missing keys."""
+        disk_cache.set("key", b"value")
+        assert disk_cache.get("key") == b"value"
+        assert disk_cache.get("missing") is None
+
+    def test_evicts_least_recently_used_values(self, tmp_path):
+        """Should evict the least recently used values above max_bytes."""
+        cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=10)
+        cache.set("a", b"aaaa")
+        cache.set("b", b"bbbb")
+        cache.get("a")
+        cache.set("c", b"cccc")
+        assert cache.get("a") == b"aaaa"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"cccc"
+
+    def test_stores_and_retrieves_many_values(self, disk_cache):
+        """Should store and return several values at once."""
+        disk_cache.set_many({"a": b"1", "b": b"2"})
+        assert disk_cache.get_many(["a", "b", "missing"]) == {
+            "a": b"1", "b": b"2"
+            }
+
+    def test_retrieves_any_number_of_keys(self, disk_cache):
+        """Should look up more keys than a query can bind, repeatedly."""
+        disk_cache.set_many({f"k{i}": b"v" for i in range(2000)})
+        assert len(disk_cache.get_many(f"k{i}" for i in range(2000))) == 2000
+        assert disk_cache.get_many(["k0", "missing"]) == {"k0": b"v"}
+
+    def test_clear_removes_all_values(self, disk_cache):
+        """Should remove every cached value."""
+        disk_cache.set("key", b"value")
+        disk_cache.clear()
+        assert disk_cache.get("key") is None
+
+    def test_can_be_pickled(self, disk_cache):
+        """Should be usable after being sent to another process."""
+        disk_cache.set("key", b"value")
+        assert pickle.loads(pickle.dumps(disk_cache)).get("key") == b"value"
+
+    def test_file_digest_only_reads_changed_files(self, disk_cache, tmp_path):
+        """Should hash a file again only when its size or mtime changes."""
+        file = tmp_path / "file.txt"
+        file.write_text("hello")
+        with patch("src.utils.hashlib.sha256", wraps=hashlib.sha256) as sha:
+            first = disk_cache.file_digest(file)
+            assert disk_cache.file_digest(file) == first
+            assert sha.call_count == 1
+            file.write_text("hello world")
+            assert disk_cache.file_digest(file) != first
+            assert sha.call_count == 2
+
+    def test_extract_text_from_file_uses_cache(self, disk_cache, example_srt):
+        """Should not extract an unchanged file a second time."""
+        example_srt.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello!")
+        assert extract_text_from_file(example_srt, disk_cache) == "Hello!"
+        with patch("src.utils._iter_file_chunks") as mock_extract:
+            output = extract_text_from_file(example_srt, disk_cache)
+            mock_extract.assert_not_called()
+        assert output == "Hello!"
+
+    def test_iter_text_streams_cached_text(self, disk_cache):
+        """Should yield cached text in chunks of roughly chunk_size."""
+        text = "słowo " * 1000
+        list(disk_cache.iter_text("key", lambda: [text]))
+        chunks = list(disk_cache.iter_text("key", None, chunk_size=100))
+        assert len(chunks) > 1
+        assert "".join(chunks) == text
+
+    def test_count_words_in_file_uses_cache(self, disk_cache, example_srt):
+        """Should return cached word counts for an unchanged file."""
+        example_srt.write_text("hello world hello")
+        expected = {"hello": 2, "world": 1}
+        assert count_words_in_file(example_srt, cache=disk_cache) == expected
+        with patch("src.utils.iter_text_from_file") as mock_extract:
+            output = count_words_in_file(example_srt, cache=disk_cache)
+            mock_extract.assert_not_called()
+        assert output == expected
+        assert isinstance(output, Counter)
+
+    def test_extract_text_from_mkv_uses_cache(
+        self, disk_cache, fake_mkvtoolnix, example_mkv
+    ):
+        """Should only run mkvextract once for an unchanged MKV file."""
+        with patch("subprocess.run", wraps=subprocess.run) as mock_run:
+            first = extract_text_from_mkv(example_mkv, 2, cache=disk_cache)
+            second = extract_text_from_mkv(example_mkv, 2, cache=disk_cache)
+        assert first == second
+        assert mock_run.call_count == 1
+
+
+class TestGetDiskCache:
+    """Tests for the get_disk_cache() function."""
+
+    def test_uses_cache_directory_variable(self, tmp_path):
+        """Should store the cache in WORD_LIST_CACHE_DIR."""
+        with patch.dict(os.environ, {"WORD_LIST_CACHE_DIR": str(tmp_path)}):
+            cache = get_disk_cache()
+        assert cache.path.parent == tmp_path
+
+    @patch.dict(os.environ, {"WORD_LIST_NO_CACHE": "1"})
+    def test_returns_none_if_disabled(self):
+        """Should return None if WORD_LIST_NO_CACHE is set."""
+        assert get_disk_cache() is None
+
+
 @pytest.fixture
 def mock_get_request():
     """Creates a test response body."""
@@ -648,7 +1782,7 @@ def mock_get_request():
         </html>
     """)
 
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = Mock()
         mock_response.content = content.encode("utf-8")
         mock_get.return_value = mock_response
@@ -657,12 +1791,235 @@ def mock_get_request():
 
 @pytest.fixture
 def mock_error():
-    """Mocks requests.get to raise an error."""
-    with patch("requests.get") as mock_error:
+    """Mocks Session.get to raise an error."""
+    with patch("requests.Session.get") as mock_error:
         mock_error.side_effect = requests.exceptions.RequestException
         yield mock_error
 
 
+class TestHTTPSession:
+    """Tests for the HTTPSession class."""
+
+    def test_applies_default_timeout(self):
+        """Should use the session timeout if none is given."""
+        session = HTTPSession(timeout=3)
+        with patch("requests.Session.request") as mock_request:
+            session.get("http://example.com")
+            session.get("http://example.com", timeout=7)
+        timeouts = [c.kwargs["timeout"] for c in mock_request.call_args_list]
+        assert timeouts == [3, 7]
+
+    def test_sets_pool_size_per_host(self):
+        """Should mount pools of the requested size for each prefix."""
+        session = HTTPSession(
+            pool_size=4, host_pool_sizes={"http://localhost:8765": 1}
+            )
+        default = session.get_adapter("https://example.com")
+        anki = session.get_adapter("http://localhost:8765")
+        assert default._pool_maxsize == 4
+        assert anki._pool_maxsize == 1
+
+
+class TestGetHttpSession:
+    """Tests for the get_http_session() function."""
+
+    @patch("src.utils._http_session", None)
+    def test_returns_shared_session(self):
+        """Should return the same session on every call."""
+        assert get_http_session() is get_http_session()
+
+    @patch("src.utils._http_session", None)
+    @patch.dict(os.environ, {
+        "WORD_LIST_HTTP_TIMEOUT": "2.5", "WORD_LIST_HTTP_POOL_SIZE": "3"
+        })
+    def test_reads_environment_variables(self):
+        """Should read the timeout and pool size from the environment."""
+        session = get_http_session()
+        assert session.timeout == 2.5
+        assert session.get_adapter("http://example.com")._pool_maxsize == 3
+
+    @patch("src.utils._http_session", None)
+    @patch.dict(os.environ, {
+        "WORD_LIST_HTTP_POOL_SIZE": "6",
+        "WORD_LIST_HTTP_HOST_POOLS":
+            "http://localhost:8765=1, https://a.example.com=20, bad, x=0",
+        })
+    def test_reads_host_pool_sizes(self):
+        """Should mount the pool sizes given for specific URL prefixes."""
+        session = get_http_session()
+        sizes = {
+            url: session.get_adapter(url)._pool_maxsize for url in [
+                "http://localhost:8765/", "https://a.example.com/page",
+                "https://b.example.com/"
+                ]
+            }
+        assert sizes == {
+            "http://localhost:8765/": 1, "https://a.example.com/page": 20,
+            "https://b.example.com/": 6,
+            }
+        assert "x" not in session.session.adapters
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serves files without logging each request."""
+
+    def log_message(self, format, *args):
+        """Discards the request log."""
+
+
+@pytest.fixture
+def local_site(tmp_path):
+    """Serves a small linked website from a local HTTP server."""
+    pages = {
+        "index.html": '<a href="a.html">A</a> <a href="b.html#top">B</a>'
+                      ' <a href="http://example.invalid/x">X</a> index',
+        "a.html": '<a href="c.html">C</a> alpha',
+        "b.html": '<a href="index.html">home</a> beta',
+        "c.html": '<a href="photo.jpg">photo</a> gamma',
+        }
+    for name, body in pages.items():
+        (tmp_path / name).write_text(f"<html><body>{body}</body></html>")
+    (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8\xff\xe0 JFIF binary")
+
+    handler = partial(QuietHandler, directory=str(tmp_path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield {"url": f"http://127.0.0.1:{server.server_port}", "dir": tmp_path}
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(urls, **kwargs):
+    """Returns the text of each crawled page, keyed by URL path."""
+    return {
+        url.rsplit("/", 1)[1]: text or error
+        for url, text, error in iter_url_texts(urls, delay=0, **kwargs)
+        }
+
+
+class TestIterUrlTexts:
+    """Tests for the iter_url_texts() function."""
+
+    def test_fetches_every_url(self, local_site):
+        """Should return the text of each URL in the list."""
+        base = local_site["url"]
+        output = crawl([f"{base}/a.html", f"{base}/c.html"])
+        assert output == {"a.html": "C alpha", "c.html": "photo gamma"}
+
+    def test_crawls_same_site_links(self, local_site):
+        """Should follow same-host links to the requested depth."""
+        output = crawl([f"{local_site['url']}/index.html"], depth=1)
+        assert set(output) == {"index.html", "a.html", "b.html"}
+        assert output["b.html"] == "home beta"
+
+    def test_crawls_deeper_levels(self, local_site):
+        """Should follow links from linked pages when depth is 2."""
+        output = crawl([f"{local_site['url']}/index.html"], depth=2)
+        assert set(output) == {"index.html", "a.html", "b.html", "c.html"}
+
+    def test_reports_failed_pages(self, local_site):
+        """Should yield an error for pages that cannot be downloaded."""
+        output = crawl([f"{local_site['url']}/missing.html"])
+        assert isinstance(output["missing.html"], requests.HTTPError)
+
+    def test_skips_linked_files_that_are_not_html(self, local_site):
+        """Should not read linked images and other non-HTML files."""
+        output = crawl([f"{local_site['url']}/a.html"], depth=2)
+        assert set(output) == {"a.html", "c.html"}
+
+    def test_reports_starting_urls_that_are_not_html(self, local_site):
+        """Should yield an error for a starting URL that is not HTML."""
+        output = crawl([f"{local_site['url']}/photo.jpg"])
+        assert isinstance(output["photo.jpg"], ValueError)
+
+    def test_reports_parse_errors_per_page(self, local_site):
+        """Should yield an error for a page that cannot be parsed."""
+        base = local_site["url"]
+        from src.utils import _parse_html as parse_html
+
+        def failing_parse(content, base_url=None):
+            if b"alpha" in content:
+                raise ValueError("Unreadable page")
+            return parse_html(content, base_url)
+
+        with patch("src.utils._parse_html", side_effect=failing_parse):
+            output = crawl([f"{base}/a.html", f"{base}/c.html"])
+        assert isinstance(output["a.html"], ValueError)
+        assert output["c.html"] == "photo gamma"
+
+
+class TestIterSitemapUrls:
+    """Tests for the iter_sitemap_urls() function."""
+
+    def test_reads_sitemap_and_index(self, local_site):
+        """Should list the pages of every sitemap in a sitemap index."""
+        base = local_site["url"]
+        ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        (local_site["dir"] / "pages.xml").write_text(
+            f'<urlset {ns}><url><loc>{base}/a.html</loc></url>'
+            f'<url><loc>{base}/b.html</loc></url></urlset>'
+            )
+        (local_site["dir"] / "more.xml.gz").write_bytes(gzip.compress(
+            f'<urlset {ns}><url><loc>{base}/c.html</loc></url></urlset>'
+            .encode()
+            ))
+        (local_site["dir"] / "sitemap.xml").write_text(
+            f'<sitemapindex {ns}><sitemap><loc>{base}/pages.xml</loc>'
+            f'</sitemap><sitemap><loc>{base}/more.xml.gz</loc></sitemap>'
+            '</sitemapindex>'
+            )
+        output = list(iter_sitemap_urls(f"{base}/sitemap.xml"))
+        assert output == [f"{base}/a.html", f"{base}/b.html",
+                          f"{base}/c.html"]
+
+    def test_reads_self_referencing_index_once(self, local_site):
+        """Should not read a sitemap index that lists itself again."""
+        base = local_site["url"]
+        ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        (local_site["dir"] / "pages.xml").write_text(
+            f'<urlset {ns}><url><loc>{base}/a.html</loc></url></urlset>'
+            )
+        (local_site["dir"] / "sitemap.xml").write_text(
+            f'<sitemapindex {ns}><sitemap><loc>{base}/sitemap.xml</loc>'
+            f'</sitemap><sitemap><loc>{base}/pages.xml</loc></sitemap>'
+            f'<sitemap><loc>{base}/pages.xml</loc></sitemap></sitemapindex>'
+            )
+        output = list(iter_sitemap_urls(f"{base}/sitemap.xml"))
+        assert output == [f"{base}/a.html"]
+
+    def test_raises_error_for_invalid_sitemap(self, local_site):
+        """Should raise ValueError if the sitemap is not valid XML."""
+        with pytest.raises(ValueError):
+            list(iter_sitemap_urls(f"{local_site['url']}/a.html"))
+
+    def test_identifies_sitemap_urls(self):
+        """Should recognise .xml and .xml.gz URLs as sitemaps."""
+        assert is_sitemap_url("https://example.com/sitemap.xml")
+        assert is_sitemap_url("https://example.com/sitemap.XML.gz?x=1")
+        assert not is_sitemap_url("https://example.com/page.html")
+
+
+class TestHostThrottle:
+    """Tests for the HostThrottle class."""
+
+    def test_spaces_requests_to_same_host(self):
+        """Should wait between requests to the same host."""
+        throttle = HostThrottle(0.05)
+        start = time.monotonic()
+        for _ in range(3):
+            throttle.wait("http://example.com/page")
+        assert time.monotonic() - start >= 0.1
+
+    def test_does_not_delay_different_hosts(self):
+        """Should not wait between requests to different hosts."""
+        throttle = HostThrottle(10)
+        start = time.monotonic()
+        throttle.wait("http://a.example.com/")
+        throttle.wait("http://b.example.com/")
+        assert time.monotonic() - start < 1
+
+
 class TestExtractTextFromUrl:
 
     """Tests for the extract_text_from_url function."""
@@ -685,52 +2042,199 @@ class TestExtractTextFromUrl:
         assert str(err.value) == "Text extraction failed. URL may be invalid."
 
 
+FAKE_MKVEXTRACT = """
+import json
+import sys
+
+tracks = json.load(open(sys.argv[1], encoding="utf-8"))
+specs = [spec.split(":", 1) for spec in sys.argv[3:]]
+if sys.argv[2] != "tracks" or any(track not in tracks for track, _ in specs):
+    sys.exit(2)
+for track, path in specs:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(tracks[track]["text"])
+"""
+
+FAKE_MKVMERGE = """
+import json
+import sys
+
+tracks = json.load(open(sys.argv[2], encoding="utf-8"))
+print(json.dumps({"tracks": [
+    {
+        "id": int(track),
+        "type": "subtitles",
+        "properties": {
+            "codec_id": info["codec"],
+            "language": info["language"],
+        },
+    }
+    for track, info in tracks.items()
+]}))
+"""
+
+
 @pytest.fixture
-def mock_mkv_subs(tmp_path):
-    """Creates a mock subprocess on an .srt file."""
-    example_srt = tmp_path / "example.srt"
-    example_srt.write_text(
-        '''6
-        00:04:33,232 --> 00:04:36,359
-        <i>This is Mr. Milchick,\nand I'm thrilled to welcome you</i>''')
-
-    with (
-        patch("tempfile.NamedTemporaryFile") as mock_temp,
-        patch("subprocess.run") as mock_subp,
-        patch("src.utils.get_binary_path", return_value="mkvextract")
+def fake_mkvtoolnix(tmp_path):
+    """Provides mkvextract and mkvmerge stand-ins that read MKV files
+    holding their subtitle tracks as JSON."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, source in [
+        ("mkvextract", FAKE_MKVEXTRACT), ("mkvmerge", FAKE_MKVMERGE)
+    ]:
+        path = bin_dir / name
+        path.write_text(f"#!{sys.executable}\n{source}")
+        path.chmod(0o755)
+    with patch(
+        "src.utils.get_binary_path", side_effect=lambda tool: str(
+            bin_dir / tool
+            )
     ):
-        mock_temp.return_value.__enter__.return_value.name = str(example_srt)
-        yield {
-            "mock_subp": mock_subp,
-            "temp_path": str(example_srt)
-            }
+        yield bin_dir
+
+
+def make_mkv(path, tracks):
+    """Writes a fake MKV file holding the given subtitle tracks."""
+    path.write_text(json.dumps({
+        str(track): {"codec": codec, "language": language, "text": text}
+        for track, (codec, language, text) in tracks.items()
+    }))
+    return path
+
+
+@pytest.fixture
+def example_mkv(tmp_path):
+    """Creates a fake MKV file with SRT, ASS and image subtitle tracks."""
+    return make_mkv(tmp_path / "example.mkv", {
+        2: (
+            "S_TEXT/UTF8", "eng",
+            "6\n00:04:33,232 --> 00:04:36,359\n"
+            "<i>This is Mr. Milchick,\nand I'm thrilled to welcome you</i>\n"
+        ),
+        3: (
+            "S_TEXT/ASS", "hrv",
+            "[Script Info]\n\n[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, "
+            "MarginV, Effect, Text\n"
+            "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,"
+            "{\\i1}Dobro jutro{\\i0}\n"
+        ),
+        4: ("S_HDMV/PGS", "eng", ""),
+    })
 
 
 class TestExtractTextFromMkv:
     """Tests for the extract_text_from_mkv function."""
 
-    def test_extracts_text_correctly(self, mock_mkv_subs):
+    def test_extracts_text_correctly(self, fake_mkvtoolnix, example_mkv):
         """Checks that text is successfully extracted by the function."""
         expected = "This is Mr. Milchick,\nand I'm thrilled to welcome you"
 
-        assert extract_text_from_mkv("test.mkv", 2) == expected
+        assert extract_text_from_mkv(example_mkv, 2) == expected
 
-    def test_calls_correct_subprocess_arguments(self, mock_mkv_subs):
-        """Checks that the correct subprocess arguments are used."""
-        extract_text_from_mkv("test.mkv", 2)
+    def test_uses_parser_for_codec(self, fake_mkvtoolnix, example_mkv):
+        """Checks that ASS tracks are parsed as SSA scripts."""
+        output = extract_text_from_mkv(example_mkv, 3, codec="S_TEXT/ASS")
+        assert output == "Dobro jutro"
 
-        mock_mkv_subs["mock_subp"].assert_called_once_with([
-            "mkvextract",
-            "test.mkv",
-            "tracks",
-            f"2:{mock_mkv_subs['temp_path']}"
-        ], check=True)
+    def test_rejects_image_subtitles(self, fake_mkvtoolnix, example_mkv):
+        """Checks that tracks without text subtitles are not extracted."""
+        with pytest.raises(ValueError):
+            extract_text_from_mkv(example_mkv, 4, codec="S_HDMV/PGS")
 
-    def test_temp_file_removed_after_function_complete(self, mock_mkv_subs):
-        """Checks that the temporary .txt file is deleted."""
-        extract_text_from_mkv("test.mkv", 2)
+    def test_saves_copy_of_subtitles(
+        self, fake_mkvtoolnix, example_mkv, tmp_path
+    ):
+        """Checks that the subtitles are saved to output_path if given."""
+        output_path = tmp_path / "copy.srt"
+        output = extract_text_from_mkv(example_mkv, 2, output_path)
+        assert output.startswith("This is Mr. Milchick")
+        assert output_path.read_text().startswith("6\n00:04:33,232")
+
+
+class TestExtractMkvTracks:
+    """Tests for the extract_mkv_tracks function."""
+
+    def test_extracts_tracks_in_one_pass(self, fake_mkvtoolnix, example_mkv):
+        """Checks that one mkvextract process writes every track."""
+        with patch("subprocess.run", wraps=subprocess.run) as mock_run:
+            output = extract_mkv_tracks(
+                example_mkv, {2: "S_TEXT/UTF8", 3: "S_TEXT/ASS"}
+                )
+        assert mock_run.call_count == 1
+        assert output[3] == "Dobro jutro"
+        assert output[2].startswith("This is Mr. Milchick")
+
+    def test_streams_through_named_pipes(self, fake_mkvtoolnix, example_mkv):
+        """Checks that tracks are read from named pipes, not files."""
+        with patch("os.mkfifo", wraps=os.mkfifo) as mock_mkfifo:
+            output = extract_mkv_tracks(example_mkv, [2, 3])
+        assert mock_mkfifo.call_count == 2
+        assert output[3] == "Dobro jutro"
+
+    def test_falls_back_to_temp_files(self, fake_mkvtoolnix, example_mkv):
+        """Checks that temporary files are used without named pipes."""
+        with patch("os.mkfifo", side_effect=OSError):
+            output = extract_mkv_tracks(example_mkv, [2, 3])
+        assert output[3] == "Dobro jutro"
+
+    def test_raises_error_if_mkvextract_fails(
+        self, fake_mkvtoolnix, example_mkv
+    ):
+        """Checks that a failed mkvextract run raises an error."""
+        with pytest.raises(subprocess.CalledProcessError):
+            extract_mkv_tracks(example_mkv, [2, 9])
+
+    def test_uses_cache(self, fake_mkvtoolnix, example_mkv, disk_cache):
+        """Checks that only uncached tracks are extracted."""
+        extract_mkv_tracks(example_mkv, [2], disk_cache)
+        with patch("subprocess.run", wraps=subprocess.run) as mock_run:
+            output = extract_mkv_tracks(example_mkv, [2, 3], disk_cache)
+        [command] = [call.args[0] for call in mock_run.call_args_list]
+        assert [spec.split(":")[0] for spec in command[3:]] == ["3"]
+        assert output[2].startswith("This is Mr. Milchick")
+
+
+class TestIterMkvWordCounts:
+    """Tests for the iter_mkv_word_counts function."""
+
+    def test_counts_words_of_selected_languages(
+        self, fake_mkvtoolnix, example_mkv, tmp_path
+    ):
+        """Checks that the text tracks in the chosen languages are used."""
+        other = make_mkv(tmp_path / "other.mkv", {
+            0: ("S_TEXT/UTF8", "hrv", "1\n00:00:01,000 --> "
+                "00:00:02,000\nDobro jutro\n"),
+        })
+        output = {
+            Path(file).name: (counts, error)
+            for file, counts, error in iter_mkv_word_counts(
+                [example_mkv, other], ["Croatian"], workers=1
+                )
+        }
+        assert output["example.mkv"] == ({"dobro": 1, "jutro": 1}, None)
+        assert output["other.mkv"] == ({"dobro": 1, "jutro": 1}, None)
 
-        assert not Path(mock_mkv_subs["temp_path"]).exists()
+    def test_counts_words_of_selected_tracks(
+        self, fake_mkvtoolnix, example_mkv
+    ):
+        """Checks that only the chosen track IDs are extracted."""
+        [(file, counts, error)] = iter_mkv_word_counts(
+            [example_mkv], track_ids=[3]
+            )
+        assert (counts, error) == ({"dobro": 1, "jutro": 1}, None)
+
+    def test_reports_files_without_text_tracks(
+        self, fake_mkvtoolnix, tmp_path
+    ):
+        """Checks that files without text subtitles yield an error."""
+        image_only = make_mkv(tmp_path / "image.mkv", {
+            0: ("S_HDMV/PGS", "eng", ""),
+        })
+        [(file, counts, error)] = iter_mkv_word_counts([image_only])
+        assert counts is None
+        assert isinstance(error, ValueError)
 
 
 @pytest.fixture
@@ -971,6 +2475,66 @@ class TestListSubtitleTracks:
             'Basque'
             ]
 
+    @patch("shutil.which", return_value="test_path")
+    def test_includes_codecs_if_requested(self, mock_shutil, mock_mkvmerge):
+        """Checks that the codec ID of each track can be included."""
+        output = list_subtitle_tracks("test.mkv", details=True)
+        assert output[0] == {
+            "id": 2, "language": "English", "codec": "S_TEXT/UTF8"
+            }
+
+    @patch("shutil.which", return_value="test_path")
+    def test_caches_tracks_by_size_and_mtime(
+        self, mock_shutil, mock_mkvmerge, disk_cache, tmp_path
+    ):
+        """Checks that mkvmerge only runs again once the file changes."""
+        mkv = tmp_path / "test.mkv"
+        mkv.write_bytes(b"matroska")
+        first = list_subtitle_tracks(mkv, cache=disk_cache)
+        assert list_subtitle_tracks(mkv, cache=disk_cache) == first
+        assert mock_mkvmerge.call_count == 1
+
+        os.utime(mkv, ns=(0, 0))
+        list_subtitle_tracks(mkv, cache=disk_cache)
+        assert mock_mkvmerge.call_count == 2
+
+    def test_memoizes_language_names(self):
+        """Checks that each language code is only looked up once."""
+        get_language_name.cache_clear()
+        with patch("pycountry.languages.get") as mock_get:
+            mock_get.return_value.name = "Croatian"
+            assert get_language_name("hrv") == "Croatian"
+            assert get_language_name("hrv") == "Croatian"
+        mock_get.assert_called_once_with(alpha_3="hrv")
+        get_language_name.cache_clear()
+
+
+class TestIterSubtitleTracks:
+    """Tests for the iter_subtitle_tracks function."""
+
+    def test_lists_tracks_of_each_file(self, fake_mkvtoolnix, tmp_path):
+        """Checks that the tracks of every file are listed, and that
+        errors are reported for each file."""
+        files = [
+            make_mkv(tmp_path / f"{i}.mkv", {
+                i: ("S_TEXT/UTF8", "hrv", "")
+            })
+            for i in range(5)
+        ]
+        broken = tmp_path / "broken.mkv"
+        broken.write_text("not json")
+        output = {
+            Path(file).name: (tracks, error)
+            for file, tracks, error in iter_subtitle_tracks(
+                files + [broken], workers=3
+                )
+        }
+        assert output["3.mkv"] == ([
+            {"id": 3, "language": "Croatian", "codec": "S_TEXT/UTF8"}
+            ], None)
+        assert output["broken.mkv"][0] is None
+        assert isinstance(output["broken.mkv"][1], ValueError)
+
 
 class TestGetBinaryPath:
     """Tests for the get_binary_path function."""
@@ -1084,3 +2648,80 @@ class TestExtractSSAText:
 
         output = extract_ssa_text(example_ssa)
         assert output == "- Razmišljao sam. - Da?"
+
+    def test_keeps_commas_and_hard_spaces(self, example_ssa):
+        """Checks commas in the text are kept and hard spaces replaced."""
+        new_line = (
+            r"Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,"
+            r"Da,{\b1} naravno{\b0},\hda."
+        )
+
+        with example_ssa.open("a") as f:
+            f.write("\n" + new_line)
+
+        output = extract_ssa_text(example_ssa)
+        assert output == "Da, naravno, da."
+
+    def test_uses_format_line_of_events(self):
+        """Checks the Text field is found from the [Events] Format line."""
+        lines = [
+            "[Script Info]\n",
+            "[V4+ Styles]\n",
+            "Format: Name, Fontname, Fontsize\n",
+            "[Events]\n",
+            "Format: Start, End, Text, Style\n",
+            "Dialogue: 0:00:01.00,0:00:02.00,Dobro, jutro,Default\n",
+            "Comment: 0:00:01.00,0:00:02.00,Skip,Default\n",
+            "Dialogue: 0:00:02.00,0:00:03.00\n",
+        ]
+        assert list(iter_ssa_text(lines)) == ["Dobro, jutro"]
+
+    def test_yields_dialogue_incrementally(self):
+        """Checks each line of dialogue is yielded as soon as it is read."""
+        def lines():
+            yield "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,Bok\n"
+            raise AssertionError("read too far")
+
+        assert next(iter_ssa_text(lines())) == "Bok"
+
+
+IMPORT_TIME_BUDGET = 0.15
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def measure_import(module):
+    """Imports a module in a fresh interpreter and returns the result."""
+    code = textwrap.dedent(f"""
+        import json, sys, time
+        start = time.perf_counter()
+        import {module}
+        elapsed = time.perf_counter() - start
+        print(json.dumps([elapsed, sorted(sys.modules)]))
+        """)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC_DIR,
+        capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout)
+
+
+class TestImportTime:
+    """Tests for the start-up cost of importing the application modules."""
+
+    heavy_modules = [
+        "bs4", "deep_translator", "docx", "ebooklib", "lxml", "pycountry",
+        "pypdf", "requests"
+        ]
+
+    @pytest.mark.parametrize("module", ["utils", "script"])
+    def test_heavy_dependencies_not_imported(self, module):
+        """Should only import format and network libraries when used."""
+        _, modules = measure_import(module)
+        loaded = {name.split(".")[0] for name in modules}
+        assert loaded.isdisjoint(self.heavy_modules)
+
+    def test_import_within_budget(self):
+        """Should import utils within IMPORT_TIME_BUDGET seconds."""
+        elapsed = min(measure_import("utils")[0] for _ in range(3))
+        assert elapsed < IMPORT_TIME_BUDGET